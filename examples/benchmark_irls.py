@@ -0,0 +1,89 @@
+__Author__ = "USITC Gravity Modeling Group"
+__Project__ = "Gravity Code"
+__Created__ = "10-18-2026"
+__Description__ = "Estimation time of the built-in IRLS solver (engine='irls') relative to statsmodels (engine='glm')."
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.gme.construct_data.EstimationData import EstimationData
+from src.gme.estimate.EstimationModel import EstimationModel
+
+# Run from the repository root, e.g. python -m examples.benchmark_irls 60 10 hc1
+# The arguments are the number of countries and years in the simulated panel (default 40 and 8) and the standard
+# errors, 'hc1' (default), 'hc0', or 'cluster' (clustered by country pair). Each engine estimates the same model with
+# importer-year and exporter-year fixed effects on the same data. The time of each stage is taken from
+# stage_diagnostics, so the 'Dense Design' stage, which only statsmodels requires, is reported separately from 'Fit'
+# (which, for engine='glm', includes the covariance).
+
+number_of_countries = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+number_of_years = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+standard_errors = sys.argv[3] if len(sys.argv) > 3 else 'hc1'
+
+
+def simulate_panel(number_of_countries, number_of_years, seed=0):
+    '''
+    Simulate a square panel of bilateral trade with gravity variables.
+    '''
+    rng = np.random.default_rng(seed)
+    countries = np.array(['C' + str(number).zfill(3) for number in range(number_of_countries)])
+    importer, exporter, year = [values.ravel() for values in np.meshgrid(np.arange(number_of_countries),
+                                                                        np.arange(number_of_countries),
+                                                                        np.arange(2000, 2000 + number_of_years),
+                                                                        indexing='ij')]
+    number_of_observations = importer.shape[0]
+    panel = pd.DataFrame({'importer': countries[importer],
+                          'exporter': countries[exporter],
+                          'year': year})
+    panel['pair'] = panel['importer'] + panel['exporter']
+    panel['log_distance'] = rng.normal(8, 1, number_of_observations)
+    for variable in ['agree_pta', 'common_language', 'contiguity']:
+        panel[variable] = (rng.random(number_of_observations) < 0.2).astype(float)
+    importer_effect = rng.normal(0, 1, number_of_countries)
+    exporter_effect = rng.normal(0, 1, number_of_countries)
+    linear_predictor = (5 - 0.8 * (panel['log_distance'].values - 8) + 0.4 * panel['agree_pta'].values
+                        + importer_effect[importer] + exporter_effect[exporter])
+    panel['trade_value'] = rng.poisson(np.exp(linear_predictor)).astype(float)
+    panel.loc[rng.random(number_of_observations) < 0.2, 'trade_value'] = 0
+    return panel
+
+
+def estimate(panel, engine):
+    '''
+    Estimate the model with an engine, returning the results, the stage times, the number of iterations, and the total
+    time.
+    '''
+    estimation_data = EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                                     trade_var_name='trade_value')
+    model_arguments = {'cluster_on': 'pair'} if standard_errors == 'cluster' else \
+        {'std_errors': standard_errors.upper()}
+    model = EstimationModel(estimation_data, lhs_var='trade_value',
+                            rhs_var=['log_distance', 'agree_pta', 'common_language', 'contiguity'],
+                            fixed_effects=[['importer', 'year'], ['exporter', 'year']], engine=engine,
+                            **model_arguments)
+    start_time = time.perf_counter()
+    results = model.estimate()['all']
+    total_time = time.perf_counter() - start_time
+    stage_times = model.stage_diagnostics['Wall Time (seconds)'].groupby(level='Stage').sum()
+    return results, stage_times, int(model.stage_diagnostics['Iterations'].sum()), total_time
+
+
+panel = simulate_panel(number_of_countries, number_of_years)
+print('Input data: ' + str(panel.shape[0]) + ' observations')
+
+outputs = {engine: estimate(panel, engine) for engine in ['glm', 'irls']}
+for engine, (results, stage_times, iterations, total_time) in outputs.items():
+    print(engine + ': ' + str(len(results.params)) + ' columns, ' + str(iterations) + ' iterations, fit '
+          + str(round(stage_times.get('Fit', 0) + stage_times.get('Covariance', 0), 2)) + ' s, dense design ' + str(round(stage_times.get('Dense Design', 0), 2)) + ' s, total '
+          + str(round(total_time, 2)) + ' s')
+
+covariates = ['log_distance', 'agree_pta', 'common_language', 'contiguity']
+glm_results, irls_results = outputs['glm'][0], outputs['irls'][0]
+print('Largest difference in the estimates: '
+      + str(np.max(np.abs(glm_results.params[covariates] - irls_results.params[covariates]))))
+print('Largest relative difference in the standard errors: '
+      + str(np.max(np.abs(irls_results.bse[covariates] / glm_results.bse[covariates] - 1))))
+glm_time = outputs['glm'][1].get('Fit', 0) + outputs['glm'][1].get('Dense Design', 0)
+irls_time = outputs['irls'][1].get('Fit', 0) + outputs['irls'][1].get('Covariance', 0)
+print('Speed-up of the dense design and fit: ' + str(round(glm_time / irls_time, 1)) + 'x')
@@ -4,8 +4,10 @@ from .construct_data.make_data_square import *
 from .estimate.combine_sector_results import *
 from .estimate.DiagnosticsLog import *
 from .estimate.EstimationModel import *
+from .estimate.estimate_chunked import *
 from .estimate.format_regression_table import *
 from .estimate.save_and_load import *
 from .estimate.SlimResults import *
 from .estimate.Specification import *
+from .estimate.SpecificationGrid import *
 from .estimate.visualize_results import *
@@ -20,7 +20,8 @@ class EstimationData(object):
                  sector_var_name: str = None,
                  expend_var_name: str = None,
                  output_var_name: str = None,
-                 notes: List[str] = list()):
+                 notes: List[str] = list(),
+                 copy: bool = True):
         '''
         An object used for storing data for gravity modeling and producing some summary statistics.
         Args:
@@ -44,6 +45,10 @@ class EstimationData(object):
                 The name of the column containing exporter total output information
             notes: (optional) str
                 A string to be included as a note n the object.
+            copy: (optional) bool
+                If True (the default), the EstimationData stores a copy of data_frame. If False, it shares the values of
+                data_frame rather than copying them, which avoids doubling memory use for large datasets, but later
+                changes to the values of either DataFrame are reflected in the other.
 
         Attributes:
             data_frame: Pandas.DataFrame
@@ -292,7 +297,7 @@ class EstimationData(object):
         ##############
         # Attributes #
         ##############
-        self.data_frame = data_frame.copy()
+        self.data_frame = data_frame.copy(deep=copy)
         self.name = name
         self.imp_var_name = imp_var_name
         self.exp_var_name = exp_var_name
@@ -3,10 +3,13 @@ __Project__ = "Construct Data"
 __Created__ = "01/11/2018"
 __all__ = ['make_data_square']
 
+import logging
 import numpy as np
 import pandas as pd
 from warnings import warn
 
+logger = logging.getLogger(__name__)
+
 
 def make_data_square(trade_dataframe=None,
                      imp_var_name: str = "importer",
@@ -118,8 +121,7 @@ def _not_year_by_year(trade_dataframe,
             "dimensions of the constructed square data ({0}, {1}) do not match the expected dimensions ({2}, {3})".format(
                 square_data.shape[0], square_data.shape[1], expected_length, expected_width))
 
-    print("Number of Missing Values in Square Trade Data")
-    print(square_data.isnull().sum())
+    logger.info("Number of Missing Values in Square Trade Data\n%s", square_data.isnull().sum())
 
     complete_square_data = square_data
 
@@ -149,12 +151,12 @@ def _year_by_year(trade_dataframe,
     iteration_counter = 1
 
     for year_group in years:
-        print(year_group)
+        logger.debug('Year %s', year_group)
 
         year_data = grouped_data.get_group(year_group)
         countries = _country_list(year_data, importer_var_name, exporter_var_name)
 
-        print("Number of Countries in " + str(year_group) + ': ' + str(len(countries)))
+        logger.debug("Number of Countries in %s: %d", year_group, len(countries))
         countries['key'] = 0  # this provides a series to merge on.
 
         square_data = countries.merge(countries, how='outer', on='key')
@@ -191,8 +193,7 @@ def _year_by_year(trade_dataframe,
                 "dimensions of the constructed square data ({0}, {1}) do not match the expected dimensions ({2}, {3})".format(
                     square_data.shape[0], square_data.shape[1], expected_length, expected_width))
 
-        print("Number of Missing Values in Square Trade Data")
-        print(square_data.isnull().sum())
+        logger.info("Number of Missing Values in Square Trade Data\n%s", square_data.isnull().sum())
 
         if iteration_counter == 1:
             complete_square_data = square_data
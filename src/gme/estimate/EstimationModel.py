@@ -5,11 +5,14 @@ __all__ = ['EstimationModel']
 
 from typing import List,Tuple, Dict
 from typing import Union
-from .Specification import Specification
+import pandas as pd
+from .Specification import Specification, _check_specification_arguments
 from .DiagnosticsLog import DiagnosticsLog
 from .combine_sector_results import combine_sector_results
 from ._slice_data_for_estimation import _slice_data_for_estimation
 from ._ppml_estimation_and_diagnostics import _estimate_ppml
+from ._stage_profile import _StageProfile, _memory_tracing
+from ._convergence_trace import _FailureHandling, FAILURE_POLICIES
 from .format_regression_table import format_regression_table
 from .SlimResults import SlimResults
 
@@ -18,7 +21,7 @@ class EstimationModel(object):
     def __init__(self,
                  estimation_data=None,
                  spec_name: str = 'default_name',
-                 lhs_var: str = None,
+                 lhs_var: Union[str, List[str]] = None,
                  rhs_var: List[str] = [],
                  sector_by_sector: bool = False,
                  drop_imp_exp: List[str] = [],
@@ -38,7 +41,12 @@ class EstimationModel(object):
                  drop_intratrade: bool = False,
                  retain_modified_data: bool = True,
                  full_results: bool = True,
-                 cluster_on: str=None):
+                 cluster_on: Union[str, List[str]] = None,
+                 engine: str = 'glm',
+                 precision: str = 'float64',
+                 warm_start: Union[str, Dict[str, float]] = None,
+                 prune_fixed_effects: bool = False,
+                 dense_design_limit: float = 1024):
         '''
         The GME object is used to specify and run an gravity estimation.  A gme.EstimationData must be supplied along with a
         collection of largely optional arguments that specify variables to include, fixed effects to create, and how
@@ -51,9 +59,15 @@ class EstimationModel(object):
                 A GME EstimationData to use as the basis of the gravity model.
             spec_name: (optional) str
                 A name for the model.
-            lhs_var: str
+            lhs_var: Union[str, List[str]]
                 The column name of the variable to be used as the dependent or 'left-hand-side' variable in the
-                regression.
+                regression. A list of column names (e.g. ['trade_value', 'agr_trade_value']) estimates the model for
+                each outcome on the same observations. The fixed effects and design are then created once, and the
+                collinearity diagnostics and the design matrix are reused by each outcome for which they are the same,
+                so that the additional work for an outcome is largely its estimation. Results for each outcome are
+                keyed by outcome name (or, if sector_by_sector, by outcome and sector, e.g. 'trade_value_10') rather
+                than by 'all' (or sector). estimate raises a ValueError if two outcome and sector pairs would have the
+                same key (e.g. 'trade' with sector '10_a' and 'trade_10' with sector 'a').
             rhs_var: List[str]
                 A list of column names for the independent or 'right-hand-side' variable(s) to be used in the regression.
             sector_by_sector: bool
@@ -81,7 +95,8 @@ class EstimationModel(object):
                 column in the EstimationData.
             drop_missing: bool
                 If True, rows with missing values are dropped. Default is true, which drops if observations are missing
-                in any of the columns specified by lhs_var or rhs_var.
+                in any of the columns specified by lhs_var or rhs_var. If lhs_var is a list, observations missing any
+                of its outcomes are dropped, so that each outcome is estimated on the same observations.
             variables_to_drop_missing: (optional) List[str]
                 A list of column names for specifying which columns to check for missing values when dropping rows.
             fixed_effects: (optional) List[Union[str,List[str]]]
@@ -96,6 +111,9 @@ class EstimationModel(object):
                 list of tuples for multiple dimensions. For example: {'importer':['DEU', 'ZAF'], 'exporter':['USA']} or
                 {('importer','year'):[('ARG','2015'),('BEL','2013')]}
                 The fixed effect categories in the keys need to be a subset of the list supplied for fixed_effects.
+                Values are matched exactly against the categories, so 'US' does not match 'USA'. A key matches every
+                set of fixed effects that includes it, e.g. {'importer':['DEU']} also drops the DEU importer-year
+                fixed effects.
                 If not specified, the colinearity diagnostics will identify a column to drop on its own.
             std_errors: (optional) str
                 Specifies the type of standard errors to be computed. Default is HC1, heteroskedascticity robust errors.
@@ -108,22 +126,78 @@ class EstimationModel(object):
                 False.
             retain_modified_data: (optional) bool
                 If True, the estimation DataFrames for each sector after they have been (potentially) modified during
-                the pre-diagnostics for collinearity and convergence issues. Default is False. WARNING: these object
-                sizes can be very large in memory so use with caution.
+                the pre-diagnostics for collinearity and convergence issues. Default is False. Fixed effect columns are
+                stored as sparse columns. WARNING: these object sizes can be very large in memory so use with caution.
             full_results: bool
                 If True, estimate() returns the full results object from the GLM estimation.  These results can be quite
                 large as each estimated sector's results will contain a full copy of the data used for its estimation,
                 vectors of predicted values, and other memory intensive pieces of data.  If False, estimate() returns
                 a smaller subset of the results that are likely most useful (e.g. .params, .nobs, .bse, .pvalues, .aic,
                 .bic).  For a list of these attributes, see the documentation for the function SlimResults
-            cluster_on: (optional) str
-                The name of a column of categorical variables to use as clusters for clustered standard errors.
+            cluster_on: (optional) Union[str, List[str]]
+                The name of a column of categorical variables to use as clusters for clustered standard errors. A list
+                of columns (e.g. ['importer', 'exporter']) produces multi-way clustered standard errors (Cameron,
+                Gelbach, and Miller, 2011). engine='glm' supports up to two clustering columns.
+            engine: (optional) str
+                The estimation routine to use. 'glm' (default) includes a dummy variable for each fixed effect in a
+                statsmodels GLM estimation. 'hdfe' absorbs the fixed effects by iterative demeaning within the PPML
+                estimation, as in ppmlhdfe, so that estimation time and memory do not grow with the number of fixed
+                effects. With 'hdfe', coefficients and standard errors are only reported for the rhs_var variables and
+                std_errors must be 'nonrobust', 'HC0', or 'HC1'. 'irls' estimates the same model as 'glm' with a
+                built-in IRLS solver that works on the sparse design and solves the normal equations of each iteration
+                by Cholesky factorization, which is much faster than statsmodels when there are many fixed effects.
+                Its results are SlimResults, which do not include the statsmodels model, and std_errors must be
+                'nonrobust', 'HC0', or 'HC1'.
+            precision: (optional) str
+                The floating point precision of the design matrix passed to the GLM estimation, 'float64' (default)
+                or 'float32'. 'float32' halves the memory used by the dense design, which is the largest object in
+                most estimations, and retains the fixed effects in modified_data as one byte integers. The iterative
+                estimation is still accumulated in float64. ppml_diagnostics then reports the memory saved and the
+                largest difference between the estimates and those from a float64 design. Only available with
+                engine='glm', as 'hdfe' does not create fixed effect dummies.
+            warm_start: (optional) Union[str, Dict[str, float]]
+                Starting values for the iterative estimation. By default, each estimation starts from the same values
+                as statsmodels (or ppmlhdfe for engine='hdfe'). 'previous' starts each sector from the rhs_var
+                estimates of the previous sector, which requires sectors to be estimated one after another (n_jobs=1).
+                'pooled' starts each sector from the rhs_var estimates of a pooled estimation of all sectors with
+                absorbed fixed effects. A dictionary (or Pandas.Series) of rhs_var values, e.g. {'log_distance': -0.8},
+                supplies the starting values directly. To re-estimate a model after data are added (e.g. a new year),
+                the previous estimates can be supplied, e.g. previous_model.results_dict['all'].params, and entries
+                other than rhs_var, such as the fixed effects, are ignored. 'loglinear' estimates starting values for
+                each sector (or the full sample) by a log-linear pre-fit: an OLS regression of log(lhs_var) on rhs_var
+                and the fixed effects for positive trade flows, with the fixed effects partialled out, which is much
+                cheaper than a PPML iteration on large panels. In each case, the fixed effects start from their
+                maximum likelihood values given the starting rhs_var values, and rhs_var without a starting value
+                start at zero.
+                Starting values only affect the number of iterations, which is reported in ppml_diagnostics
+                ('Iterations'), and not the estimates, up to the convergence tolerance. ppml_diagnostics also reports
+                the source of the starting values ('Starting Values') and the time taken to compute them
+                ('Starting Values Time').
+            prune_fixed_effects: (optional) bool
+                If True, observations in a fixed effect group with a single observation (singletons) or without
+                positive trade flows are dropped before the fixed effects are created, repeatedly until none remain,
+                as in ppmlhdfe. The dropped observations do not affect the rhs_var estimates, but fewer fixed effects
+                are created and checked for collinearity. The number of observations dropped is reported in
+                ppml_diagnostics ('Singleton Observations Dropped' and 'Zero Trade Group Observations Dropped').
+                Because singletons are not counted, the number of observations and the degrees of freedom
+                correction of the standard errors differ slightly from the default. Default is False.
+            dense_design_limit: (optional) float
+                The size (in MB) of the largest design, as a dense float64 matrix, that engine='glm' estimates with
+                statsmodels, which requires a dense design. Larger designs, such as those with importer-year and
+                exporter-year fixed effects for large panels, are estimated from the sparse design with the solver
+                of engine='irls', which gives the same estimates and standard errors, so that the design is never
+                densified. ppml_diagnostics then reports 'Sparse Design Fit' and the size of the dense design ('Dense
+                Design Size (MB)'), and the results are SlimResults. None always uses statsmodels. Default is 1024.
 
         Attributes:
             estimation_data: Return the EstimationData.
             results_dict: Return the dictionary of regression results (after applying estimate method).
             modified_data: Return data modified data after removing problematic columns (after applying estimate method)
             ppml_diagnostics: Return PPML estimation diagnostic information (after applying estimate method)
+            stage_diagnostics: Return the time, memory, and iterations of each stage of the estimation (after
+                applying estimate method)
+            convergence_trace: Return the deviance and change in the estimates of each IRLS iteration (after
+                applying estimate method with trace_convergence=True)
 
 
         Methods:
@@ -166,17 +240,16 @@ class EstimationModel(object):
         if estimation_data is None:
             raise ValueError("A EstimationData must be provided.")
 
-        if cluster_on is not None and not isinstance(cluster_on, str):
-            raise ValueError("cluster_on must be a string indicating the column to cluster on.")
-
-        if not isinstance(omit_fixed_effect, dict):
-            raise ValueError("As of gme v1.3, omit_fixed_effect argument must be a dictionary.")
+        _check_specification_arguments(lhs_var=lhs_var, rhs_var=rhs_var, omit_fixed_effect=omit_fixed_effect,
+                                       std_errors=std_errors, cluster_on=cluster_on, engine=engine,
+                                       precision=precision, sector_by_sector=sector_by_sector,
+                                       warm_start=warm_start, dense_design_limit=dense_design_limit)
 
         ##############
         # Attributes #
         ##############
         if (variables_to_drop_missing is None) & (drop_missing):
-            variables_to_drop_missing = [lhs_var] + rhs_var
+            variables_to_drop_missing = (list(lhs_var) if isinstance(lhs_var, list) else [lhs_var]) + rhs_var
         self.estimation_data = estimation_data
         self.data_log = estimation_data.data_log
 
@@ -207,6 +280,11 @@ class EstimationModel(object):
                                            drop_intratrade=drop_intratrade,
                                            cluster=cluster,
                                            cluster_on=cluster_on,
+                                           engine=engine,
+                                           precision=precision,
+                                           warm_start=warm_start,
+                                           prune_fixed_effects=prune_fixed_effects,
+                                           dense_design_limit=dense_design_limit,
                                            verbose=False)
         self.retain_modified_data = retain_modified_data
         self.full_results = full_results
@@ -214,12 +292,25 @@ class EstimationModel(object):
         self.modified_data = None
         self.diagnostics_log = DiagnosticsLog(spec_name=spec_name)
         self.ppml_diagnostics = None
+        self.stage_diagnostics = None
+        self.convergence_trace = None
 
     ###########
     # Methods #
     ###########
 
-    def estimate(self):
+    def estimate(self,
+                 n_jobs: int = 1,
+                 executor=None,
+                 trace_memory: bool = False,
+                 trace_convergence: bool = False,
+                 iteration_callback=None,
+                 progress_callback=None,
+                 checkpoint_dir: str = None,
+                 time_limit: float = None,
+                 iteration_budget: int = None,
+                 failure_policy: str = 'skip',
+                 retry_tolerance: float = 1e-6):
         '''
         Perform sector by sector GLM estimation with PPML diagnostics. The routine follows several steps.
         services. If sector_by_sector is specified, the routine is repeated for each sector.
@@ -237,15 +328,77 @@ class EstimationModel(object):
 
         4. Post-Diagnostics: A test for over-fit values is conducted.
 
-        The method returns one object and stores three in the EstimationModel.  The first object, which is
+        Args:
+            n_jobs: (optional) int
+                The number of processes used to estimate sectors in parallel when sector_by_sector is True. The default
+                (1) estimates sectors one after another and -1 uses all available processors. Results are stored in
+                the same sector order regardless of the order in which sectors complete.
+            executor: (optional) concurrent.futures.Executor
+                An existing executor (e.g. a ProcessPoolExecutor) to which sector estimations are submitted. If
+                supplied, n_jobs is ignored and the executor is not shut down after estimation.
+            trace_memory: (optional) bool
+                If True, the peak memory increase of each stage of the estimation is recorded in stage_diagnostics.
+                Memory is traced with tracemalloc, which slows the estimation, so the default is False.
+            trace_convergence: (optional) bool
+                If True, each IRLS iteration of each regression is recorded in convergence_trace. Default is False.
+            iteration_callback: (optional) callable
+                A function called on each IRLS iteration of each regression as iteration_callback(key, iteration,
+                deviance, max_coefficient_change, elapsed_time), where key is the key of the regression in
+                results_dict, max_coefficient_change is the largest absolute change in the estimated parameters from
+                the previous iteration (NaN for the first iteration), and elapsed_time is the seconds since the fit
+                began. If it returns True, the estimation of that regression is stopped and its results_dict entry is
+                a message, so that, for example, sectors that are diverging can be abandoned early. When sectors are
+                estimated in parallel, the callback is called in the worker processes and must be defined at the
+                module level.
+            progress_callback: (optional) callable
+                A function called after each sector is completed (or once, with the sector 'all', if the estimation is
+                not sector by sector) with a dictionary containing the sector ('sector'), the number of sectors
+                completed ('completed') and in total ('total'), the seconds elapsed since the estimation began
+                ('elapsed_time') and expected until it is complete ('expected_time_remaining'), and the number of
+                sectors completed per minute ('throughput'). It is called in the main process, including when sectors
+                are estimated in parallel.
+            checkpoint_dir: (optional) str
+                A directory in which the results (as SlimResults), diagnostics, and stages of each sector are stored as
+                it is completed, when sector_by_sector is True. If an estimation is interrupted, estimating again with
+                the same checkpoint_dir, specification, and data loads the completed sectors from the directory and
+                only estimates the others. The modified data of loaded sectors are not stored, so their entries in
+                modified_data are None. A ValueError is raised if the directory contains checkpoints of a different
+                specification or data.
+            time_limit: (optional) float
+                The wall-clock seconds allowed for each sector (or for the estimation, if it is not sector by sector).
+                The limit is checked on each IRLS iteration, including in worker processes, and a regression that
+                exceeds it is stopped and handled according to failure_policy.
+            iteration_budget: (optional) int
+                The IRLS iterations allowed for each sector, summed over its outcomes if lhs_var is a list. Unlike
+                iteration_limit, after which the estimates are returned, a regression that exceeds the budget is
+                stopped and handled according to failure_policy.
+            failure_policy: (optional) str
+                The handling of a regression that exceeds time_limit or iteration_budget or raises an error. 'skip'
+                (the default) stores a message in place of its results, 'retry' estimates it again with the looser
+                convergence tolerance retry_tolerance and new budgets, and 'abort' stops the estimation with a
+                RuntimeError (completed sectors are kept in checkpoint_dir, if supplied). If time_limit,
+                iteration_budget, or a policy other than 'skip' is supplied, ppml_diagnostics reports the outcome of
+                each regression ('Estimation Outcome': 'completed', 'completed on retry', 'skipped', or 'stopped'), the
+                number of attempts ('Attempts'), and the message of the first failed attempt ('Failure').
+            retry_tolerance: (optional) float
+                The convergence tolerance of regressions retried under failure_policy='retry', in place of the
+                default of 1e-8. For every engine, the tolerance applies to the change in the deviance relative to
+                the deviance, so that it does not depend on the scale of lhs_var. Default is 1e-6.
+
+        Progress messages are reported through the logging module, under the logger 'gme.estimate', rather than
+        printed. For example, logging.basicConfig(level=logging.INFO) displays the start and completion of each
+        sector and the expected time to completion, and level=logging.DEBUG also displays the omitted regressors.
+
+        The method returns one object and stores up to five in the EstimationModel.  The first object, which is
         both returned and stored as EstimationModel.results_dict is
 
         Returns: Dict[statsmodels.genmod.generalized_linear_model.GLMResultsWrapper]
             The primary return is a dictionary of results objects from the statsmodels GLM.fit routine, each keyed using
             either the name of the sector if the estimation was sector by sector (i.e. sector_by_sector = True) or with
-            the key 'all' if not.
+            the key 'all' if not. If lhs_var is a list, results are keyed by outcome (e.g. 'trade_value') or by outcome
+            and sector (e.g. 'trade_value_10').
 
-            Additionally, the method assigns two or three attributes of the Estimation model:
+            Additionally, the method assigns three to five attributes of the Estimation model:
                 1. EstimationModel.results_dict:  Dict[statsmodels.genmod.generalized_linear_model.GLMResultsWrapper]
                     A copy of the returned dictionary of results, as described above, is stored with the EstimationModel
                 2. EstimationModel.ppml_diagnostics: pandas.core.frame.DataFrame
@@ -254,6 +407,16 @@ class EstimationModel(object):
                     A dictionary using the same keys as results_dict, each containing the modified dataframes created
                     during the pre-diagnostic stages of the estimations. Because of the large memory footprint of this
                     assignment, it is only done if specified (i.e. EstimationModel.retain_modified_data = True)
+                4. EstimationModel.stage_diagnostics: pandas.core.frame.DataFrame
+                    A data frame with a row for each stage of each regression (e.g. 'Fixed Effects', 'Collinearity
+                    Check', 'Fit', 'Covariance'), indexed by the key of the regression and the stage, and numeric
+                    columns for the wall time and CPU time of the stage in seconds, its peak memory increase in MB
+                    (if trace_memory is True), and the number of IRLS iterations (for the 'Fit' stage). Stages that
+                    apply to all regressions, such as 'Slicing', are keyed by 'all'.
+                5. EstimationModel.convergence_trace: pandas.core.frame.DataFrame
+                    If trace_convergence is True, a data frame with a row for each IRLS iteration of each regression,
+                    indexed by the key of the regression and the iteration, with the columns 'Deviance', 'Max
+                    Coefficient Change', and 'Elapsed Time (seconds)'.
 
         Examples:
             >>> sample_estimation_model.estimate("ppml")
@@ -268,21 +431,50 @@ class EstimationModel(object):
         if specification.sector_by_sector is True and meta_data.sector_var_name is None:
             raise ValueError('sector_var_name must be specified for sector_by_sector option')
 
-        estimation_data_frame, data_log = _slice_data_for_estimation(data_frame=data_frame,
-                                                                      specification=specification,
-                                                                      meta_data=meta_data,
-                                                                      data_log=data_log)
-
-        results_dict, ppml_diagnostics, modified_data \
-            = _estimate_ppml(data_frame=estimation_data_frame,
-                             meta_data=meta_data,
-                             specification=specification,
-                             fixed_effects=specification.fixed_effects,
-                             drop_fixed_effect=specification.omit_fixed_effect,
-                             cluster=specification.cluster,
-                             cluster_on=specification.cluster_on)
+        if not isinstance(n_jobs, int) or n_jobs == 0 or n_jobs < -1:
+            raise ValueError('n_jobs must be a positive integer or -1.')
+
+        if isinstance(specification.warm_start, str) and specification.warm_start == 'previous' and \
+                specification.sector_by_sector and (
+                executor is not None or n_jobs != 1):
+            raise ValueError("warm_start='previous' requires sectors to be estimated one after another (n_jobs=1).")
+
+        if checkpoint_dir is not None and not specification.sector_by_sector:
+            raise ValueError('checkpoint_dir requires sector_by_sector estimation.')
+
+        if failure_policy not in FAILURE_POLICIES:
+            raise ValueError("failure_policy must be 'skip', 'retry', or 'abort'.")
+
+        with _memory_tracing(trace_memory):
+            profile = _StageProfile(trace_memory)
+            profile.begin('Slicing')
+            estimation_data_frame, data_log = _slice_data_for_estimation(data_frame=data_frame,
+                                                                          specification=specification,
+                                                                          meta_data=meta_data,
+                                                                          data_log=data_log)
+            profile.end()
+
+            results_dict, ppml_diagnostics, modified_data, stage_diagnostics, convergence_trace \
+                = _estimate_ppml(data_frame=estimation_data_frame,
+                                 meta_data=meta_data,
+                                 specification=specification,
+                                 fixed_effects=specification.fixed_effects,
+                                 drop_fixed_effect=specification.omit_fixed_effect,
+                                 cluster=specification.cluster,
+                                 cluster_on=specification.cluster_on,
+                                 n_jobs=n_jobs,
+                                 executor=executor,
+                                 trace_memory=trace_memory,
+                                 trace_convergence=trace_convergence,
+                                 iteration_callback=iteration_callback,
+                                 progress_callback=progress_callback,
+                                 checkpoint_dir=checkpoint_dir,
+                                 failure_handling=_FailureHandling(time_limit, iteration_budget, failure_policy,
+                                                                   retry_tolerance))
 
         self.ppml_diagnostics = ppml_diagnostics
+        self.stage_diagnostics = pd.concat([profile.to_data_frame('all'), stage_diagnostics])
+        self.convergence_trace = convergence_trace if trace_convergence else None
         if self.retain_modified_data:
             self.modified_data = modified_data
 
@@ -291,7 +483,10 @@ class EstimationModel(object):
         else:
             slim_results_dict = {}
             for key in results_dict:
-                slim_results_dict[key] = SlimResults(results_dict[key])
+                if isinstance(results_dict[key], SlimResults):
+                    slim_results_dict[key] = results_dict[key]
+                else:
+                    slim_results_dict[key] = SlimResults(results_dict[key])
             self.results_dict = slim_results_dict
 
 
@@ -3,12 +3,12 @@ __Project__ = "Gravity Code"
 __Created__ = "03/12/2018"
 __all__ = ['Specification']
 
-from typing import List
+from typing import List, Union
 
 class Specification(object):
     def __init__(self,
                  spec_name:str = 'default_name',
-                 lhs_var: str = None,
+                 lhs_var: Union[str, List[str]] = None,
                  rhs_var: List[str] = None,
                  sector_by_sector: bool = False,
                  drop_imp_exp: List[str] = [],
@@ -22,12 +22,17 @@ class Specification(object):
                  drop_missing: bool = False,
                  variables_to_drop_missing: List[str] = [],
                  fixed_effects:List[str] = [],
-                 omit_fixed_effect:List[str] = [],
+                 omit_fixed_effect: dict = {},
                  std_errors:str = 'HC1',
                  iteration_limit:int = 1000,
                  drop_intratrade:bool = True,
                  cluster: bool=False,
-                 cluster_on: str=None,
+                 cluster_on: Union[str, List[str]] = None,
+                 engine: str = 'glm',
+                 precision: str = 'float64',
+                 warm_start = None,
+                 prune_fixed_effects: bool = False,
+                 dense_design_limit: float = 1024,
                  verbose:bool = True):
         if lhs_var is None:
             raise ValueError('lhs_var (left hand side variable) must be specified.')
@@ -53,4 +58,70 @@ class Specification(object):
         self.drop_intratrade = drop_intratrade
         self.cluster=cluster
         self.cluster_on=cluster_on        
-        self.verbose = verbose
\ No newline at end of file
+        self.engine = engine
+        self.precision = precision
+        self.warm_start = warm_start
+        self.prune_fixed_effects = prune_fixed_effects
+        self.dense_design_limit = dense_design_limit
+        self.verbose = verbose
+
+
+def _check_specification_arguments(lhs_var, rhs_var, omit_fixed_effect, std_errors, cluster_on, engine, precision,
+                                   sector_by_sector=False, warm_start=None, dense_design_limit=1024):
+    '''
+    Value checks for the arguments of a specification, shared by EstimationModel and SpecificationGrid.
+    :param lhs_var: (Union[str, List[str]]) The outcome or outcomes.
+    :param rhs_var: (List[str]) The covariates.
+    :param omit_fixed_effect: (Dict) Fixed effects omitted by the user.
+    :param std_errors: (str) The type of standard errors.
+    :param cluster_on: (Union[str, List[str]]) Clustering variables, if any.
+    :param engine: (str) The estimation engine.
+    :param precision: (str) The precision of the design.
+    :param sector_by_sector: (bool) Whether sectors are estimated separately.
+    :param warm_start: (Union[str, Dict[str, float], Pandas.Series]) The starting values.
+    :param dense_design_limit: (float or None) The largest dense design (in MB) estimated by statsmodels.
+    '''
+    if cluster_on is not None and not isinstance(cluster_on, str) and not (
+            isinstance(cluster_on, list) and len(cluster_on) > 0
+            and all(isinstance(variable, str) for variable in cluster_on)):
+        raise ValueError("cluster_on must be a string or a list of strings indicating the columns to cluster on.")
+
+    if not isinstance(omit_fixed_effect, dict):
+        raise ValueError("As of gme v1.3, omit_fixed_effect argument must be a dictionary.")
+
+    if engine not in ['glm', 'hdfe', 'irls']:
+        raise ValueError("engine must be 'glm', 'hdfe', or 'irls'.")
+
+    if engine in ['hdfe', 'irls'] and std_errors not in ['nonrobust', 'HC0', 'HC1']:
+        raise ValueError("engine='" + engine + "' supports std_errors of 'nonrobust', 'HC0', or 'HC1'.")
+
+    if precision not in ['float64', 'float32']:
+        raise ValueError("precision must be either 'float64' or 'float32'.")
+
+    if engine != 'glm' and precision != 'float64':
+        raise ValueError("precision='float32' is only available with engine='glm'.")
+
+    if engine == 'glm' and isinstance(cluster_on, list) and len(cluster_on) > 2:
+        raise ValueError("engine='glm' supports clustering on at most two columns. Use engine='hdfe' for more.")
+
+    if isinstance(lhs_var, list) and (len(lhs_var) == 0 or len(set(lhs_var)) != len(lhs_var)
+                                      or not all(isinstance(variable, str) for variable in lhs_var)):
+        raise ValueError("lhs_var must be a string or a list of distinct strings indicating the outcome columns.")
+
+    if isinstance(lhs_var, list) and any(variable in rhs_var for variable in lhs_var):
+        raise ValueError("The columns in lhs_var cannot also be included in rhs_var.")
+
+    if isinstance(warm_start, str) and warm_start not in ['previous', 'pooled', 'loglinear']:
+        raise ValueError("warm_start must be 'previous', 'pooled', 'loglinear', or a dictionary of starting values "
+                         "for rhs_var.")
+
+    if isinstance(warm_start, str) and warm_start == 'pooled' and not sector_by_sector:
+        raise ValueError("warm_start='pooled' is only available with sector_by_sector=True.")
+
+    if warm_start is not None and not isinstance(warm_start, str) and not hasattr(warm_start, 'keys'):
+        raise ValueError("warm_start must be 'previous', 'pooled', 'loglinear', or a dictionary of starting values "
+                         "for rhs_var.")
+
+    if dense_design_limit is not None and not (isinstance(dense_design_limit, (int, float))
+                                               and dense_design_limit > 0):
+        raise ValueError("dense_design_limit must be a positive number of MB or None.")
@@ -0,0 +1,318 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+__all__ = ['SpecificationGrid']
+
+import copy
+import time
+import functools
+from typing import List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from .Specification import Specification, _check_specification_arguments
+from .SlimResults import SlimResults
+from .format_regression_table import format_regression_table
+from ._slice_data_for_estimation import _estimation_rows, _select_rows
+from ._ppml_estimation_and_diagnostics import _estimate_ppml, _fill_fixed_effect_cache, _report_progress
+from ._stage_profile import _StageProfile, _memory_tracing
+
+
+class SpecificationGrid(object):
+    def __init__(self,
+                 estimation_data=None,
+                 specifications: List[Specification] = [],
+                 retain_modified_data: bool = False,
+                 full_results: bool = True):
+        '''
+        Estimate many specifications of a gravity model on one EstimationData, such as the variants of a robustness
+        table that differ in rhs_var, keep_years, or omit_fixed_effect. Work that specifications have in common is
+        only done once: each sample filter (e.g. keep_years or drop_missing for a variable) is applied to the data
+        once, and fixed effects are only created once for specifications estimated on the same observations. The
+        specifications can be estimated in parallel.
+
+        Args:
+            estimation_data: gme.EstimationData
+                A GME EstimationData containing the data for all specifications.
+            specifications: List[gme.Specification]
+                The specifications to estimate, each with a unique spec_name. Specifications are used as given, so
+                the Specification defaults apply (e.g. drop_intratrade=True and drop_missing=False), rather than those
+                of EstimationModel. Clustered standard errors are computed for specifications with a cluster_on.
+            retain_modified_data: (optional) bool
+                If True, the estimation DataFrames after the pre-diagnostics are stored in modified_data, as for
+                EstimationModel. Default is False.
+            full_results: (optional) bool
+                If True (default), results_dict contains the full results objects. If False, it contains SlimResults.
+
+        Attributes:
+            estimation_data: Return the EstimationData.
+            specifications: Return the list of specifications.
+            results_dict: Return the dictionary of regression results (after applying run_many method).
+            modified_data: Return the modified data of each regression (after applying run_many method, if
+                retain_modified_data is True).
+            ppml_diagnostics: Return PPML estimation diagnostic information (after applying run_many method)
+            stage_diagnostics: Return the time, memory, and iterations of each stage of each regression (after
+                applying run_many method)
+            convergence_trace: Return the deviance and change in the estimates of each IRLS iteration of each
+                regression (after applying run_many method with trace_convergence=True)
+
+        Methods:
+            run_many: Estimate all specifications.
+            format_regression_table: Format the results into a text, csv, or LaTeX table for presentation.
+
+        Examples:
+            >>> base = dict(lhs_var='trade_value', fixed_effects=[['importer', 'year'], ['exporter', 'year']],
+            ...             drop_intratrade=False, drop_missing=True)
+            >>> grid = SpecificationGrid(est_data,
+            ...                          [Specification(spec_name='(1)', rhs_var=['log_distance'], **base),
+            ...                           Specification(spec_name='(2)', rhs_var=['log_distance', 'agree_pta'],
+            ...                                         **base),
+            ...                           Specification(spec_name='(3)', rhs_var=['log_distance', 'agree_pta'],
+            ...                                         keep_years=[2013, 2014], **base)])
+            >>> grid.run_many(n_jobs=3)
+            >>> grid.format_regression_table(format='csv', path="c:\\folder\\robustness.csv")
+        '''
+        if estimation_data is None:
+            raise ValueError("A EstimationData must be provided.")
+
+        if len(specifications) == 0 or not all(isinstance(specification, Specification)
+                                               for specification in specifications):
+            raise ValueError("specifications must be a non-empty list of gme.Specification objects.")
+
+        spec_names = [specification.spec_name for specification in specifications]
+        if len(set(spec_names)) != len(spec_names):
+            raise ValueError("Each specification must have a unique spec_name.")
+
+        for specification in specifications:
+            _check_specification_arguments(lhs_var=specification.lhs_var, rhs_var=specification.rhs_var,
+                                           omit_fixed_effect=specification.omit_fixed_effect,
+                                           std_errors=specification.std_errors,
+                                           cluster_on=specification.cluster_on, engine=specification.engine,
+                                           precision=specification.precision,
+                                           sector_by_sector=specification.sector_by_sector,
+                                           warm_start=specification.warm_start,
+                                           dense_design_limit=specification.dense_design_limit)
+            if specification.sector_by_sector is True and estimation_data.meta_data.sector_var_name is None:
+                raise ValueError('sector_var_name must be specified for sector_by_sector option')
+
+        self.estimation_data = estimation_data
+        self.specifications = list(specifications)
+        self.retain_modified_data = retain_modified_data
+        self.full_results = full_results
+        self.results_dict = None
+        self.modified_data = None
+        self.ppml_diagnostics = None
+        self.stage_diagnostics = None
+        self.convergence_trace = None
+
+    def run_many(self,
+                 n_jobs: int = 1,
+                 executor=None,
+                 trace_memory: bool = False,
+                 trace_convergence: bool = False,
+                 iteration_callback=None,
+                 progress_callback=None):
+        '''
+        Estimate each specification, as by EstimationModel.estimate.
+
+        Args:
+            n_jobs: (optional) int
+                The number of processes used to estimate specifications in parallel. The default (1) estimates
+                specifications one after another and -1 uses all available processors. Sample filters and fixed
+                effects are created before the specifications are sent to the processes, so they are still shared.
+                Specifications with warm_start='previous' start from the estimates of the preceding specifications, so
+                they must be estimated one after another.
+            executor: (optional) concurrent.futures.Executor
+                An existing executor (e.g. a ProcessPoolExecutor) to which the estimations are submitted. If supplied,
+                n_jobs is ignored and the executor is not shut down after estimation.
+            trace_memory: (optional) bool
+                If True, the peak memory increase of each stage is recorded in stage_diagnostics, as for
+                EstimationModel.estimate. Default is False.
+            trace_convergence: (optional) bool
+                If True, each IRLS iteration of each regression is recorded in convergence_trace. Default is False.
+            iteration_callback: (optional) callable
+                Called on each IRLS iteration of each regression, as for EstimationModel.estimate, with the key of the
+                regression in results_dict.
+            progress_callback: (optional) callable
+                Called after each specification is completed, as for EstimationModel.estimate, with a dictionary
+                containing the spec_name of the specification ('specification') and the progress of the grid.
+
+        Returns: Dict[statsmodels.genmod.generalized_linear_model.GLMResultsWrapper]
+            A dictionary of results objects, which can be passed to format_regression_table or
+            combine_sector_results. Results are keyed by spec_name or, if a specification has several results (e.g.
+            sector_by_sector or a list of lhs_var), by spec_name and the key used by EstimationModel.results_dict
+            (e.g. '(1)_10'). The dictionary is also stored as SpecificationGrid.results_dict. The diagnostics of each
+            regression are stored, with the same keys, as the columns of SpecificationGrid.ppml_diagnostics, and
+            the stages of each regression are stored in SpecificationGrid.stage_diagnostics. The slicing of each
+            specification's data is keyed by spec_name.
+        '''
+        if not isinstance(n_jobs, int) or n_jobs == 0 or n_jobs < -1:
+            raise ValueError('n_jobs must be a positive integer or -1.')
+
+        if (executor is not None or n_jobs != 1) and any(
+                isinstance(specification.warm_start, str) and specification.warm_start == 'previous'
+                for specification in self.specifications):
+            raise ValueError("warm_start='previous' requires specifications to be estimated one after another "
+                             "(n_jobs=1).")
+
+        data_frame = self.estimation_data.data_frame
+        meta_data = self.estimation_data.meta_data
+        filter_cache = {}
+        fixed_effect_caches = {}
+        # The most recent estimates of each outcome, which specifications with warm_start='previous' start from
+        previous_params = {}
+        outputs = {}
+        slicing_profiles = {}
+        start_time = time.time()
+
+        def prepare(specification):
+            # Apply the (cached) sample filters and find the fixed effects shared by specifications using the same
+            # observations
+            profile = _StageProfile(trace_memory)
+            profile.begin('Slicing')
+            data_log = copy.copy(self.estimation_data.data_log)
+            rows, using_variables, data_log = _estimation_rows(data_frame, specification, meta_data, data_log,
+                                                               filter_cache)
+            fixed_effect_cache = fixed_effect_caches.setdefault(np.packbits(rows).tobytes(), {})
+            estimation_data_frame = _select_rows(data_frame, rows, using_variables)
+            profile.end()
+            slicing_profiles[specification.spec_name] = profile
+            return estimation_data_frame, fixed_effect_cache
+
+        if executor is None and n_jobs == 1:
+            with _memory_tracing(trace_memory):
+                for specification in self.specifications:
+                    estimation_data_frame, fixed_effect_cache = prepare(specification)
+                    outputs[specification.spec_name] = _estimate_specification(estimation_data_frame, meta_data,
+                                                                               specification, fixed_effect_cache,
+                                                                               previous_params, trace_memory,
+                                                                               trace_convergence,
+                                                                               _grid_callback(specification.spec_name,
+                                                                                              iteration_callback))
+                    _report_progress(start_time, len(outputs), len(self.specifications), 'Specification',
+                                     specification.spec_name, progress_callback)
+        else:
+            pool = executor
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=None if n_jobs == -1 else n_jobs)
+            try:
+                futures = {}
+                for specification in self.specifications:
+                    with _memory_tracing(trace_memory):
+                        estimation_data_frame, fixed_effect_cache = prepare(specification)
+                    _fill_fixed_effect_cache(fixed_effect_cache, estimation_data_frame, meta_data, specification)
+                    specification_cache = {key: codes for key, codes in fixed_effect_cache.items()
+                                           if key[1] == str(specification.fixed_effects)}
+                    futures[pool.submit(_estimate_specification, estimation_data_frame, meta_data, specification,
+                                        specification_cache, None, trace_memory, trace_convergence,
+                                        _grid_callback(specification.spec_name, iteration_callback))] = \
+                        specification.spec_name
+                for future in as_completed(futures):
+                    outputs[futures[future]] = future.result()
+                    _report_progress(start_time, len(outputs), len(futures), 'Specification', futures[future],
+                                     progress_callback)
+            finally:
+                if executor is None:
+                    pool.shutdown()
+
+        # Combine the results in the order of the specifications
+        results_dict = {}
+        modified_data = {}
+        ppml_diagnostics = pd.DataFrame([])
+        stage_diagnostics = []
+        convergence_trace = []
+        for specification in self.specifications:
+            specification_results, diagnostics, specification_modified_data, specification_stages, \
+                specification_trace = outputs.pop(specification.spec_name)
+            if isinstance(diagnostics, pd.Series):
+                diagnostics = diagnostics.to_frame('all')
+            keys = {key: _grid_key(specification.spec_name, key) for key in specification_results}
+            for key, results in specification_results.items():
+                if not self.full_results and not isinstance(results, SlimResults):
+                    results = SlimResults(results)
+                results_dict[keys[key]] = results
+                modified_data[keys[key]] = specification_modified_data[key]
+            ppml_diagnostics = pd.concat([ppml_diagnostics, diagnostics.rename(columns=keys)], axis=1)
+            stage_diagnostics.append(slicing_profiles[specification.spec_name].to_data_frame(specification.spec_name))
+            stage_diagnostics.append(specification_stages.rename(index=keys, level='Regression'))
+            convergence_trace.append(specification_trace.rename(index=keys, level='Regression'))
+
+        self.ppml_diagnostics = ppml_diagnostics
+        self.stage_diagnostics = pd.concat(stage_diagnostics)
+        self.convergence_trace = pd.concat(convergence_trace) if trace_convergence else None
+        if self.retain_modified_data:
+            self.modified_data = modified_data
+        self.results_dict = results_dict
+        return self.results_dict
+
+    def format_regression_table(self, **kwargs):
+        '''
+        Format the results of the specifications into a table with significance stars, rounded values, etc. The method
+        is a shortcut to the stand-alone function. See the function gme.estimate.format_regression_table for the
+        arguments.
+
+        Examples:
+            >>> grid.format_regression_table(format='tex', path="c:\\folder\\robustness.tex")
+        '''
+        if self.results_dict is None:
+            raise ValueError('SpecificationGrid must be estimated first (SpecificationGrid.results_dict cannot be None)')
+        return format_regression_table(results_dict=self.results_dict, **kwargs)
+
+
+def _estimate_specification(data_frame, meta_data, specification, fixed_effect_cache, previous_params=None,
+                            trace_memory=False, trace_convergence=False, iteration_callback=None):
+    '''
+    Estimate one specification. Defined at the module level so that it can be sent to worker processes.
+    :param data_frame: (Pandas.DataFrame) The sliced data for the specification.
+    :param meta_data: (obj) a MetaData object from gme.EstimationData
+    :param specification: (obj) a Specification object
+    :param fixed_effect_cache: (Dict) Fixed effect codes shared with other specifications on the same observations.
+    :param previous_params: (optional, Dict[str, Pandas.Series]) The most recent estimates of each outcome, which are
+        updated by the estimation.
+    :param trace_memory: (bool) Whether the peak memory increase of each stage is recorded.
+    :param trace_convergence: (bool) Whether the IRLS iterations are recorded.
+    :param iteration_callback: (optional, callable) Called on each IRLS iteration. See _estimate_ppml.
+    :return: (Dict, Pandas.Series or Pandas.DataFrame, Dict, Pandas.DataFrame, Pandas.DataFrame) The results,
+        diagnostics, modified data, stages, and convergence trace, as returned by _estimate_ppml.
+    '''
+    return _estimate_ppml(data_frame=data_frame,
+                          meta_data=meta_data,
+                          specification=specification,
+                          fixed_effects=specification.fixed_effects,
+                          drop_fixed_effect=specification.omit_fixed_effect,
+                          cluster=specification.cluster_on is not None,
+                          cluster_on=specification.cluster_on,
+                          fixed_effect_cache=fixed_effect_cache,
+                          previous_params=previous_params,
+                          trace_memory=trace_memory,
+                          trace_convergence=trace_convergence,
+                          iteration_callback=iteration_callback)
+
+
+def _grid_key(spec_name, key):
+    '''
+    The key of a regression in SpecificationGrid.results_dict.
+    :param spec_name: (str) The name of the specification.
+    :param key: (str) The key of the regression in the specification's results ('all', a sector, or an outcome).
+    :return: (str)
+    '''
+    if key == 'all':
+        return str(spec_name)
+    return str(spec_name) + '_' + str(key)
+
+
+def _grid_callback(spec_name, iteration_callback):
+    '''
+    An iteration_callback for a specification that passes the key of the regression in SpecificationGrid.results_dict
+    to the user's callback. A partial of a module level function is used so that it can be sent to worker processes.
+    :param spec_name: (str) The name of the specification.
+    :param iteration_callback: (callable or None) The user's callback.
+    :return: (callable or None)
+    '''
+    if iteration_callback is None:
+        return None
+    return functools.partial(_call_with_grid_key, spec_name, iteration_callback)
+
+
+def _call_with_grid_key(spec_name, iteration_callback, key, *values):
+    return iteration_callback(_grid_key(spec_name, key), *values)
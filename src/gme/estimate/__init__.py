@@ -1,8 +1,10 @@
 from .combine_sector_results import *
 from .DiagnosticsLog import *
 from .EstimationModel import *
+from .estimate_chunked import *
 from .format_regression_table import *
 from .save_and_load import *
 from .SlimResults import *
 from .Specification import *
+from .SpecificationGrid import *
 from .visualize_results import *
\ No newline at end of file
@@ -0,0 +1,112 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import os
+import pickle
+import hashlib
+import pandas as pd
+from .SlimResults import SlimResults
+
+#-------------------------------------------------------------------------------------------#
+# This file contains the checkpoints of a sector by sector estimation, which store the      #
+# results, diagnostics, and stages of each sector in a directory as it is completed, so     #
+# that an estimation that is interrupted can be resumed without re-estimating the sectors   #
+# that were completed.                                                                      #
+#-------------------------------------------------------------------------------------------#
+
+FINGERPRINT_FILE = 'fingerprint.txt'
+
+
+def _fingerprint(data_frame, specification):
+    '''
+    A fingerprint of the data and specification of an estimation, which identifies the checkpoints that can be reused.
+    :param data_frame: (Pandas.DataFrame) The sliced data for estimation.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :return: (str) A hexadecimal digest of the columns and values of the data and the attributes of the specification
+        (other than spec_name and verbose, which do not affect the estimates).
+    '''
+    digest = hashlib.sha256()
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in data_frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(data_frame, index=False).values.tobytes())
+    for name, value in sorted(vars(specification).items()):
+        if name in ['spec_name', 'verbose']:
+            continue
+        digest.update(name.encode())
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            digest.update(pd.util.hash_pandas_object(value).values.tobytes())
+        else:
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+def _open_checkpoint(checkpoint_dir, fingerprint):
+    '''
+    Create the checkpoint directory, if needed, and check that its checkpoints are from the same estimation.
+    :param checkpoint_dir: (str) The checkpoint directory.
+    :param fingerprint: (str) The fingerprint of the estimation, as returned by _fingerprint.
+    '''
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = os.path.join(checkpoint_dir, FINGERPRINT_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read().strip() != fingerprint:
+                raise ValueError('checkpoint_dir ' + str(checkpoint_dir) + ' contains checkpoints of a different '
+                                 'specification or data. Use a new directory or remove the existing checkpoints.')
+    else:
+        _write_atomically(path, fingerprint.encode())
+
+
+def _sector_path(checkpoint_dir, sector):
+    '''
+    :param checkpoint_dir: (str) The checkpoint directory.
+    :param sector: The sector.
+    :return: (str) The path of the sector's checkpoint. Sector names are hashed so that any name is a valid file name.
+    '''
+    return os.path.join(checkpoint_dir, 'sector_' + hashlib.md5(str(sector).encode()).hexdigest() + '.pkl')
+
+
+def _load_sectors(checkpoint_dir, sector_list):
+    '''
+    Load the sectors that have been completed.
+    :param checkpoint_dir: (str) The checkpoint directory.
+    :param sector_list: (list) The sectors of the estimation.
+    :return: (Dict) The outputs of each completed sector, as returned by _estimate_sector, keyed by sector.
+    '''
+    sector_outputs = {}
+    for sector in sector_list:
+        path = _sector_path(checkpoint_dir, sector)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                sector_outputs[sector] = pickle.load(f)
+    return sector_outputs
+
+
+def _save_sector(checkpoint_dir, sector, sector_output):
+    '''
+    Store a completed sector. The results are stored as SlimResults and the modified data are not stored, so that
+    checkpoints remain small.
+    :param checkpoint_dir: (str) The checkpoint directory.
+    :param sector: The sector.
+    :param sector_output: (Tuple[Dict, Dict[str, _StageProfile]]) The outputs of the sector, as returned by
+        _estimate_sector.
+    '''
+    outcome_outputs, profiles = sector_output
+    slim_outputs = {}
+    for outcome, (model_fit, post_diagnostics_data_frame, diagnostics_output) in outcome_outputs.items():
+        if not isinstance(model_fit, (str, SlimResults)):
+            model_fit = SlimResults(model_fit)
+        slim_outputs[outcome] = (model_fit, None, diagnostics_output)
+    _write_atomically(_sector_path(checkpoint_dir, sector), pickle.dumps((slim_outputs, profiles)))
+
+
+def _write_atomically(path, contents):
+    '''
+    Write a file so that it is either complete or absent, even if the estimation is interrupted while writing.
+    :param path: (str) The path of the file.
+    :param contents: (bytes) The contents of the file.
+    '''
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(contents)
+    os.replace(temporary_path, path)
@@ -0,0 +1,164 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import time
+import numpy as np
+import statsmodels.api as sm
+
+#-------------------------------------------------------------------------------------------#
+# This file contains the monitoring of the IRLS iterations of an estimation: the callback   #
+# called by each engine on each iteration, which records the convergence trace, enforces    #
+# the time and iteration budgets of the sample, and passes the iteration to the user's      #
+# iteration_callback, which can stop the estimation.                                        #
+#-------------------------------------------------------------------------------------------#
+
+TRACE_COLUMNS = ['Deviance', 'Max Coefficient Change', 'Elapsed Time (seconds)']
+STOPPED_BY_CALLBACK = 'Estimation stopped by iteration_callback.'
+FAILURE_POLICIES = ['skip', 'retry', 'abort']
+
+
+class _EstimationStopped(Exception):
+    '''
+    Raised within an estimation when the iteration_callback requests that it be stopped or a budget is exceeded.
+    '''
+
+    def __init__(self, description, result=STOPPED_BY_CALLBACK):
+        '''
+        :param description: (str) A description of why and when the estimation was stopped, which is logged.
+        :param result: (str) The message stored in place of the results of the estimation.
+        '''
+        super(_EstimationStopped, self).__init__(description)
+        self.result = result
+
+
+class _SampleBudget(object):
+    '''
+    The wall-clock and iteration budgets of the estimation of one sample (a sector or all data), which are shared by
+    the regressions of its outcomes and checked on each IRLS iteration. As they are checked within the estimation,
+    they are enforced in worker processes.
+    '''
+
+    def __init__(self, time_limit: float = None, iteration_budget: int = None):
+        '''
+        :param time_limit: (float or None) The seconds after which the estimation is stopped.
+        :param iteration_budget: (int or None) The number of IRLS iterations, summed over the outcomes, after which
+            the estimation is stopped.
+        '''
+        self.time_limit = time_limit
+        self.iteration_budget = iteration_budget
+        self.start_time = time.perf_counter()
+        self.iterations = 0
+
+    def check(self, key):
+        '''
+        Count an IRLS iteration and stop the estimation if a budget is exceeded.
+        :param key: (str) The key of the regression, as in results_dict.
+        '''
+        self.iterations += 1
+        if self.iteration_budget is not None and self.iterations > self.iteration_budget:
+            raise _EstimationStopped('Estimation of ' + str(key) + ' exceeded the iteration budget of '
+                                     + str(self.iteration_budget) + ' iterations.',
+                                     'Estimation stopped: iteration budget exceeded.')
+        if self.time_limit is not None and time.perf_counter() - self.start_time > self.time_limit:
+            raise _EstimationStopped('Estimation of ' + str(key) + ' exceeded the time limit of '
+                                     + str(self.time_limit) + ' seconds at iteration ' + str(self.iterations) + '.',
+                                     'Estimation stopped: time limit exceeded.')
+
+
+class _FailureHandling(object):
+    '''
+    The budgets of each sample (a sector or all data) and the policy applied to a regression that exceeds them or
+    raises an error: 'skip' stores a message in place of its results, 'retry' estimates it again with a looser
+    relative tolerance (and stores a message if it fails again), and 'abort' stops the estimation with a RuntimeError.
+    '''
+
+    def __init__(self, time_limit: float = None, iteration_budget: int = None, failure_policy: str = 'skip',
+                 retry_tolerance: float = 1e-6):
+        self.time_limit = time_limit
+        self.iteration_budget = iteration_budget
+        self.failure_policy = failure_policy
+        self.retry_tolerance = retry_tolerance
+
+    def is_default(self):
+        '''
+        :return: (bool) True if there are no budgets and failed regressions are skipped, as without failure handling.
+        '''
+        return self.time_limit is None and self.iteration_budget is None and self.failure_policy == 'skip'
+
+    def budget(self):
+        '''
+        :return: (_SampleBudget or None) New budgets for a sample, started now, or None if there are no budgets.
+        '''
+        if self.time_limit is None and self.iteration_budget is None:
+            return None
+        return _SampleBudget(self.time_limit, self.iteration_budget)
+
+
+def _iteration_monitor(key, profile, iteration_callback, budget=None):
+    '''
+    The callback passed to an estimation engine, which is called on each IRLS iteration with the iteration number,
+    the deviance, the largest absolute change in the estimated parameters (NaN for the first iteration), and the
+    seconds elapsed since the estimation began.
+    :param key: (str) The key of the regression, as in results_dict.
+    :param profile: (_StageProfile or None) The profile of the regression, to which the iteration is added if it
+        traces convergence.
+    :param iteration_callback: (callable or None) The user's callback, which is called with the key and the values
+        of the iteration. If it returns True, the estimation is stopped.
+    :param budget: (_SampleBudget or None) The budgets of the sample, which stop the estimation when exceeded.
+    :return: (callable or None) The callback, or None if the iterations are not monitored.
+    '''
+    tracing = profile is not None and profile.trace_convergence
+    if not tracing and iteration_callback is None and budget is None:
+        return None
+
+    def monitor(iteration, deviance, max_coefficient_change, elapsed_time):
+        if tracing:
+            profile.record_iteration(iteration, deviance, max_coefficient_change, elapsed_time)
+        if budget is not None:
+            budget.check(key)
+        if iteration_callback is not None and iteration_callback(key, iteration, deviance, max_coefficient_change,
+                                                                 elapsed_time):
+            raise _EstimationStopped('Estimation of ' + str(key) + ' stopped by iteration_callback at iteration '
+                                     + str(iteration) + '.')
+    return monitor
+
+
+def _max_change(params, previous_params):
+    '''
+    :param params: (numpy.ndarray) The parameters of an iteration.
+    :param previous_params: (numpy.ndarray or None) The parameters of the previous iteration, if any.
+    :return: (float) The largest absolute change in the parameters, or NaN if there is no previous iteration.
+    '''
+    if previous_params is None:
+        return np.nan
+    return float(np.max(np.abs(np.asarray(params) - np.asarray(previous_params)), initial=0))
+
+
+class _MonitoredGLM(sm.GLM):
+    '''
+    A statsmodels GLM that calls a monitor on each IRLS iteration. statsmodels updates the history of the fit once per
+    iteration, so the monitor is called from there. The estimation itself is unchanged.
+    '''
+
+    def __init__(self, endog, exog, family=None, monitor=None, **kwargs):
+        super(_MonitoredGLM, self).__init__(endog, exog, family=family, **kwargs)
+        self.monitor = monitor
+        self.fit_start_time = None
+
+    def fit(self, *args, **kwargs):
+        self.fit_start_time = time.perf_counter()
+        try:
+            return super(_MonitoredGLM, self).fit(*args, **kwargs)
+        finally:
+            # The monitor is not retained with the results, which may be sent between processes or saved
+            self.monitor = None
+
+    def _update_history(self, tmp_result, mu, history):
+        history = super(_MonitoredGLM, self)._update_history(tmp_result, mu, history)
+        # The history starts with placeholder and starting values, followed by one entry per iteration
+        iteration = len(history['deviance']) - 2
+        self.monitor(iteration, history['deviance'][-1],
+                     _max_change(history['params'][-1], history['params'][-2] if iteration > 1 else None),
+                     time.perf_counter() - self.fit_start_time)
+        return history
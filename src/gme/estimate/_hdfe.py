@@ -0,0 +1,331 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import time
+import numpy as np
+import pandas as pd
+from itertools import combinations
+import scipy.sparse as sparse
+from scipy.sparse.csgraph import connected_components
+from ._stage_profile import _begin_stage
+from ._convergence_trace import _max_change
+from ._ppml_results import _PPMLResults, _poisson_deviance, _poisson_statistics
+
+#-------------------------------------------------------------------------------------------#
+# This file contains the high-dimensional fixed effect (HDFE) PPML estimator. Fixed effects #
+# are absorbed inside the IRLS loop by weighted alternating projections, as in ppmlhdfe     #
+# (Correia, Guimaraes, and Zylkin, 2020), so that only the covariates are estimated.        #
+#-------------------------------------------------------------------------------------------#
+
+
+class _FixedEffectAbsorber(object):
+    '''
+    Partials sets of fixed effects out of columns of data by weighted alternating projections (the method of
+    alternating projections, or MAP). Each projection subtracts weighted group means, which are summed with sparse
+    (group x observation) indicator matrices built from integer category codes and returned to the observations by
+    indexing with the codes.
+    '''
+
+    def __init__(self, codes_list, tolerance: float = 1e-10, max_iterations: int = 10000):
+        '''
+        :param codes_list: (List[numpy.ndarray]) An array of integer category codes for each set of fixed effects.
+            Observations with a negative code are not affected by that set of fixed effects.
+        :param tolerance: (float) Convergence tolerance for the projections.
+        :param max_iterations: (int) Maximum number of passes through all sets of fixed effects.
+        '''
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.codes_list = codes_list
+        self.indicators = []
+        for codes in codes_list:
+            rows = np.flatnonzero(codes >= 0)
+            self.indicators.append(sparse.csr_matrix((np.ones(rows.size), (codes[rows], rows)),
+                                                     shape=(codes.max() + 1 if codes.size else 0, codes.size)))
+        self.weighted_indicators = None
+        self.group_weights = None
+
+    def set_weights(self, weights):
+        '''
+        :param weights: (numpy.ndarray) Observation weights used for the projections.
+        '''
+        # The indicators are scaled by the weights once, so that weighted group sums do not require a weighted copy
+        # of the data. The scaled indicators share the structure of the unscaled ones.
+        self.weighted_indicators = []
+        self.group_weights = []
+        for indicator in self.indicators:
+            weighted_indicator = sparse.csr_matrix((weights[indicator.indices], indicator.indices, indicator.indptr),
+                                                   shape=indicator.shape)
+            group_weight = np.asarray(weighted_indicator.sum(axis=1)).ravel()
+            self.weighted_indicators.append(weighted_indicator)
+            self.group_weights.append(np.where(group_weight > 0, group_weight, np.inf))
+
+    def demean(self, values):
+        '''
+        Partial the fixed effects out of each column of values.
+        :param values: (numpy.ndarray) An n x m array. It is modified in place.
+        :return: (numpy.ndarray, int) The demeaned values and the number of passes used.
+        '''
+        if len(self.indicators) == 0:
+            return values, 0
+        scale = np.maximum(np.maximum(values.max(axis=0), -values.min(axis=0)), 1)
+        for iteration in range(1, self.max_iterations + 1):
+            largest_update = 0
+            for codes, weighted_indicator, group_weight in zip(self.codes_list, self.weighted_indicators,
+                                                               self.group_weights):
+                # A final row of zeros is selected by the negative codes of observations without a category
+                group_means = np.zeros((group_weight.shape[0] + 1, values.shape[1]))
+                group_means[:-1] = (weighted_indicator @ values) / group_weight[:, None]
+                # Columns are updated one at a time to avoid an n x m temporary array
+                for column in range(values.shape[1]):
+                    values[:, column] -= group_means[codes, column]
+                largest_update = max(largest_update, np.max(np.abs(group_means) / scale, initial=0))
+            # A single set of fixed effects is removed exactly in one pass
+            if len(self.indicators) == 1 or largest_update < self.tolerance:
+                break
+        return values, iteration
+
+
+def _fixed_effect_rank(codes_list):
+    '''
+    The number of linearly independent fixed effect dummies. The first two sets of fixed effects are handled exactly,
+    using the connected components of the bipartite graph linking their categories. Each additional set is assumed
+    to add one redundant category, which is a conservative approximation (as in ppmlhdfe).
+    :param codes_list: (List[numpy.ndarray]) An array of integer category codes for each set of fixed effects.
+    :return: (int)
+    '''
+    counts = [np.unique(codes[codes >= 0]).size for codes in codes_list]
+    if len(codes_list) == 0:
+        return 0
+    rank = counts[0]
+    if len(codes_list) > 1:
+        first, second = codes_list[0], codes_list[1]
+        first_size = first.max() + 1
+        both = (first >= 0) & (second >= 0)
+        nodes = first_size + second.max() + 1
+        graph = sparse.csr_matrix((np.ones(both.sum()), (first[both], first_size + second[both])),
+                                  shape=(nodes, nodes))
+        number_of_components, labels = connected_components(graph, directed=False)
+        # Only components linked by at least one observation are redundant, unless an observation in the component
+        # lacks a category from one of the two sets
+        linked = np.zeros(number_of_components, dtype=bool)
+        linked[labels[first[both]]] = True
+        anchored = np.zeros(number_of_components, dtype=bool)
+        anchored[labels[first[(first >= 0) & (second < 0)]]] = True
+        anchored[labels[first_size + second[(second >= 0) & (first < 0)]]] = True
+        rank += counts[1] - int(np.sum(linked & ~anchored))
+        for counts_j in counts[2:]:
+            rank += counts_j - 1
+    return rank
+
+
+def _fit_ppml_hdfe(endog,
+                   exog,
+                   codes_list,
+                   cov_type: str = 'HC1',
+                   cluster_codes=None,
+                   max_iterations: int = 1000,
+                   tolerance: float = 1e-8,
+                   start_mu=None,
+                   profile=None,
+                   callback=None):
+    '''
+    Estimate a PPML model with absorbed fixed effects by iteratively reweighted least squares.
+    :param endog: (Pandas.Series) The dependent variable.
+    :param exog: (Pandas.DataFrame) The covariates. Fixed effects should not be included.
+    :param codes_list: (List[numpy.ndarray]) An array of integer category codes for each set of fixed effects.
+    :param cov_type: (str) 'nonrobust', 'HC0', 'HC1', or 'cluster'.
+    :param cluster_codes: (List[numpy.ndarray]) Integer cluster codes for each clustering variable, required if cov_type
+        is 'cluster'.
+    :param max_iterations: (int) Maximum number of IRLS iterations.
+    :param tolerance: (float) Convergence tolerance for the relative change in the deviance.
+    :param start_mu: (optional, numpy.ndarray) Starting fitted values. Default starts from the same values as ppmlhdfe.
+    :param profile: (optional, _StageProfile) If supplied, the covariance is recorded as a separate stage.
+    :param callback: (optional, callable) Called on each iteration with the iteration number, the deviance, the largest
+        absolute change in the covariate estimates, and the seconds elapsed. See _iteration_monitor.
+    :return: (_PPMLResults) Estimates for the covariates.
+    '''
+    fit_start_time = time.perf_counter()
+    y = endog.values.astype(float, copy=False)
+    absorber = _FixedEffectAbsorber(codes_list, tolerance=min(1e-10, tolerance * 1e-2))
+
+    # Initial values as in ppmlhdfe
+    mu = (y + y.mean()) / 2 if start_mu is None else start_mu
+    eta = np.log(mu)
+    working_endog = eta + (y - mu) / mu
+    absorber.set_weights(mu)
+    demeaned, _ = absorber.demean(np.column_stack([working_endog, exog.values]))
+
+    deviance = np.inf
+    params = None
+    for iteration in range(1, max_iterations + 1):
+        demeaned_endog, demeaned_exog = demeaned[:, 0], demeaned[:, 1:]
+        previous_params = params
+        params = np.linalg.solve((demeaned_exog.T * mu) @ demeaned_exog, demeaned_exog.T @ (mu * demeaned_endog))
+        # The linear predictor is the working dependent variable less the residual of the weighted projection
+        eta = working_endog - (demeaned_endog - demeaned_exog @ params)
+        mu = np.exp(eta)
+        previous_deviance = deviance
+        deviance = _poisson_deviance(y, mu)
+        if callback is not None:
+            callback(iteration, deviance, _max_change(params, previous_params), time.perf_counter() - fit_start_time)
+        if np.abs(deviance - previous_deviance) / (np.abs(deviance) + 0.1) < tolerance:
+            break
+        # The change in the working dependent variable and the previously demeaned data differ from the data only by
+        # fixed effect components, so the projections can resume from the previous solution.
+        new_working_endog = eta + (y - mu) / mu
+        demeaned[:, 0] = new_working_endog - (working_endog - demeaned_endog)
+        working_endog = new_working_endog
+        absorber.set_weights(mu)
+        demeaned, _ = absorber.demean(demeaned)
+
+    # Covariance of the covariates, using the data demeaned at the final weights. The covariates are demeaned in
+    # place, as the working dependent variable is no longer needed.
+    _begin_stage(profile, 'Covariance')
+    absorber.set_weights(mu)
+    demeaned_exog, _ = absorber.demean(demeaned[:, 1:])
+    rank = exog.shape[1] + _fixed_effect_rank(codes_list)
+    cov_params = _sandwich_covariance(demeaned_exog, y, mu, cov_type, rank, cluster_codes)
+
+    llf, deviance, pearson_chi2 = _poisson_statistics(y, mu)
+    return _PPMLResults(params=pd.Series(params, index=exog.columns),
+                        cov_params=cov_params,
+                        nobs=y.shape[0],
+                        llf=llf,
+                        deviance=deviance,
+                        pearson_chi2=pearson_chi2,
+                        rank=rank,
+                        cov_type=cov_type,
+                        iterations=iteration,
+                        model='PPML-HDFE',
+                        yname=endog.name,
+                        mu=mu,
+                        index=endog.index)
+
+
+def _sandwich_covariance(demeaned_exog, y, mu, cov_type, rank, cluster_codes=None):
+    '''
+    Covariance matrix of the covariate estimates. The bread is the inverse of the weighted cross product of the
+    demeaned covariates, which equals the corresponding block of the inverse for the full design including dummies.
+    :param demeaned_exog: (numpy.ndarray) Covariates with the fixed effects partialled out.
+    :param y: (numpy.ndarray) The dependent variable.
+    :param mu: (numpy.ndarray) Fitted values.
+    :param cov_type: (str) 'nonrobust', 'HC0', 'HC1', or 'cluster'.
+    :param rank: (int) Rank of the full design. Not used for HC1, which, as for statsmodels' GLM, is computed without
+        a degrees of freedom correction.
+    :param cluster_codes: (List[numpy.ndarray]) Integer cluster codes for each clustering variable for clustered
+        standard errors.
+    :return: (numpy.ndarray)
+    '''
+    bread = np.linalg.inv((demeaned_exog.T * mu) @ demeaned_exog)
+    if cov_type == 'nonrobust':
+        return bread
+    scores = demeaned_exog * (y - mu)[:, None]
+    if cov_type == 'cluster':
+        meat = _cluster_meat(scores, cluster_codes)
+    else:
+        meat = scores.T @ scores
+    return bread @ meat @ bread
+
+
+def _cluster_meat(scores, cluster_codes):
+    '''
+    The middle of the cluster-robust sandwich. With several clustering variables, the multi-way estimator of Cameron,
+    Gelbach, and Miller (2011) adds the meat for clusters formed by each odd-sized combination of variables and
+    subtracts it for each even-sized combination. Scores are summed over observations once, by the intersection of all
+    clustering variables, and each combination's clusters are sums of those intersections. No small sample
+    correction is applied.
+    :param scores: (numpy.ndarray) The n x k scores.
+    :param cluster_codes: (List[numpy.ndarray]) Integer cluster codes for each clustering variable.
+    :return: (numpy.ndarray) The k x k meat.
+    '''
+    intersection_indicator, intersection_cluster_codes = _cluster_intersections(cluster_codes)
+    return _intersection_meat(intersection_indicator @ scores, intersection_cluster_codes)
+
+
+def _cluster_intersections(cluster_codes):
+    '''
+    The intersections of all clustering variables.
+    :param cluster_codes: (List[numpy.ndarray]) Integer cluster codes for each clustering variable.
+    :return: (scipy.sparse.csr_matrix, List[numpy.ndarray]) An indicator matrix (intersections x observations) that
+        sums observations by intersection and the cluster of each intersection for each variable.
+    '''
+    number_of_observations = cluster_codes[0].shape[0]
+    intersection_codes = np.zeros(number_of_observations, dtype=np.int64)
+    for codes in cluster_codes:
+        intersection_codes, _ = pd.factorize(intersection_codes * (codes.max() + 1) + codes)
+    intersection_indicator = sparse.csr_matrix((np.ones(number_of_observations),
+                                                (intersection_codes, np.arange(number_of_observations))))
+
+    # The cluster of each intersection for each variable. Factorized codes are numbered in order of first
+    # appearance, so an intersection's first observation is the first observation with a code above all
+    # preceding codes.
+    first_observation = np.flatnonzero(np.diff(np.maximum.accumulate(intersection_codes), prepend=-1) > 0)
+    return intersection_indicator, [codes[first_observation] for codes in cluster_codes]
+
+
+def _intersection_meat(intersection_scores, intersection_cluster_codes):
+    '''
+    The multi-way cluster-robust meat from scores summed by the intersection of all clustering variables.
+    :param intersection_scores: (numpy.ndarray) The scores summed by intersection.
+    :param intersection_cluster_codes: (List[numpy.ndarray]) The cluster of each intersection for each variable.
+    :return: (numpy.ndarray) The k x k meat.
+    '''
+    number_of_intersections = intersection_scores.shape[0]
+    meat = np.zeros((intersection_scores.shape[1], intersection_scores.shape[1]))
+    for size in range(1, len(intersection_cluster_codes) + 1):
+        for combination in combinations(intersection_cluster_codes, size):
+            combined_codes = np.zeros(number_of_intersections, dtype=np.int64)
+            for codes in combination:
+                combined_codes, _ = pd.factorize(combined_codes * (codes.max() + 1) + codes)
+            cluster_scores = sparse.csr_matrix((np.ones(number_of_intersections),
+                                                (combined_codes, np.arange(number_of_intersections)))) \
+                             @ intersection_scores
+            meat += (-1) ** (size + 1) * (cluster_scores.T @ cluster_scores)
+    return meat
+
+
+def _recode(codes):
+    '''
+    Renumber category codes consecutively after observations have been dropped. Negative codes are preserved.
+    :param codes: (numpy.ndarray) Integer category codes.
+    :return: (numpy.ndarray)
+    '''
+    included = codes >= 0
+    recoded = np.full(codes.shape, -1, dtype=np.int64)
+    recoded[included] = np.unique(codes[included], return_inverse=True)[1]
+    return recoded
+
+
+def _prune_fixed_effect_groups(positive, codes_list):
+    '''
+    Identify the observations that do not inform the covariate estimates because of their fixed effects: those in a
+    fixed effect group with a single observation (singletons), which the fixed effect fits exactly, and those in a
+    group without positive trade flows, whose fixed effect goes to minus infinity (as in ppmlhdfe). Dropping
+    observations can create new singleton or zero trade groups, so the observations are dropped until none remain.
+    :param positive: (numpy.ndarray) A boolean array identifying the observations with positive trade flows.
+    :param codes_list: (List[numpy.ndarray]) An array of integer category codes for each set of fixed effects.
+        Observations with a negative code are not affected by that set of fixed effects.
+    :return: (numpy.ndarray, int, int) A boolean mask of the observations to keep, the number of singleton
+        observations dropped, and the number of observations dropped for being in a group without positive trade.
+    '''
+    keep = np.ones(positive.shape[0], dtype=bool)
+    singletons = 0
+    zero_trade = 0
+    changed = True
+    while changed:
+        changed = False
+        for codes in codes_list:
+            included = keep & (codes >= 0)
+            group_codes = np.where(included, codes, 0)
+            minlength = int(codes.max()) + 1 if codes.size > 0 else 0
+            counts = np.bincount(group_codes[included], minlength=minlength)
+            positive_counts = np.bincount(group_codes[included & positive], minlength=minlength)
+            singleton = included & (counts[group_codes] == 1)
+            no_trade = included & (positive_counts[group_codes] == 0) & ~singleton
+            if singleton.any() or no_trade.any():
+                singletons += int(singleton.sum())
+                zero_trade += int(no_trade.sum())
+                keep &= ~(singleton | no_trade)
+                changed = True
+    return keep, singletons, zero_trade
@@ -0,0 +1,176 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+from scipy.linalg import cho_factor, cho_solve
+from ._sparse_design import _SparseDesign
+from ._stage_profile import _begin_stage
+from ._convergence_trace import _max_change
+from ._ppml_results import _PPMLResults, _poisson_statistics
+from ._hdfe import _cluster_intersections, _intersection_meat
+
+#-------------------------------------------------------------------------------------------#
+# This file contains a PPML estimator that solves the k x k normal equations of each IRLS   #
+# step by Cholesky factorization. It estimates reduced precision (e.g. float32) designs,    #
+# which are processed in blocks of rows that are converted to float64, so X'WX, X'Wz, and   #
+# the scores are accumulated in float64 without a float64 copy of the full design, and      #
+# sparse designs (engine='irls'), which are never densified.                                #
+#-------------------------------------------------------------------------------------------#
+
+
+def _fit_ppml_irls(endog,
+                   exog,
+                   cov_type: str = 'HC1',
+                   cluster_codes=None,
+                   max_iterations: int = 1000,
+                   tolerance: float = 1e-8,
+                   relative_tolerance: float = 0.,
+                   block_elements: int = 2 ** 21,
+                   start_mu=None,
+                   profile=None,
+                   callback=None):
+    '''
+    Estimate a PPML model by iteratively reweighted least squares, following statsmodels' GLM: the same starting
+    values, the same convergence criterion (a change in the deviance of at most tolerance plus relative_tolerance times
+    the deviance), the nonrobust covariance from the final weighted least squares step, and the robust covariances
+    from the Hessian at the estimates. Unlike statsmodels, each step solves the k x k normal equations by Cholesky
+    factorization rather than the n x k weighted least squares problem, and only the estimates, covariance, and fit
+    statistics are retained.
+    :param endog: (Pandas.Series) The dependent variable.
+    :param exog: (Pandas.DataFrame or _SparseDesign) The design, which should not contain collinear columns. A dense
+        design is processed in blocks of rows and a sparse design as a whole.
+    :param cov_type: (str) 'nonrobust', 'HC0', 'HC1', or 'cluster'. HC1 is computed without a degrees of freedom
+        correction, as in statsmodels' GLM.
+    :param cluster_codes: (List[numpy.ndarray]) Integer cluster codes for each clustering variable, required if cov_type
+        is 'cluster'.
+    :param max_iterations: (int) Maximum number of IRLS iterations.
+    :param tolerance: (float) Convergence tolerance for the absolute change in the deviance.
+    :param relative_tolerance: (float) Convergence tolerance for the change in the deviance relative to the deviance,
+        which is added to tolerance.
+    :param block_elements: (int) The approximate number of design entries converted to float64 at a time, for a
+        dense design.
+    :param start_mu: (optional, numpy.ndarray) Starting fitted values. Default starts from the same values as
+        statsmodels.
+    :param profile: (optional, _StageProfile) If supplied, the covariance is recorded as a separate stage.
+    :param callback: (optional, callable) Called on each iteration with the iteration number, the deviance, the largest
+        absolute change in the estimates, and the seconds elapsed, as for statsmodels' GLM. See _iteration_monitor.
+    :return: (_PPMLResults)
+    '''
+    fit_start_time = time.perf_counter()
+    y = endog.values.astype(float)
+    if isinstance(exog, _SparseDesign):
+        x = exog.matrix.tocsr().astype(float, copy=False)
+        columns = exog.columns
+        blocks = [slice(None)]
+        model = 'PPML (sparse design)'
+    else:
+        x = exog.values
+        columns = exog.columns
+        block_rows = max(1, block_elements // max(x.shape[1], 1))
+        blocks = [slice(start, start + block_rows) for start in range(0, y.shape[0], block_rows)]
+        model = 'PPML (' + str(x.dtype) + ' design)'
+    number_of_columns = x.shape[1]
+
+    # Starting values as in statsmodels
+    mu = (y + y.mean()) / 2 if start_mu is None else start_mu.copy()
+    params = None
+    previous_params = None
+    previous_deviance = np.inf
+    previous_cross_product = None
+    for iteration in range(max_iterations + 1):
+        cross_product = np.zeros((number_of_columns, number_of_columns))
+        weighted_working_endog = np.zeros(number_of_columns)
+        for block in blocks:
+            block_exog = _float_rows(x, block)
+            if params is None:
+                eta = np.log(mu[block])
+            else:
+                eta = block_exog @ params
+                mu[block] = np.exp(eta)
+            block_mu = mu[block]
+            weighted_exog = _weighted_rows(block_exog, block_mu)
+            cross_product += _dense(weighted_exog.T @ block_exog)
+            weighted_working_endog += weighted_exog.T @ (eta + (y[block] - block_mu) / block_mu)
+        deviance = _poisson_statistics(y, mu)[1]
+        if callback is not None and params is not None:
+            callback(iteration, deviance, _max_change(params, previous_params), time.perf_counter() - fit_start_time)
+        if params is not None and \
+                np.abs(deviance - previous_deviance) <= tolerance + relative_tolerance * np.abs(deviance):
+            break
+        if iteration == max_iterations:
+            break
+        previous_deviance = deviance
+        previous_cross_product = cross_product
+        previous_params = params
+        params = cho_solve(cho_factor(cross_product), weighted_working_endog)
+
+    # As for statsmodels GLM, the nonrobust covariance uses the weights of the final IRLS step and the robust
+    # covariances use the Hessian at the estimates
+    _begin_stage(profile, 'Covariance')
+    if cov_type == 'nonrobust':
+        cov_params = np.linalg.inv(previous_cross_product)
+    else:
+        if cov_type == 'cluster':
+            intersection_indicator, intersection_cluster_codes = _cluster_intersections(cluster_codes)
+            intersection_scores = np.zeros((intersection_indicator.shape[0], number_of_columns))
+        meat = np.zeros((number_of_columns, number_of_columns))
+        for block in blocks:
+            scores = _weighted_rows(_float_rows(x, block), y[block] - mu[block])
+            if cov_type == 'cluster':
+                intersection_scores += _dense(intersection_indicator[:, block] @ scores)
+            else:
+                meat += _dense(scores.T @ scores)
+        if cov_type == 'cluster':
+            meat = _intersection_meat(intersection_scores, intersection_cluster_codes)
+        bread = np.linalg.inv(cross_product)
+        cov_params = bread @ meat @ bread
+
+    llf, deviance, pearson_chi2 = _poisson_statistics(y, mu)
+    return _PPMLResults(params=pd.Series(params, index=columns),
+                        cov_params=cov_params,
+                        nobs=y.shape[0],
+                        llf=llf,
+                        deviance=deviance,
+                        pearson_chi2=pearson_chi2,
+                        rank=number_of_columns,
+                        cov_type=cov_type,
+                        iterations=iteration,
+                        model=model,
+                        yname=endog.name,
+                        mu=mu,
+                        index=endog.index)
+
+
+def _float_rows(x, rows):
+    '''
+    :param x: (numpy.ndarray or scipy.sparse.csr_matrix) The design.
+    :param rows: (slice) The rows selected.
+    :return: (numpy.ndarray or scipy.sparse.csr_matrix) The rows of the design in float64. A sparse design, which is
+        already float64, is not copied.
+    '''
+    if sparse.issparse(x):
+        return x if rows == slice(None) else x[rows]
+    return x[rows].astype(float)
+
+
+def _weighted_rows(x, weights):
+    '''
+    :param x: (numpy.ndarray or scipy.sparse.csr_matrix) Rows of the design.
+    :param weights: (numpy.ndarray) A weight for each row.
+    :return: (numpy.ndarray or scipy.sparse.csr_matrix) Each row multiplied by its weight, in the format of x.
+    '''
+    if sparse.issparse(x):
+        return sparse.diags(weights) @ x
+    return x * weights[:, None]
+
+
+def _dense(matrix):
+    '''
+    :param matrix: (numpy.ndarray or scipy.sparse matrix)
+    :return: (numpy.ndarray) The matrix as a dense array.
+    '''
+    return matrix.toarray() if sparse.issparse(matrix) else matrix
@@ -9,7 +9,19 @@ from typing import List, Tuple, Dict
 from typing import Union
 import statsmodels.api as sm
 import time as time
-import traceback
+import copy
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ._sparse_design import _SparseDesign
+from ._hdfe import _FixedEffectAbsorber, _fit_ppml_hdfe, _recode, _prune_fixed_effect_groups
+from ._irls import _fit_ppml_irls
+from ._warm_start import _starting_mu, _starting_params, _covariate_offset, _loglinear_params
+from ._stage_profile import _StageProfile, _begin_stage, _end_stage, _memory_tracing
+from ._convergence_trace import _EstimationStopped, _FailureHandling, _MonitoredGLM, _iteration_monitor, \
+    STOPPED_BY_CALLBACK
+from ._checkpoint import _fingerprint, _open_checkpoint, _load_sectors, _save_sector
+
+logger = logging.getLogger(__name__)
 
 #-----------------------------------------------------------------------------------------#
 # This file contains the underlying functions for the .estimate method in EstimationModel #
@@ -25,7 +37,17 @@ def _estimate_ppml(data_frame,
                    fixed_effects: List[Union[str,List[str]]] = [],
                    drop_fixed_effect: Dict[Union[str, Tuple[str]],List[Union[str, Tuple[str]]]] = {},
                    cluster: bool=False,
-                   cluster_on: str=None):
+                   cluster_on: Union[str, List[str]] = None,
+                   n_jobs: int = 1,
+                   executor=None,
+                   fixed_effect_cache: dict = None,
+                   previous_params: dict = None,
+                   trace_memory: bool = False,
+                   trace_convergence: bool = False,
+                   iteration_callback=None,
+                   progress_callback=None,
+                   checkpoint_dir: str = None,
+                   failure_handling=None):
     '''
     Performs sector by sector GLM estimation with PPML diagnostics
 
@@ -43,78 +65,621 @@ def _estimate_ppml(data_frame,
             drop_fixed_effect = {('importer','year'):[('ARG','2015'),('BEL','2013')]} would drop the
             fixed effects for importer-year: ARG-2015 and BEL-2013.
             The entry should be a subset of the list supplied for fixed_effects. 
-    Returns: (Dict[GLM.fit], Pandas.DataFrame, Dict[DataFrame])
+        n_jobs: (int) The number of processes used to estimate sectors in parallel. -1 uses all processors.
+        executor: (optional) A concurrent.futures executor used to estimate sectors in parallel. Overrides n_jobs.
+        fixed_effect_cache: (optional) Dict
+            Fixed effect codes for the samples of data_frame, shared with other specifications estimated on the same
+            data. See _cached_fixed_effect_codes.
+        previous_params: (optional) Dict[str, Pandas.Series]
+            The covariate estimates of the most recent estimation of each outcome, which are updated after each
+            estimation and used as starting values if specification.warm_start is 'previous'. Passing the same
+            dictionary to several calls carries the estimates from one specification to the next.
+        trace_memory: (bool) If True, the peak memory increase of each stage is recorded with tracemalloc, which
+            slows the estimation.
+        trace_convergence: (bool) If True, the deviance, largest change in the estimates, and elapsed time of each
+            IRLS iteration of each regression are recorded.
+        iteration_callback: (optional) callable
+            Called on each IRLS iteration of each regression with the key of the regression, the iteration number,
+            the deviance, the largest absolute change in the estimates (NaN for the first iteration), and the seconds
+            elapsed since the fit began. If it returns True, the estimation of the regression is stopped.
+        progress_callback: (optional) callable
+            Called in the main process after each sector is completed (or once, with the sector 'all', if the
+            estimation is not sector by sector) with a dictionary of the progress of the estimation. See
+            _report_progress.
+        checkpoint_dir: (optional) str
+            A directory in which the results, diagnostics, and stages of each sector are stored as it is completed.
+            Sectors already stored for the same data and specification are loaded rather than estimated. See
+            _checkpoint.
+        failure_handling: (optional) _FailureHandling
+            The time and iteration budgets of each sector and the policy ('skip', 'retry', or 'abort') applied to the
+            regressions that exceed them or raise an error. With 'abort', a RuntimeError is raised and sectors not
+            yet started are cancelled.
+    Returns: (Dict[GLM.fit], Pandas.DataFrame, Dict[DataFrame], Pandas.DataFrame, Pandas.DataFrame)
         1. Dictionary of statsmodels.GLM.fit objects with sectors as the keys.
         2. Dataframe with diagnostic information by sector
         3. Dictionary of estimation DataFrames + predicted trade values with sectors as the keys.
+        4. Dataframe with the wall time, CPU time, peak memory increase, and iterations of each stage of each
+            regression, indexed by key and stage.
+        5. Dataframe with the convergence trace of each regression, indexed by key and iteration (empty unless
+            trace_convergence is True).
     '''
 
     post_diagnostics_data_frame_dict = {}
     results_dict = {}
     diagnostics_log = pd.DataFrame([])
+    stage_diagnostics = []
+    convergence_trace = []
     start_time = time.time()
-    print('Estimation began at ' + time.strftime('%I:%M %p  on %b %d, %Y'))
+    logger.info('Estimation began at %s', time.strftime('%I:%M %p  on %b %d, %Y'))
+    if previous_params is None:
+        previous_params = {}
+    start_params = _start_params(data_frame, specification, fixed_effects, drop_fixed_effect, previous_params)
 
     if not specification.sector_by_sector:
-        data_frame = data_frame.reset_index(drop=True)
-        fixed_effects_df = _generate_fixed_effects(data_frame, fixed_effects)
-        fe_columns = list(fixed_effects_df.columns)
-        estimating_data_frame = pd.concat([data_frame, fixed_effects_df], axis=1)
-#       estimating_data_frame = pd.concat([data_frame[specification.lhs_var], data_frame[specification.rhs_var], fixed_effects_df], axis=1)
-        model_fit, post_diagnostics_data_frame, diagnostics_log = _regress_ppml(estimating_data_frame, specification,fe_columns, drop_fixed_effect,cluster,cluster_on)
-        
-        results_dict['all'] = model_fit
-                
+        data_frame = _default_index(data_frame)
+        profiles = {}
+        with _memory_tracing(trace_memory):
+            outcome_outputs = _estimate_outcomes(data_frame, specification, fixed_effects, drop_fixed_effect, cluster,
+                                                 cluster_on, 'all', fixed_effect_cache, start_params, previous_params,
+                                                 profiles, trace_memory, trace_convergence, iteration_callback,
+                                                 failure_handling)
+
         end_time = time.time()
-        diagnostics_log.at['Completion Time'] = str(round((end_time - start_time)/60,2)) + ' minutes'
-        post_diagnostics_data_frame_dict['all'] = post_diagnostics_data_frame
+        for outcome, (model_fit, post_diagnostics_data_frame, diagnostics_output) in outcome_outputs.items():
+            key = _result_key(specification, outcome, 'all')
+            results_dict[key] = model_fit
+            stage_diagnostics.append(profiles[outcome].to_data_frame(key))
+            convergence_trace.append(profiles[outcome].trace_data_frame(key))
+            diagnostics_output.at['Completion Time'] = str(round((end_time - start_time)/60,2)) + ' minutes'
+            post_diagnostics_data_frame_dict[key] = post_diagnostics_data_frame
+            if isinstance(specification.lhs_var, str):
+                diagnostics_log = diagnostics_output
+            else:
+                diagnostics_log = pd.concat([diagnostics_log, diagnostics_output.rename(key)], axis=1)
+        _report_progress(start_time, 1, 1, 'Sector', 'all', progress_callback)
 
 
     else:
         sector_groups = data_frame.groupby(meta_data.sector_var_name)
         sector_list = _sectors(data_frame, meta_data)
-        iteration_count = 1
+        _check_result_keys(specification, sector_list)
+        sector_outputs = {}
+        if checkpoint_dir is not None:
+            _open_checkpoint(checkpoint_dir, _fingerprint(data_frame, specification))
+            sector_outputs = _load_sectors(checkpoint_dir, sector_list)
+            for sector in sector_outputs:
+                for outcome, (model_fit, post_diagnostics_data_frame, diagnostics_output) \
+                        in sector_outputs[sector][0].items():
+                    _record_params(previous_params, outcome, model_fit, specification)
+            if len(sector_outputs) > 0:
+                logger.info('Loaded %d of %d sectors from %s', len(sector_outputs), len(sector_list), checkpoint_dir)
+        # Sectors (and outcomes) that cannot be estimated are found for all sectors at once and skipped without
+        # creating a design
+        infeasible_outcomes = _screen_sectors(data_frame, meta_data, specification)
+        for sector, reasons in infeasible_outcomes.items():
+            if sector not in sector_outputs and len(reasons) == len(_outcomes(specification)):
+                logger.info('Sector %s skipped: %s', sector, '; '.join(reasons.values()))
+                sector_outputs[sector] = _skipped_sector(specification, reasons, trace_memory, trace_convergence)
+        remaining_sectors = [sector for sector in sector_list if sector not in sector_outputs]
+        if executor is None and n_jobs == 1:
+            completed = 0
+            for sector in remaining_sectors:
+                sector_outputs[sector] = _estimate_sector(sector, sector_groups.get_group(sector), specification,
+                                                          fixed_effects, drop_fixed_effect, cluster, cluster_on,
+                                                          fixed_effect_cache, start_params, previous_params,
+                                                          trace_memory=trace_memory,
+                                                          trace_convergence=trace_convergence,
+                                                          iteration_callback=iteration_callback,
+                                                          failure_handling=failure_handling,
+                                                          skipped_outcomes=infeasible_outcomes.get(sector))
+                if checkpoint_dir is not None:
+                    _save_sector(checkpoint_dir, sector, sector_outputs[sector])
+                completed += 1
+                _report_progress(start_time, completed, len(remaining_sectors), 'Sector', sector, progress_callback)
+        else:
+            # Sectors estimated in parallel cannot start from the estimates of the previous sector, so
+            # warm_start='previous' is rejected by EstimationModel.estimate
+            pool = executor
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=None if n_jobs == -1 else n_jobs)
+            try:
+                futures = {pool.submit(_estimate_sector, sector, sector_groups.get_group(sector), specification,
+                                       fixed_effects, drop_fixed_effect, cluster, cluster_on,
+                                       _sample_fixed_effect_cache(fixed_effect_cache, str(sector)),
+                                       start_params, None, trace_memory, trace_convergence,
+                                       iteration_callback, failure_handling,
+                                       infeasible_outcomes.get(sector)): sector
+                           for sector in remaining_sectors}
+                completed = 0
+                for future in as_completed(futures):
+                    try:
+                        sector_outputs[futures[future]] = future.result()
+                    except RuntimeError:
+                        # failure_policy='abort': sectors that have not started are cancelled
+                        for pending_future in futures:
+                            pending_future.cancel()
+                        raise
+                    if checkpoint_dir is not None:
+                        _save_sector(checkpoint_dir, futures[future], sector_outputs[futures[future]])
+                    completed += 1
+                    _report_progress(start_time, completed, len(remaining_sectors), 'Sector', futures[future],
+                                     progress_callback)
+            finally:
+                if executor is None:
+                    pool.shutdown()
+
+        # Store results in sector order, regardless of the order in which they completed
+        for sector in sector_list:
+            outcome_outputs, profiles = sector_outputs.pop(sector)
+            for outcome, (model_fit, post_diagnostics_data_frame, diagnostics_output) in outcome_outputs.items():
+                key = _result_key(specification, outcome, str(sector))
+                stage_diagnostics.append(profiles[outcome].to_data_frame(key))
+                convergence_trace.append(profiles[outcome].trace_data_frame(key))
+                post_diagnostics_data_frame_dict[key] = post_diagnostics_data_frame
+                results_dict[key] = model_fit
+                diagnostics_log = pd.concat([diagnostics_log, diagnostics_output.rename(key)], axis=1)
+
+    logger.info('Estimation completed at %s', time.strftime('%I:%M %p  on %b %d, %Y'))
+    if len(stage_diagnostics) == 0:
+        stage_diagnostics.append(_StageProfile().to_data_frame('all'))
+        convergence_trace.append(_StageProfile().trace_data_frame('all'))
+    return (results_dict, diagnostics_log, post_diagnostics_data_frame_dict, pd.concat(stage_diagnostics),
+            pd.concat(convergence_trace))
+
+
+def _estimate_sector(sector, sector_data_frame, specification, fixed_effects, drop_fixed_effect, cluster,
+                     cluster_on, fixed_effect_cache=None, start_params=None, previous_params=None,
+                     trace_memory=False, trace_convergence=False, iteration_callback=None, failure_handling=None,
+                     skipped_outcomes=None):
+    '''
+    Estimate one sector. Defined at the module level so that it can be sent to worker processes.
+    :param sector: The sector being estimated.
+    :param sector_data_frame: (Pandas.DataFrame) The observations for the sector.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param fixed_effects: (List[Union[str,List[str]]]) A list of variables to construct fixed effects based on.
+    :param drop_fixed_effect: (optional) A dictionary of FE categories and names to be dropped
+    :param fixed_effect_cache: (optional, Dict) Fixed effect codes shared with other specifications.
+    :param start_params: (optional, Dict[str, Pandas.Series]) Starting covariate values for each outcome.
+    :param previous_params: (optional, Dict[str, Pandas.Series]) Updated with the covariate estimates of each outcome.
+    :param trace_memory: (bool) Whether the peak memory increase of each stage is recorded. In a worker process,
+        memory is traced for the duration of the sector.
+    :param trace_convergence: (bool) Whether the IRLS iterations are recorded.
+    :param iteration_callback: (optional, callable) Called on each IRLS iteration. See _estimate_ppml.
+    :param failure_handling: (optional, _FailureHandling) The budgets of the sector and the failure policy.
+    :param skipped_outcomes: (optional, Dict[str, str]) Outcomes that cannot be estimated for the sector, with the
+        reason, from _screen_sectors.
+    :return: (Dict[str, Tuple[results obj, Pandas.DataFrame, Pandas.Series]], Dict[str, _StageProfile]) As returned
+        by _estimate_outcomes, with the sector completion time added to the diagnostics, and the stages of each
+        outcome's regression.
+    '''
+    sector_start_time = time.time()
+    logger.info('Sector %s began at %s', sector, time.strftime('%I:%M %p  on %b %d, %Y'))
+    sector_data_frame = _default_index(sector_data_frame)
+
+    profiles = {}
+    with _memory_tracing(trace_memory):
+        outcome_outputs = _estimate_outcomes(sector_data_frame, specification, fixed_effects, drop_fixed_effect,
+                                             cluster, cluster_on, str(sector), fixed_effect_cache, start_params,
+                                             previous_params, profiles, trace_memory, trace_convergence,
+                                             iteration_callback, failure_handling,
+                                             skipped_outcomes)
+
+    # Timing reports
+    sector_end_time = time.time()
+    for model_fit, post_diagnostics_data_frame, diagnostics_output in outcome_outputs.values():
+        diagnostics_output.at['Sector Completion Time'] = (str(round((sector_end_time - sector_start_time) / 60, 2))
+                                                           + ' minutes')
+    return outcome_outputs, profiles
+
+
+def _report_progress(start_time, completed, total, unit, name, progress_callback=None):
+    '''
+    Log the completion of a unit of an estimation (e.g. a sector) and the expected time until all units are complete,
+    and pass the progress to progress_callback.
+    :param start_time: (float) The time at which the estimation began.
+    :param completed: (int) The number of units completed.
+    :param total: (int) The total number of units.
+    :param unit: (str) The kind of unit, e.g. 'Sector' or 'Specification'.
+    :param name: The name of the unit that was completed.
+    :param progress_callback: (optional, callable) Called with a dictionary containing the name of the unit (keyed by
+        unit in lower case), 'completed', 'total', 'elapsed_time' and 'expected_time_remaining' (in seconds), and
+        'throughput' (units completed per minute).
+    '''
+    elapsed_time = time.time() - start_time
+    average_time = elapsed_time / completed
+    expected_time_remaining = (total - completed) * average_time
+    logger.info('%s %s completed (%d of %d)', unit, name, completed, total)
+    if completed < total:
+        logger.info('Average time per %s: %.2f minutes. Expected time to completion: %.2f minutes (%.2f hours)',
+                    unit.lower(), average_time / 60, expected_time_remaining / 60, expected_time_remaining / 3600)
+    if progress_callback is not None:
+        progress_callback({unit.lower(): name,
+                           'completed': completed,
+                           'total': total,
+                           'elapsed_time': elapsed_time,
+                           'expected_time_remaining': expected_time_remaining,
+                           'throughput': completed / (elapsed_time / 60) if elapsed_time > 0 else np.nan})
+
+
+def _estimate_outcomes(data_frame, specification, fixed_effects, drop_fixed_effect, cluster, cluster_on,
+                       sample='all', fixed_effect_cache=None, start_params=None, previous_params=None,
+                       profiles=None, trace_memory=False, trace_convergence=False, iteration_callback=None,
+                       failure_handling=None, skipped_outcomes=None):
+    '''
+    Create fixed effects and run the diagnostics and estimation for one sample (all data or one sector) using the
+    estimation engine named in the specification. If lhs_var is a list, each outcome is estimated on the same
+    observations. The fixed effects and the design are only created once and values computed from them, such as the
+    collinearity checks and the dense design, are reused by each outcome for which they are the same, so that the work
+    repeated for an outcome is largely its IRLS estimation.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation with a default (0, 1, ..., n-1) index.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param fixed_effects: (List[Union[str,List[str]]]) A list of variables to construct fixed effects based on.
+    :param drop_fixed_effect: (optional) A dictionary of FE categories and names to be dropped
+    :param sample: (str) 'all' or the sector estimated.
+    :param fixed_effect_cache: (optional, Dict) Fixed effect codes shared with other specifications.
+    :param start_params: (optional, Dict[str, Pandas.Series]) Starting covariate values for each outcome. Outcomes
+        without starting values start from the default values.
+    :param previous_params: (optional, Dict[str, Pandas.Series]) Updated with the covariate estimates of each outcome.
+    :param profiles: (optional, Dict[str, _StageProfile]) Updated with the stages of each outcome's regression. Stages
+        shared by the outcomes, such as the fixed effects, are recorded with the first outcome.
+    :param trace_memory: (bool) Whether the profiles record the peak memory increase of each stage.
+    :param trace_convergence: (bool) Whether the profiles record the IRLS iterations.
+    :param iteration_callback: (optional, callable) Called on each IRLS iteration. See _estimate_ppml.
+    :param failure_handling: (optional, _FailureHandling) The budgets of the sample, which are shared by its outcomes,
+        and the policy applied to the regressions that exceed them or raise an error. If it is not the default, the
+        outcome of each regression is added to its diagnostics.
+    :param skipped_outcomes: (optional, Dict[str, str]) Outcomes that are not estimated, with the reason, from
+        _screen_sectors. At least one outcome must be estimated.
+    :return: (Dict[str, Tuple[results obj, Pandas.DataFrame, Pandas.Series]]) The results of _regress_ppml (or
+        _regress_ppml_hdfe) for each outcome, keyed by outcome in the order of lhs_var.
+    '''
+    outcomes = _outcomes(specification)
+    if profiles is None:
+        profiles = {}
+    for outcome in outcomes:
+        profiles[outcome] = _StageProfile(trace_memory, trace_convergence)
+    _begin_stage(profiles[outcomes[0]], 'Fixed Effects')
+    fixed_effect_codes = _cached_fixed_effect_codes(fixed_effect_cache, sample, data_frame, fixed_effects)
+    user_fixed_effects = _fixed_effects_to_drop(_fixed_effect_index(fixed_effect_codes), drop_fixed_effect)
+    pruned = None
+    if specification.prune_fixed_effects and len(fixed_effect_codes) > 0:
+        _begin_stage(profiles[outcomes[0]], 'Fixed Effect Pruning')
+        # The outcomes share their observations, so a group is only without trade if it is for every outcome
+        estimated = [outcome for outcome in outcomes if outcome not in (skipped_outcomes or {})]
+        keep, singletons, zero_trade = _prune_fixed_effect_groups(
+            (data_frame[estimated].values > 0).any(axis=1),
+            [_unomitted_codes(codes, columns, user_fixed_effects) for codes, columns, labels in fixed_effect_codes])
+        pruned = {'Singleton Observations Dropped': singletons, 'Zero Trade Group Observations Dropped': zero_trade}
+        if not keep.any():
+            _end_stage(profiles[outcomes[0]])
+            return {outcome: _skipped_outcome('no observations remain after removing singleton and zero trade '
+                                              'fixed effect groups')
+                    for outcome in outcomes}
+        if not keep.all():
+            data_frame = _default_index(_subset(data_frame, keep))
+            fixed_effect_codes = _prune_fixed_effect_codes(fixed_effect_codes, keep)
+    if specification.engine != 'hdfe':
+        if pruned is not None:
+            # The design is built from the pruned codes in a stage of its own, so that each stage is recorded once
+            _begin_stage(profiles[outcomes[0]], 'Fixed Effect Design')
+        fixed_effects_design = _generate_fixed_effects(data_frame, fixed_effects, fixed_effect_codes)
+    _end_stage(profiles[outcomes[0]])
+    shared = {} if len(outcomes) > 1 else None
+    if failure_handling is None:
+        failure_handling = _FailureHandling()
+
+    def regress(outcome, budget, relative_tolerance=None):
+        outcome_specification = copy.copy(specification)
+        outcome_specification.lhs_var = outcome
+        # The other outcomes are removed so that the modified data for an outcome contains only its own lhs_var
+        outcome_data_frame = _subset(data_frame, drop_columns=[other for other in outcomes if other != outcome])
+        outcome_start_params = None if start_params is None else start_params.get(outcome)
+        key = _result_key(specification, outcome, sample)
+        iteration_monitor = _iteration_monitor(key, profiles[outcome], iteration_callback, budget)
+        if specification.engine == 'hdfe':
+            # The convergence criterion of the hdfe engine is already relative
+            return _regress_ppml_hdfe(outcome_data_frame, outcome_specification, fixed_effect_codes,
+                                      user_fixed_effects, cluster, cluster_on, shared, outcome_start_params,
+                                      profiles[outcome], iteration_monitor,
+                                      1e-8 if relative_tolerance is None else relative_tolerance)
+        if relative_tolerance is None:
+            return _regress_ppml(outcome_data_frame, outcome_specification, fixed_effects_design,
+                                 fixed_effect_codes, user_fixed_effects, cluster, cluster_on, shared,
+                                 outcome_start_params, profiles[outcome], iteration_monitor)
+        return _regress_ppml(outcome_data_frame, outcome_specification, fixed_effects_design, fixed_effect_codes,
+                             user_fixed_effects, cluster, cluster_on, shared, outcome_start_params, profiles[outcome],
+                             iteration_monitor, tolerance=0., relative_tolerance=relative_tolerance)
+
+    outcome_outputs = {}
+    budget = failure_handling.budget()
+    for outcome in outcomes:
+        if skipped_outcomes is not None and outcome in skipped_outcomes:
+            logger.info('%s skipped: %s', _result_key(specification, outcome, sample), skipped_outcomes[outcome])
+            outcome_outputs[outcome] = _skipped_outcome(skipped_outcomes[outcome])
+        else:
+            outcome_outputs[outcome] = regress(outcome, budget)
+
+    failures = {outcome: outcome_outputs[outcome][0] for outcome in outcomes
+                if _is_failure(outcome_outputs[outcome][0]) and outcome not in (skipped_outcomes or {})}
+    if len(failures) > 0 and failure_handling.failure_policy == 'abort':
+        raise RuntimeError('Estimation of ' + ', '.join(_result_key(specification, outcome, sample)
+                                                        for outcome in failures)
+                           + ' failed (' + '; '.join(failures.values()) + ") and failure_policy is 'abort'.")
+    if len(failures) > 0 and failure_handling.failure_policy == 'retry':
+        # The retry has budgets of its own, so a regression stopped by the time limit is not stopped immediately
+        budget = failure_handling.budget()
+        for outcome in failures:
+            logger.warning('Retrying %s with a relative tolerance of %s', _result_key(specification, outcome, sample),
+                           failure_handling.retry_tolerance)
+            outcome_outputs[outcome] = regress(outcome, budget, failure_handling.retry_tolerance)
+
+    for outcome in outcomes:
+        _record_params(previous_params, outcome, outcome_outputs[outcome][0], specification)
+        if not failure_handling.is_default():
+            _failure_diagnostics(outcome_outputs[outcome][2], outcome_outputs[outcome][0], failures.get(outcome),
+                                 failure_handling.failure_policy)
+        if pruned is not None:
+            for name, value in pruned.items():
+                outcome_outputs[outcome][2].at[name] = value
+    return outcome_outputs
+
+
+def _is_failure(estimates):
+    '''
+    :param estimates: (results obj or str) The results of a regression, or a message if it did not complete.
+    :return: (bool) True if the regression raised an error or exceeded a budget. Regressions stopped by the
+        iteration_callback were stopped on purpose, so they are not failures.
+    '''
+    return isinstance(estimates, str) and estimates != STOPPED_BY_CALLBACK
+
+
+def _skipped_outcome(reason):
+    '''
+    :param reason: (str) The reason an outcome cannot be estimated, from _screen_sectors.
+    :return: (Tuple[str, None, Pandas.Series]) In place of the outputs of _regress_ppml, a message in place of the
+        results, no modified data, and diagnostics containing the reason ('Estimation Skipped').
+    '''
+    return 'Estimation skipped: ' + reason + '.', None, pd.Series({'Estimation Skipped': reason})
+
+
+def _failure_diagnostics(diagnostics, estimates, failure, failure_policy):
+    '''
+    Add the outcome of a regression under a failure policy to its diagnostics.
+    :param diagnostics: (Pandas.Series) The diagnostics of the regression, which are modified.
+    :param estimates: (results obj or str) The final results of the regression, or a message if it did not complete.
+    :param failure: (str or None) The message of the first attempt, if it failed.
+    :param failure_policy: (str) 'skip' or 'retry'.
+    '''
+    attempts = 1 if failure is None or failure_policy != 'retry' else 2
+    if not isinstance(estimates, str):
+        outcome = 'completed' if attempts == 1 else 'completed on retry'
+    elif estimates == STOPPED_BY_CALLBACK:
+        outcome = 'stopped'
+    else:
+        outcome = 'skipped'
+    diagnostics.at['Estimation Outcome'] = outcome
+    diagnostics.at['Attempts'] = attempts
+    diagnostics.at['Failure'] = 'None' if failure is None else failure
+
+
+def _record_params(previous_params, outcome, estimates, specification):
+    '''
+    Store the covariate estimates of an outcome as its most recent estimates, which are used as starting values if
+    specification.warm_start is 'previous'.
+    :param previous_params: (Dict[str, Pandas.Series] or None) The most recent estimates of each outcome.
+    :param outcome: (str) The outcome.
+    :param estimates: (results obj or str) The results of the estimation, or a message if it did not complete.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    '''
+    if previous_params is not None and not isinstance(estimates, str):
+        previous_params[outcome] = estimates.params[[col for col in estimates.params.index
+                                                     if col in set(specification.rhs_var)]]
+
+
+def _start_params(data_frame, specification, fixed_effects, drop_fixed_effect, previous_params):
+    '''
+    Starting covariate values for each outcome, according to specification.warm_start.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param fixed_effects: (List[Union[str,List[str]]]) A list of variables to construct fixed effects based on.
+    :param drop_fixed_effect: (optional) A dictionary of FE categories and names to be dropped
+    :param previous_params: (Dict[str, Pandas.Series]) The covariate estimates of the most recent estimation of each
+        outcome.
+    :return: (Dict[str, Pandas.Series] or None) Starting values for each outcome, or None for the default starting
+        values. For 'previous', previous_params itself is returned, so each estimation starts from the last.
+    '''
+    warm_start = specification.warm_start
+    if warm_start is None or _is_loglinear(warm_start):
+        # Log-linear starting values are computed for each sample by _initial_mu
+        return None
+    if isinstance(warm_start, str) and warm_start == 'previous':
+        return previous_params
+    if isinstance(warm_start, str) and warm_start == 'pooled':
+        return _pooled_params(data_frame, specification, fixed_effects, drop_fixed_effect)
+    return {outcome: pd.Series(warm_start, dtype=float) for outcome in _outcomes(specification)}
+
+
+def _pooled_params(data_frame, specification, fixed_effects, drop_fixed_effect):
+    '''
+    Covariate estimates from a pooled estimation of all sectors, which are used as starting values for each sector.
+    The fixed effects are absorbed (engine='hdfe'), regardless of the specification's engine, so the pooled estimation
+    does not create fixed effect dummies for the full data.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation containing all sectors.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param fixed_effects: (List[Union[str,List[str]]]) A list of variables to construct fixed effects based on.
+    :param drop_fixed_effect: (optional) A dictionary of FE categories and names to be dropped
+    :return: (Dict[str, Pandas.Series]) The covariate estimates for each outcome that could be estimated.
+    '''
+    logger.info('Estimating pooled starting values')
+    pooled_specification = copy.copy(specification)
+    pooled_specification.engine = 'hdfe'
+    pooled_specification.std_errors = 'nonrobust'
+    pooled_specification.warm_start = None
+    pooled_params = {}
+    _estimate_outcomes(_default_index(data_frame), pooled_specification, fixed_effects, drop_fixed_effect, False, None,
+                       previous_params=pooled_params)
+    return pooled_params
+
+
+def _cached_fixed_effect_codes(fixed_effect_cache, sample, data_frame, fixed_effects):
+    '''
+    Fixed effect codes for a sample, reused from fixed_effect_cache if they have already been created for another
+    specification estimated on the same observations.
+    :param fixed_effect_cache: (Dict or None) Codes keyed by sample and fixed effects. If None, the codes are created.
+    :param sample: (str) 'all' or the sector estimated.
+    :param data_frame: (Pandas.DataFrame) The observations of the sample.
+    :param fixed_effects: (List[Union[str,List[str]]]) A list of variables to construct fixed effects based on.
+    :return: As returned by _fixed_effect_codes.
+    '''
+    if fixed_effect_cache is None:
+        return _fixed_effect_codes(data_frame, fixed_effects)
+    key = (sample, str(fixed_effects))
+    if key not in fixed_effect_cache:
+        fixed_effect_cache[key] = _fixed_effect_codes(data_frame, fixed_effects)
+    return fixed_effect_cache[key]
+
+
+def _fill_fixed_effect_cache(fixed_effect_cache, data_frame, meta_data, specification):
+    '''
+    Create the fixed effect codes of each sample (all data or each sector) of a specification in fixed_effect_cache,
+    so that they can be shared with specifications estimated in other processes.
+    :param fixed_effect_cache: (Dict) Codes keyed by sample and fixed effects. See _cached_fixed_effect_codes.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation.
+    :param meta_data: (obj) a MetaData object from gme.EstimationData
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    '''
+    if not specification.sector_by_sector:
+        _cached_fixed_effect_codes(fixed_effect_cache, 'all', data_frame, specification.fixed_effects)
+        return
+    sector_groups = data_frame.groupby(meta_data.sector_var_name)
+    for sector in _sectors(data_frame, meta_data):
+        _cached_fixed_effect_codes(fixed_effect_cache, str(sector), sector_groups.get_group(sector),
+                                   specification.fixed_effects)
+
+
+def _sample_fixed_effect_cache(fixed_effect_cache, sample):
+    '''
+    The entries of fixed_effect_cache for one sample, which are sent with the sample to a worker process.
+    '''
+    if fixed_effect_cache is None:
+        return None
+    return {key: codes for key, codes in fixed_effect_cache.items() if key[0] == sample}
+
+
+def _outcomes(specification):
+    '''
+    The outcomes (dependent variables) of a specification.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :return: (List[str]) The lhs_var, or each lhs_var if a list was supplied.
+    '''
+    if isinstance(specification.lhs_var, str):
+        return [specification.lhs_var]
+    return list(specification.lhs_var)
+
+
+def _result_key(specification, outcome, sample):
+    '''
+    The key of an estimation in results_dict, ppml_diagnostics, and modified_data. A single outcome is keyed by sample
+    ('all' or the sector), as before multiple outcomes were supported. Multiple outcomes are keyed by outcome (e.g.
+    'trade_value') or, if estimating sector by sector, by outcome and sector (e.g. 'trade_value_10').
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param outcome: (str) The outcome (lhs_var) estimated.
+    :param sample: (str) 'all' or the sector estimated.
+    :return: (str)
+    '''
+    if isinstance(specification.lhs_var, str):
+        return sample
+    if sample == 'all':
+        return outcome
+    return outcome + '_' + sample
+
+
+def _check_result_keys(specification, sector_list):
+    '''
+    Check that every outcome and sector has its own key, as the keys of outcomes and sectors that contain underscores
+    can coincide (e.g. outcome 'trade' with sector '10_a' and outcome 'trade_10' with sector 'a').
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param sector_list: (List) The sectors estimated.
+    '''
+    estimations = {}
+    for outcome in _outcomes(specification):
         for sector in sector_list:
-            sector_start_time = time.time()
-            print('Sector ' + str(sector) + ' began at ' + time.strftime('%I:%M %p  on %b %d, %Y'))
-            sector_data_frame = sector_groups.get_group(sector)
-            sector_data_frame = sector_data_frame.reset_index(drop=True)
-
-            # Create fixed effects
-            fixed_effects_df = _generate_fixed_effects(sector_data_frame, fixed_effects)
-            fe_columns = list(fixed_effects_df.columns)
-            # Dataframe for estimations
-            sector_data_frame = pd.concat([sector_data_frame, fixed_effects_df],axis=1)
-            model_fit, post_diagnostics_data_frame, diagnostics_output = _regress_ppml(sector_data_frame, specification,fe_columns, drop_fixed_effect,cluster,cluster_on)
-
-            # Timing reports
-            sector_end_time = time.time()
-            diagnostics_output.at['Sector Completion Time'] = (str(round((sector_end_time - sector_start_time) / 60, 2))
-                                                               + ' minutes')
-            if iteration_count > 1:
-                average_time = ((time.time() - start_time) / 60) / iteration_count
-                completion_time = (len(sector_list) - iteration_count) * average_time
-                print("Average iteration time:  " + str(average_time) + "  minutes")
-                print("Expected time to completion:  " + str(completion_time) + " minutes ("+ str(completion_time/60)
-                      + " hours)\n")
-
-            # Store results
-            post_diagnostics_data_frame_dict[str(sector)] = post_diagnostics_data_frame
-            results_dict[str(sector)] = model_fit
-            diagnostics_log = pd.concat([diagnostics_log, diagnostics_output.rename(str(sector))], axis=1)
-            iteration_count+=1
-
-    print("Estimation completed at " + time.strftime('%I:%M %p  on %b %d, %Y'))
-    return results_dict, diagnostics_log, post_diagnostics_data_frame_dict
+            key = _result_key(specification, outcome, str(sector))
+            if key in estimations:
+                raise ValueError('Outcome ' + estimations[key][0] + ' for sector ' + str(estimations[key][1])
+                                 + ' and outcome ' + outcome + ' for sector ' + str(sector) + ' would both be keyed '
+                                 + key + '. Rename the outcomes or sectors so that their keys are distinct.')
+            estimations[key] = (outcome, sector)
+
+
+def _shared_value(shared, name, key, compute):
+    '''
+    Reuse a value computed for a previous outcome of the same sample if it was computed from the same inputs. Only the
+    most recent value of each name is retained, which limits the memory held for reuse to one of each value.
+    :param shared: (Dict or None) Values retained for reuse, created by _estimate_outcomes. If None, the value is
+        computed without being retained.
+    :param name: (str) The name of the value.
+    :param key: Identifies the inputs (e.g. the observations and columns) from which the value is computed.
+    :param compute: (function) A function without arguments that computes the value.
+    :return: The value.
+    '''
+    if shared is None:
+        return compute()
+    if name not in shared or not _same_key(shared[name][0], key):
+        shared[name] = (key, compute())
+    return shared[name][1]
+
+
+def _same_key(first_key, second_key):
+    '''
+    Compare two keys from _shared_value, which may be tuples of strings and boolean masks.
+    '''
+    if isinstance(first_key, tuple) and isinstance(second_key, tuple):
+        return len(first_key) == len(second_key) and all(_same_key(first, second)
+                                                         for first, second in zip(first_key, second_key))
+    if isinstance(first_key, np.ndarray) or isinstance(second_key, np.ndarray):
+        return (isinstance(first_key, np.ndarray) and isinstance(second_key, np.ndarray)
+                and np.array_equal(first_key, second_key))
+    return first_key == second_key
 
 
 # --------------
 # Prep for Estimation Functions
 # --------------
+def _default_index(data_frame):
+    '''
+    Give a DataFrame a default (0, 1, ..., n-1) index. Unlike reset_index, the data are shared rather than copied.
+    :param data_frame: (Pandas.DataFrame)
+    :return: (Pandas.DataFrame) A new DataFrame sharing the columns of data_frame.
+    '''
+    data_frame = data_frame.copy(deep=False)
+    data_frame.index = pd.RangeIndex(data_frame.shape[0])
+    return data_frame
+
+
+def _subset(data_frame, rows=None, drop_columns=[]):
+    '''
+    Select observations and remove columns, copying the data only if observations or columns are removed.
+    :param data_frame: (Pandas.DataFrame)
+    :param rows: (optional, numpy.ndarray) A boolean mask of the observations to keep. Default keeps all observations.
+    :param drop_columns: (optional, List[str]) Columns to remove. Columns not in data_frame are ignored.
+    :return: (Pandas.DataFrame) A new DataFrame, which shares the columns of data_frame if nothing is removed.
+    '''
+    drop_columns = set(drop_columns)
+    keep_columns = [col for col in data_frame.columns if col not in drop_columns]
+    if rows is None or rows.all():
+        if len(keep_columns) == data_frame.shape[1]:
+            return data_frame.copy(deep=False)
+        return data_frame[keep_columns]
+    return data_frame.loc[rows, keep_columns]
+
+
 def _generate_fixed_effects(data_frame,
-                            fixed_effects: List[Union[str, List[str]]] = []):
+                            fixed_effects: List[Union[str, List[str]]] = [],
+                            fixed_effect_codes=None):
     '''
-    Create fixed effects for single and interacted categorical variables.
+    Create fixed effects for single and interacted categorical variables. The fixed effects are built from integer
+    category codes and stored as a sparse matrix, so the dummy variables are never held in memory as dense columns.
 
     Args:
         data_frame: Pandas.DataFrame
@@ -125,11 +690,33 @@ def _generate_fixed_effects(data_frame,
             strings, which create fixed effects corresponding to the interaction of the list items. For example,
             fixed_effects = ['importer',['exporter','year']] would create a set of importer fixed effects and a set of
             exporter-year fixed effects.
-    Returns: Pandas.DataFrame
-        A DataFrame of fixed effects to be concatenated with the estimating DataFrame.
+        fixed_effect_codes: (optional) List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]
+            Category codes for fixed_effects, as returned by _fixed_effect_codes, if they have already been created.
+    Returns: _SparseDesign
+        A sparse design of fixed effect dummies with one row per row of data_frame. Columns are named as they would
+        be by pandas.get_dummies (e.g. 'importer_year_fe_ARG2015').
     '''
 
-    fixed_effect_data_frame = pd.DataFrame([])
+    if fixed_effect_codes is None:
+        fixed_effect_codes = _fixed_effect_codes(data_frame, fixed_effects)
+    fixed_effects_design = _SparseDesign.empty(data_frame.shape[0])
+    for codes, columns, labels in fixed_effect_codes:
+        fixed_effects_design = fixed_effects_design.hstack(_SparseDesign.from_codes(codes, columns))
+    return fixed_effects_design
+
+
+def _fixed_effect_codes(data_frame,
+                        fixed_effects: List[Union[str, List[str]]] = []):
+    '''
+    Create integer category codes for single and interacted categorical variables.
+    :param data_frame: (Pandas.DataFrame) A DataFrame containing data for estimation.
+    :param fixed_effects: (List[Union[str,List[str]]]) A list of variables to construct fixed effects based on. See
+        _generate_fixed_effects.
+    :return: (List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) For each set of fixed effects, an array with
+        the category code of each observation, a list of the fixed effect column name for each code, and a lookup
+        table of the categorical values (one column per variable) for each code.
+    '''
+    fixed_effect_codes = []
     # Get list for separate and combine fixed effect
     combined_fixed_effects = []
     separate_fixed_effects = []
@@ -143,8 +730,7 @@ def _generate_fixed_effects(data_frame,
     # Construct simple fixed effects
     for category in separate_fixed_effects:
         name = category + '_fe'
-        temp_fe = pd.get_dummies(data_frame[category], prefix=name)
-        fixed_effect_data_frame = pd.concat((fixed_effect_data_frame, temp_fe), axis=1)
+        fixed_effect_codes.append(_category_codes(data_frame[category], prefix=name))
 
     # Construct multiple fixed effects
     for item in combined_fixed_effects:
@@ -153,60 +739,256 @@ def _generate_fixed_effects(data_frame,
 
         if len(item) == 1:
             name = '_'.join(item) + '_fe'
-            temp_fe = pd.get_dummies(data_frame[item[0]], prefix=name)
-            fixed_effect_data_frame = pd.concat((fixed_effect_data_frame, temp_fe), axis=1)
+            fixed_effect_codes.append(_category_codes(data_frame[item[0]], prefix=name))
 
         elif len(item) > 1:
             name = '_'.join(item) + '_fe'
-            temp_data_frame = data_frame.loc[:, item]
-            temp_data_frame.loc[:, name] = temp_data_frame.astype(str).sum(axis=1).copy()
-            temp_fe = pd.get_dummies(temp_data_frame[name], prefix=name)
-            fixed_effect_data_frame = pd.concat((fixed_effect_data_frame, temp_fe), axis=1)
+            fixed_effect_codes.append(_interaction_codes(data_frame, item, prefix=name))
 
-    fixed_effect_data_frame = fixed_effect_data_frame.reset_index(drop=True)
-    return fixed_effect_data_frame
+    return fixed_effect_codes
 
 
-def _drop_fe(data_frame,drop_dic):
+def _category_codes(category_series, prefix):
+    '''
+    Create integer category codes from a categorical column.
+    :param category_series: (Pandas.Series) The categorical values for each observation.
+    :param prefix: (str) Prefix for the column names, which take the form prefix + '_' + category.
+    :return: (numpy.ndarray, List[str], Pandas.DataFrame) Codes for each observation, column names for each code, and
+        the category for each code. Categories are in sorted order, as in pandas.get_dummies.
     '''
-    Drops user-provided fixed effect columns from a dataframe
+    codes, categories = pd.factorize(category_series, sort=True)
+    columns = [prefix + '_' + str(category) for category in categories]
+    labels = pd.DataFrame({category_series.name: categories})
+    return codes, columns, labels
+
+
+def _interaction_codes(data_frame, variables, prefix):
+    '''
+    Create integer category codes for the interaction of several categorical columns. Observations are grouped using
+    the integer codes of each column, so labels are only created once per group rather than once per observation.
+    Groups are named and ordered by their concatenated categories (e.g. 'ARG2015'), matching dummies created from
+    the concatenated string columns.
+    :param data_frame: (Pandas.DataFrame) A DataFrame containing the columns to interact.
+    :param variables: (List[str]) The columns to interact.
+    :param prefix: (str) Prefix for the column names, which take the form prefix + '_' + concatenated categories.
+    :return: (numpy.ndarray, List[str], Pandas.DataFrame) Codes for each observation, column names for each code, and
+        a table of the categories of each variable for each code.
+    '''
+    group_codes = np.zeros(data_frame.shape[0], dtype=np.int64)
+    for variable in variables:
+        # Missing values (code -1) are shifted to 0 so that they form their own category
+        variable_codes, categories = pd.factorize(data_frame[variable])
+        group_codes, _ = pd.factorize(group_codes * (len(categories) + 1) + variable_codes + 1)
+
+    # The first observation in each group provides its categories. Factorized codes are numbered in order of first
+    # appearance, so a group's first observation is the first observation with a code above all preceding codes.
+    first_observation = np.flatnonzero(np.diff(np.maximum.accumulate(group_codes), prepend=-1) > 0)
+    group_labels = data_frame[variables].iloc[first_observation].reset_index(drop=True)
+
+    # Order (and, if concatenated labels coincide, combine) groups by their concatenated categories
+    # Columns are concatenated one at a time, as a row sum converts labels that look numeric to floats
+    concatenated_labels = group_labels[variables[0]].astype(str)
+    for variable in variables[1:]:
+        concatenated_labels = concatenated_labels + group_labels[variable].astype(str)
+    label_codes, concatenated_labels = pd.factorize(concatenated_labels, sort=True)
+    codes = label_codes[group_codes]
+    columns = [prefix + '_' + label for label in concatenated_labels]
+    labels = group_labels.iloc[np.unique(label_codes, return_index=True)[1]].reset_index(drop=True)
+    return codes, columns, labels
+
+
+def _drop_fe(rhs_design, user_fixed_effects):
+    '''
+    Drops user-provided fixed effect columns from a design
     Arguments
-    data_frame: Pandas.DataFrame
-        A DataFrame containing data for estimation.
-    drop_dic: Dict[Union[str,Tuple[str]],List[str]]
-        A dictionary of fixed effect categories and names to be dropped from dataframe.
+    rhs_design: _SparseDesign
+        A design containing the regressors for estimation.
+    user_fixed_effects: List[str]
+        The fixed effect columns to drop, as identified by _fixed_effects_to_drop. Columns that are not in the
+        design (e.g. because they were dropped by an earlier diagnostic) are ignored.
+    Returns: (_SparseDesign, List)
+        1. A copy of the input design with fixed effects columns removed
+        2. List of fixed effect column names removed
+    '''
+    design_columns = set(rhs_design.columns)
+    column_drop = [column for column in user_fixed_effects if column in design_columns]
+    return rhs_design.drop_columns(column_drop), column_drop
+
+
+def _fixed_effect_index(fixed_effect_codes):
+    '''
+    Create an index of the fixed effect columns that maps the categories of each fixed effect to its column.
+    :param fixed_effect_codes: (List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) Category codes, column names,
+        and category labels for each set of fixed effects, from _fixed_effect_codes.
+    :return: (Pandas.DataFrame) One row per fixed effect column, in design order, with the set of fixed effects
+        ('set'), the category code within the set ('code'), the column name ('column'), the position among all fixed
+        effect columns ('position'), and one column per categorical variable containing the category as a string. The
+        variable columns are missing for sets of fixed effects that do not use the variable.
+    '''
+    index_tables = []
+    for set_number, (codes, columns, labels) in enumerate(fixed_effect_codes):
+        index_table = labels.astype(str)
+        index_table['set'] = set_number
+        index_table['code'] = np.arange(len(columns))
+        index_table['column'] = columns
+        index_tables.append(index_table)
+    if len(index_tables) == 0:
+        index_tables = [pd.DataFrame({'set': [], 'code': [], 'column': []})]
+    fixed_effect_index = pd.concat(index_tables, ignore_index=True)
+    fixed_effect_index['position'] = np.arange(fixed_effect_index.shape[0])
+    return fixed_effect_index
+
+
+def _unomitted_codes(codes, columns, user_fixed_effects):
+    '''
+    Category codes with the fixed effects dropped by the user marked as negative, as those observations are not fit
+    by a fixed effect of their own.
+    :param codes: (numpy.ndarray) The category code of each observation, from _fixed_effect_codes.
+    :param columns: (List[str]) The fixed effect column name of each code.
+    :param user_fixed_effects: (List[str]) The fixed effect columns dropped by the user.
+    :return: (numpy.ndarray)
+    '''
+    omitted = set(user_fixed_effects)
+    omitted_codes = np.array([column in omitted for column in columns], dtype=bool)
+    if not omitted_codes.any():
+        return codes
+    return np.where(omitted_codes[codes], -1, codes)
+
+
+def _prune_fixed_effect_codes(fixed_effect_codes, keep):
+    '''
+    Select the observations kept by _prune_fixed_effect_groups from fixed effect codes, removing the categories
+    without observations.
+    :param fixed_effect_codes: (List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) Category codes, column names,
+        and category labels for each set of fixed effects, from _fixed_effect_codes.
+    :param keep: (numpy.ndarray) A boolean mask of the observations to keep.
+    :return: (List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) As returned by _fixed_effect_codes for the kept
+        observations. The codes remain in the order of the categories.
+    '''
+    pruned_codes = []
+    for codes, columns, labels in fixed_effect_codes:
+        kept_codes = codes[keep]
+        present = np.unique(kept_codes)
+        pruned_codes.append((np.searchsorted(present, kept_codes), [columns[code] for code in present],
+                             labels.iloc[present].reset_index(drop=True)))
+    return pruned_codes
+
+
+def _fixed_effects_to_drop(fixed_effect_index, drop_dic):
+    '''
+    Identify the fixed effect columns matching a dictionary of user-provided fixed effects to drop. A key matches every
+    set of fixed effects that includes all of its variables and a value matches the categories of those variables
+    exactly (as strings), so 'US' does not match 'USA'. For example, {'importer':['ARG']} matches the importer fixed
+    effect for ARG as well as each importer-year fixed effect for ARG.
+    :param fixed_effect_index: (Pandas.DataFrame) The index of fixed effect columns from _fixed_effect_index.
+    :param drop_dic: (Dict[Union[str,Tuple[str]],List[Union[str, Tuple[str]]]]) A dictionary of fixed effect
+        categories and names to be dropped.
         drop_dic = {('importer','year'):[('ARG','2015'),('BEL','2013')]} would drop the
         fixed effect columns for importer-year: ARG-2015 and BEL-2013.
-        The fixed effect categories should be a subset of the list supplied for fixed_effects. 
-    Returns: (Pandas.DataFrame, List)
-        1. A copy of the input data_frame with fixed effects columns removed
-        2. List of fixed effect column names removed
+    :return: (List[str]) The matching column names, ordered by the entry of drop_dic that they match and then by
+        column.
     '''
-        
-    reduced_df=data_frame.copy()
-    var_drop=[]
-   
     #Check if values in dic are lists
     for key in drop_dic.keys():
         if isinstance(drop_dic[key],str):
                 raise ValueError('Dropped Fixed Effect Names must be given as list or tuple')
-    
-    #Obtain the names to be dropped as a list of tuples
-    for key in drop_dic.keys():
-        for val in drop_dic[key]:
-            if not isinstance(key,tuple):
-                var_drop.append((key,val))
-            else:   
-                 var_drop.append(key+val)
-   
-    #Drop the columns from the dataframe that match the tuples
-    column_drop=[]
-    for var_tuple in var_drop:
-        for col_name in reduced_df.columns:
-            if all(drop_name in col_name for drop_name in var_tuple):
-                reduced_df.drop(col_name, axis=1, inplace=True)
-                column_drop.append(col_name)
-    return reduced_df,column_drop
+
+    # The first entry of drop_dic matched by each fixed effect column
+    matches = [pd.Series([], dtype=float)]
+    entry_number = 0
+    for key, values in drop_dic.items():
+        variables = list(key) if isinstance(key, tuple) else [key]
+        values = [tuple(value) if isinstance(value, (tuple, list)) else (value,) for value in values]
+        if any(len(value) != len(variables) for value in values):
+            raise ValueError('Each dropped fixed effect name for ' + str(key) + ' must have one entry per variable.')
+        entries = pd.DataFrame([[str(name) for name in value] for value in values], columns=variables)
+        entries['entry'] = np.arange(entry_number, entry_number + len(values))
+        entry_number += len(values)
+        if len(values) == 0 or not all(variable in fixed_effect_index.columns for variable in variables):
+            continue
+        candidates = fixed_effect_index[variables].dropna().reset_index()
+        matched_entries = candidates.merge(entries, on=variables)
+        matches.append(matched_entries.set_index('index')['entry'])
+    first_match = pd.concat(matches).groupby(level=0).min()
+
+    order = np.lexsort((fixed_effect_index.loc[first_match.index, 'position'].values, first_match.values))
+    return fixed_effect_index.loc[first_match.index[order], 'column'].tolist()
+
+def _screen_sectors(data_frame, meta_data, specification):
+    '''
+    Find the sectors that cannot be estimated from counts computed for all sectors by one groupby: sectors without
+    positive trade flows, with fewer positive trade flows than covariates, or with a set of fixed effects that has one
+    observation per category (e.g. importer-year fixed effects in a sector with a single exporter), which leaves no
+    variation to identify the covariates. If lhs_var is a list, each outcome is screened.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation containing all sectors.
+    :param meta_data: (obj) a MetaData object from gme.EstimationData
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :return: (Dict[Any, Dict[str, str]]) For each sector with an outcome that cannot be estimated, the reason for each
+        such outcome.
+    '''
+    outcomes = _outcomes(specification)
+    covariates = len(specification.rhs_var)
+    fixed_effects = [item if type(item) is list else [item] for item in specification.fixed_effects]
+    # Fixed effect categories, exporters, and importers are given integer codes so that they can be counted within
+    # each sector
+    screen = pd.DataFrame({outcome: data_frame[outcome].values > 0 for outcome in outcomes})
+    screen['observations'] = 1
+    for number, variables in enumerate(fixed_effects):
+        screen['fixed_effect_' + str(number)] = _interaction_codes(data_frame, variables, '')[0]
+    screen['exporters'] = pd.factorize(data_frame[meta_data.exp_var_name])[0]
+    screen['importers'] = pd.factorize(data_frame[meta_data.imp_var_name])[0]
+    aggregations = {column: 'sum' for column in outcomes + ['observations']}
+    aggregations.update({column: 'nunique' for column in screen.columns if column not in aggregations})
+    counts = screen.groupby(data_frame[meta_data.sector_var_name].values).agg(aggregations)
+
+    saturated_counts = pd.DataFrame({number: counts['fixed_effect_' + str(number)] == counts['observations']
+                                     for number in range(len(fixed_effects))}, index=counts.index)
+    flagged = (counts[outcomes] < max(covariates, 1)).any(axis=1)
+    if covariates > 0:
+        flagged = flagged | saturated_counts.any(axis=1)
+
+    # Reasons are only assembled for the flagged sectors
+    infeasible = {}
+    for sector, sector_counts in counts[flagged].iterrows():
+        saturated = [variables for number, variables in enumerate(fixed_effects) if saturated_counts.at[sector, number]]
+        if covariates > 0 and len(saturated) > 0:
+            if sector_counts['exporters'] == 1:
+                sector_reason = 'single exporter'
+            elif sector_counts['importers'] == 1:
+                sector_reason = 'single importer'
+            else:
+                sector_reason = 'the ' + '_'.join(saturated[0]) + ' fixed effects have one observation per category'
+        else:
+            sector_reason = None
+        reasons = {}
+        for outcome in outcomes:
+            if sector_counts[outcome] == 0:
+                reasons[outcome] = 'no positive trade flows'
+            elif sector_reason is not None:
+                reasons[outcome] = sector_reason
+            elif sector_counts[outcome] < covariates:
+                reasons[outcome] = ('fewer positive trade flows (' + str(sector_counts[outcome])
+                                    + ') than covariates (' + str(covariates) + ')')
+        if len(reasons) > 0:
+            infeasible[sector] = reasons
+    return infeasible
+
+
+def _skipped_sector(specification, reasons, trace_memory=False, trace_convergence=False):
+    '''
+    The outputs of a sector skipped by _screen_sectors, in the form returned by _estimate_sector.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param reasons: (Dict[str, str]) The reason each outcome cannot be estimated.
+    :return: (Dict[str, Tuple[str, None, Pandas.Series]], Dict[str, _StageProfile]) The outputs of _skipped_outcome
+        and an empty profile for each outcome.
+    '''
+    outcome_outputs = {}
+    profiles = {}
+    for outcome in _outcomes(specification):
+        outcome_outputs[outcome] = _skipped_outcome(reasons[outcome])
+        profiles[outcome] = _StageProfile(trace_memory, trace_convergence)
+    return outcome_outputs, profiles
+
 
 def _sectors(data_frame, meta_data):
     '''
@@ -227,31 +1009,49 @@ def _sectors(data_frame, meta_data):
 # -------------
 
 
-def _regress_ppml(data_frame, specification, fe_columns, drop_fixed_effect, cluster, cluster_on):
+def _regress_ppml(data_frame, specification, fixed_effects_design, fixed_effect_codes, user_fixed_effects, cluster,
+                  cluster_on, shared=None, start_params=None, profile=None, iteration_monitor=None, tolerance=1e-8,
+                  relative_tolerance=0.):
     '''
     Perform a GLM estimation with collinearity, insufficient variation, and overfit diagnostics and corrections.
     :param data_frame: (Pandas.DataFrame) A DataFrame for estimation
     :param specification: (obj) a Specification object from gme.EstimationModel
-    :param specification: List of Fixed Effect columns in Dataframe
-    :param drop_fixed_effect: (optional) A dictionary of FE categories and names to be dropped
+    :param fixed_effects_design: (_SparseDesign) Sparse fixed effects for the rows of data_frame
+    :param fixed_effect_codes: (List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) Category codes for the rows of
+        data_frame, from _fixed_effect_codes.
+    :param user_fixed_effects: (List[str]) Names of the fixed effect columns omitted by the user
+    :param shared: (optional, Dict) Values shared by the outcomes of a batched estimation. See _shared_value.
+    :param start_params: (optional, Pandas.Series) Starting values for the covariates. The fixed effects start from
+        their maximum likelihood values given the covariates.
+    :param profile: (optional, _StageProfile) Records the stages of the regression.
+    :param iteration_monitor: (optional, callable) Called on each IRLS iteration, from _iteration_monitor.
+    :param tolerance: (float) The convergence tolerance of the IRLS estimation for the absolute change in the deviance.
+    :param relative_tolerance: (float) The convergence tolerance for the change in the deviance relative to the
+        deviance, which is added to tolerance, as for statsmodels' GLM.
     :return: (GLM.fit() obj, Pandas.DataFrame, Pandas.Series)
         1. The first returned object is a GLM.fit() results object containing estimates, p-values, etc.
         2. The second return object is the dataframe used for estimation that has problematic columns removed.
         3. A column containing diagnostic information from the different checks and corrections undertaken.
     '''
     # Check for zero trade fixed effects
-    data_frame_copy = data_frame.copy()
-    adjusted_data_frame, problem_variable_list, rhs_cols = _new_trade_contingent_collinearity_check(data_frame=data_frame_copy,
-                                                                                      specification=specification, fe_columns=fe_columns)
+    _begin_stage(profile, 'Design')
+    rhs = _shared_value(shared, 'rhs', None, lambda: _SparseDesign.from_data_frame(
+        data_frame[specification.rhs_var]).hstack(fixed_effects_design))
+    _begin_stage(profile, 'Trade-Contingent Check')
+    adjusted_data_frame, adjusted_rhs, problem_variable_list, adjusted_gram = _new_trade_contingent_collinearity_check(
+        data_frame=data_frame, specification=specification, rhs_design=rhs, shared=shared)
 
     # Check for perfect collinearity and drop any user-specified FE
-    rhs = adjusted_data_frame[rhs_cols] 
-    adj_rhs,user_fe=_drop_fe(rhs,drop_fixed_effect)
-    non_collinear_rhs, collinear_fe = _collinearity_check(adj_rhs)
+    _begin_stage(profile, 'Drop Fixed Effects')
+    adj_rhs,user_fe=_drop_fe(adjusted_rhs,user_fixed_effects)
+    kept_rows = adjusted_data_frame.index.values
+    _begin_stage(profile, 'Collinearity Check')
+    non_collinear_rhs, collinear_fe = _shared_value(shared, 'collinearity', (kept_rows, tuple(adj_rhs.columns)),
+                                                    lambda: _collinearity_check(adj_rhs, gram=adjusted_gram))
+    design_key = (kept_rows, tuple(non_collinear_rhs.columns))
 
     total_fe_drop=user_fe+collinear_fe
-    for col in total_fe_drop:
-        adjusted_data_frame.drop(col, 1, inplace=True)
+    adjusted_data_frame = _subset(adjusted_data_frame, drop_columns=total_fe_drop)
 #
 #    if len(collinear_column_list) == 0:
 #        collinearity_indicator = 'No'
@@ -260,37 +1060,108 @@ def _regress_ppml(data_frame, specification, fe_columns, drop_fixed_effect, clus
     #collinearity_column = pd.Series({'Collinearities': collinearity_indicator})
     excluded_column_list = problem_variable_list + total_fe_drop
     exclusion_column = pd.Series({'Number of Regressors Dropped': len(excluded_column_list)})
-    print('Omitted Regressors: ' + str(excluded_column_list))
-   
+    logger.debug('Omitted Regressors: %s', excluded_column_list)
+
+    # The fixed effects are retained with the modified data as sparse columns, stored as one byte integers with a
+    # compact precision. The columns of the data are shared rather than copied.
+    _begin_stage(profile, 'Modified Data')
+    fe_columns = [col for col in non_collinear_rhs.columns if col not in specification.rhs_var]
+    fe_dtype = np.uint8 if specification.precision == 'float32' else float
+    fixed_effects_data_frame = _shared_value(shared, 'fixed_effects_data_frame', design_key,
+                                             lambda: non_collinear_rhs.select_columns(fe_columns).to_data_frame(
+                                                 index=adjusted_data_frame.index, dtype=fe_dtype))
+    adjusted_data_frame = pd.concat([adjusted_data_frame, fixed_effects_data_frame], axis=1, copy=False)
+
+    # statsmodels requires a dense exog, so the design is only densified here, after all columns have been dropped.
+    # engine='irls' estimates from the sparse design, as does engine='glm' if the dense design would exceed
+    # specification.dense_design_limit.
+    dense_design_size = _dense_design_size(non_collinear_rhs)
+    sparse_fit = specification.engine == 'irls' or (
+        specification.engine == 'glm' and specification.precision == 'float64'
+        and specification.dense_design_limit is not None and dense_design_size > specification.dense_design_limit)
+    if sparse_fit:
+        if specification.engine == 'glm':
+            logger.info('The dense design would use %.1f MB, which exceeds dense_design_limit, so %s is estimated '
+                        'from the sparse design', dense_design_size, specification.lhs_var)
+        exog = non_collinear_rhs
+    else:
+        _begin_stage(profile, 'Dense Design')
+        exog = _shared_value(shared, 'exog', design_key, lambda: non_collinear_rhs.to_dense_data_frame(
+            index=adjusted_data_frame.index, dtype=specification.precision))
+
     # GLM Estimation
     if cluster is False:
-        try:
-            estimates = sm.GLM(endog=adjusted_data_frame[specification.lhs_var],
-                           exog=non_collinear_rhs,
-                           family=sm.families.Poisson()
-                           ).fit(cov_type=specification.std_errors,
-                                 maxiter=specification.iteration_limit)
-            adjusted_data_frame['predicted_trade'] = estimates.mu
-
-        except:
-            traceback.print_exc()
-            estimates = 'Estimation could not complete.  GLM process raised an error.'
+        cov_type = specification.std_errors
+        cov_kwds = None
+        cluster_codes = None
     else:
-        try:
-
-            model = sm.GEE(endog=adjusted_data_frame[specification.lhs_var],
-                        exog=non_collinear_rhs,groups=adjusted_data_frame[cluster_on], 
-                        family=sm.families.Poisson())
-            
-            estimates=model.fit()
-            adjusted_data_frame['predicted_trade'] = model.predict(estimates.params)
-
-        except:
-            traceback.print_exc()
-            estimates = 'Estimation could not complete.  GLM process raised an error.'
-        
+        # Cluster-robust covariance computed from the Poisson GLM scores summed by cluster. As with the GEE
+        # estimator previously used for clustering, no small sample correction is applied. statsmodels computes
+        # two-way (Cameron, Gelbach, and Miller) clustered errors from a two column array of groups.
+        cov_type = 'cluster'
+        cluster_codes = _cluster_codes(adjusted_data_frame, cluster_on)
+        cov_kwds = {'groups': cluster_codes[0] if len(cluster_codes) == 1 else np.column_stack(cluster_codes),
+                    'use_correction': False}
+    # The precision check is only made if the estimation completes
+    precision_column = None
+    try:
+        _begin_stage(profile, 'Starting Values')
+        start_values_time = time.time()
+        covariates = [col for col in specification.rhs_var if col in set(exog.columns)]
+        start_mu, start_params = _initial_mu(adjusted_data_frame, specification, covariates,
+                                             [codes[adjusted_data_frame.index.values] for codes, columns, labels
+                                              in fixed_effect_codes], start_params)
+        # _fit_ppml_irls starts from start_mu, so starting values for each column are only needed by statsmodels
+        glm_start_params = None if start_mu is None or sparse_fit else _starting_params(exog, start_mu)
+        start_values_time = time.time() - start_values_time
+        _begin_stage(profile, 'Fit')
+        if specification.precision == 'float64' and not sparse_fit:
+            if iteration_monitor is None:
+                model = sm.GLM(endog=adjusted_data_frame[specification.lhs_var],
+                               exog=exog,
+                               family=sm.families.Poisson())
+            else:
+                model = _MonitoredGLM(endog=adjusted_data_frame[specification.lhs_var],
+                                      exog=exog,
+                                      family=sm.families.Poisson(),
+                                      monitor=iteration_monitor)
+            estimates = model.fit(cov_type=cov_type,
+                                  cov_kwds=cov_kwds,
+                                  maxiter=specification.iteration_limit,
+                                  tol=tolerance,
+                                  rtol=relative_tolerance,
+                                  start_params=glm_start_params)
+        else:
+            # statsmodels works with float64 copies of the design, so reduced precision designs are estimated by
+            # blocks of rows, accumulating in float64, and sparse designs without densifying
+            estimates = _fit_ppml_irls(endog=adjusted_data_frame[specification.lhs_var],
+                                       exog=exog,
+                                       cov_type=cov_type,
+                                       cluster_codes=cluster_codes,
+                                       max_iterations=specification.iteration_limit,
+                                       tolerance=tolerance,
+                                       relative_tolerance=relative_tolerance,
+                                       start_mu=start_mu,
+                                       profile=profile,
+                                       callback=iteration_monitor)
+        adjusted_data_frame['predicted_trade'] = estimates.mu
+        if specification.precision != 'float64':
+            _begin_stage(profile, 'Precision Check')
+            precision_column = _precision_check(non_collinear_rhs, adjusted_data_frame[specification.lhs_var].values,
+                                                estimates.params.values, exog)
+
+    except _EstimationStopped as stopped:
+        logger.warning('%s', stopped)
+        estimates = stopped.result
+        start_values_time = None
+    except:
+        logger.exception('Estimation of %s raised an error.', specification.lhs_var)
+        estimates = 'Estimation could not complete.  GLM process raised an error.'
+        start_values_time = None
+    del exog
         
     # Checks for overfit (only valid when keep=False)
+    _begin_stage(profile, 'Overfit Check')
     try:
         fit_check_outcome = _overfit_check(data_frame=adjusted_data_frame,
                                            specification=specification,
@@ -308,10 +1179,249 @@ def _regress_ppml(data_frame, specification, fe_columns, drop_fixed_effect, clus
     diagnostics.at['Regressors with Zero Trade'] =  problem_variable_list
     diagnostics.at['Regressors from User'] = user_fe
     diagnostics.at['Regressors Perfectly Collinear'] = collinear_fe
+    _end_stage(profile)
+    _iteration_diagnostics(diagnostics, estimates, specification, start_params, start_values_time, profile)
+    if precision_column is not None:
+        diagnostics = pd.concat([diagnostics, precision_column])
+    if sparse_fit and specification.engine == 'glm':
+        diagnostics.at['Sparse Design Fit'] = 'Yes'
+        diagnostics.at['Dense Design Size (MB)'] = dense_design_size
     
     return estimates, adjusted_data_frame, diagnostics
 
 
+def _dense_design_size(design):
+    '''
+    :param design: (_SparseDesign) The design of a regression.
+    :return: (float) The size (in MB) of the design as a dense float64 matrix, as required by statsmodels.
+    '''
+    return design.shape[0] * design.shape[1] * 8 / 2 ** 20
+
+
+def _regress_ppml_hdfe(data_frame, specification, fixed_effect_codes, user_fixed_effects, cluster, cluster_on,
+                       shared=None, start_params=None, profile=None, iteration_monitor=None, tolerance=1e-8):
+    '''
+    Perform a PPML estimation with absorbed fixed effects, including the pre-estimation diagnostics of _regress_ppml
+    applied to the fixed effect categories rather than to dummy columns.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param fixed_effect_codes: (List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) Integer category codes,
+        column names, and category labels for each set of fixed effects, from _fixed_effect_codes.
+    :param user_fixed_effects: (List[str]) Names of the fixed effect columns omitted by the user
+    :param shared: (optional, Dict) Values shared by the outcomes of a batched estimation. See _shared_value.
+    :param start_params: (optional, Pandas.Series) Starting values for the covariates. The fixed effects start from
+        their maximum likelihood values given the covariates.
+    :param profile: (optional, _StageProfile) Records the stages of the regression.
+    :param iteration_monitor: (optional, callable) Called on each IRLS iteration, from _iteration_monitor.
+    :param tolerance: (float) The convergence tolerance of the IRLS estimation.
+    :return: (_PPMLResults, Pandas.DataFrame, Pandas.Series)
+        1. A results object containing estimates, p-values, etc. for the covariates.
+        2. The dataframe used for estimation that has problematic columns and observations removed.
+        3. A column containing diagnostic information from the different checks and corrections undertaken.
+    '''
+    lhs_values = data_frame[specification.lhs_var].values
+    positive_trade = lhs_values > 0
+    zero_trade = lhs_values == 0
+    rhs_columns = list(specification.rhs_var)
+
+    # User-specified fixed effects are omitted by excluding their observations from the corresponding projection
+    _begin_stage(profile, 'Drop Fixed Effects')
+    user_fe = list(user_fixed_effects)
+    omitted = set(user_fe)
+    codes_list = []
+    for codes, columns, labels in fixed_effect_codes:
+        omitted_codes = np.array([column in omitted for column in columns] + [True])
+        codes_list.append(np.where(omitted_codes[codes], -1, codes))
+
+    # Fixed effect categories without positive trade are perfectly collinear with zero trade flows. Their
+    # observations are dropped.
+    _begin_stage(profile, 'Trade-Contingent Check')
+    mask = np.ones(lhs_values.shape[0], dtype=bool)
+    problem_variable_list = []
+    for (codes, columns, labels), omitted_adjusted_codes in zip(fixed_effect_codes, codes_list):
+        included = omitted_adjusted_codes >= 0
+        positive_counts = np.bincount(codes[included & positive_trade], minlength=len(columns))
+        present = np.bincount(codes[included], minlength=len(columns)) > 0
+        no_trade = np.flatnonzero(present & (positive_counts == 0))
+        problem_variable_list.extend([columns[code] for code in no_trade])
+        mask[np.isin(omitted_adjusted_codes, no_trade) & included] = False
+
+    # Covariates that are collinear with the fixed effects when trade is positive
+    def positive_collinear_columns():
+        positive_absorber = _FixedEffectAbsorber([codes[positive_trade] for codes in codes_list])
+        positive_absorber.set_weights(np.ones(positive_trade.sum()))
+        return _absorbed_collinear_columns(data_frame.loc[positive_trade, rhs_columns], positive_absorber)
+    excluded_columns_list = _shared_value(shared, 'positive_collinearity', positive_trade, positive_collinear_columns)
+    for col in excluded_columns_list:
+        values = data_frame[col]
+        mean_value = values[positive_trade].mean()
+        max_value = values[zero_trade].max()
+        min_value = values[zero_trade].min()
+        if not (min_value < mean_value and mean_value < max_value):
+            problem_variable_list.append(col)
+            rhs_columns.remove(col)
+            if values.nunique() == 2:
+                mask[values.values == 1] = False
+
+    keep_observations = ~(zero_trade & ~mask)
+    adjusted_data_frame = _subset(data_frame, keep_observations, problem_variable_list)
+
+    # Covariates that are perfectly collinear with the fixed effects or each other
+    _begin_stage(profile, 'Collinearity Check')
+    def absorbed_collinear_columns():
+        kept_codes_list = [_recode(codes[keep_observations]) for codes in codes_list]
+        absorber = _FixedEffectAbsorber(kept_codes_list)
+        absorber.set_weights(np.ones(adjusted_data_frame.shape[0]))
+        return kept_codes_list, _absorbed_collinear_columns(adjusted_data_frame[rhs_columns], absorber)
+    codes_list, collinear_fe = _shared_value(shared, 'absorbed_collinearity',
+                                             (keep_observations, tuple(rhs_columns)), absorbed_collinear_columns)
+    rhs_columns = [col for col in rhs_columns if col not in collinear_fe]
+    adjusted_data_frame = _subset(adjusted_data_frame, drop_columns=collinear_fe)
+
+    excluded_column_list = problem_variable_list + user_fe + collinear_fe
+    exclusion_column = pd.Series({'Number of Regressors Dropped': len(excluded_column_list)})
+    logger.debug('Omitted Regressors: %s', excluded_column_list)
+
+    if cluster:
+        cov_type = 'cluster'
+        cluster_codes = _cluster_codes(adjusted_data_frame, cluster_on)
+    else:
+        cov_type = specification.std_errors
+        cluster_codes = None
+
+    try:
+        _begin_stage(profile, 'Starting Values')
+        start_values_time = time.time()
+        start_mu, start_params = _initial_mu(adjusted_data_frame, specification, rhs_columns, codes_list,
+                                             start_params)
+        start_values_time = time.time() - start_values_time
+        _begin_stage(profile, 'Fit')
+        estimates = _fit_ppml_hdfe(endog=adjusted_data_frame[specification.lhs_var],
+                                   exog=adjusted_data_frame[rhs_columns],
+                                   codes_list=codes_list,
+                                   cov_type=cov_type,
+                                   cluster_codes=cluster_codes,
+                                   max_iterations=specification.iteration_limit,
+                                   tolerance=tolerance,
+                                   start_mu=start_mu,
+                                   profile=profile,
+                                   callback=iteration_monitor)
+        adjusted_data_frame['predicted_trade'] = estimates.mu
+    except _EstimationStopped as stopped:
+        logger.warning('%s', stopped)
+        estimates = stopped.result
+        start_values_time = None
+    except:
+        logger.exception('Estimation of %s raised an error.', specification.lhs_var)
+        estimates = 'Estimation could not complete.  GLM process raised an error.'
+        start_values_time = None
+
+    _begin_stage(profile, 'Overfit Check')
+    try:
+        fit_check_outcome = _overfit_check(data_frame=adjusted_data_frame,
+                                           specification=specification,
+                                           predicted_trade_column='predicted_trade')
+        overfit_column = pd.Series({'Overfit Warning': fit_check_outcome})
+    except:
+        overfit_column = pd.Series({'Overfit Warning': 'Estimation could not complete'})
+
+    diagnostics = pd.concat([overfit_column, exclusion_column])
+    diagnostics.at['Regressors with Zero Trade'] = problem_variable_list
+    diagnostics.at['Regressors from User'] = user_fe
+    diagnostics.at['Regressors Perfectly Collinear'] = collinear_fe
+    _end_stage(profile)
+    _iteration_diagnostics(diagnostics, estimates, specification, start_params, start_values_time, profile)
+
+    return estimates, adjusted_data_frame, diagnostics
+
+
+def _initial_mu(data_frame, specification, covariates, codes_list, start_params):
+    '''
+    Starting fitted values for the IRLS estimation of a sample. If specification.warm_start is 'loglinear', the
+    starting covariate values are first estimated from a log-linear pre-fit on the sample.
+    :param data_frame: (Pandas.DataFrame) The adjusted DataFrame for estimation.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param covariates: (List[str]) The covariates estimated.
+    :param codes_list: (List[numpy.ndarray]) Integer category codes for the rows of data_frame for each set of fixed
+        effects.
+    :param start_params: (Pandas.Series or None) Starting covariate values from _start_params.
+    :return: (numpy.ndarray or None, Pandas.Series or None) The starting fitted values and covariate values, or None for
+        the default starting values.
+    '''
+    y = data_frame[specification.lhs_var].values.astype(float)
+    if _is_loglinear(specification.warm_start):
+        start_params = _loglinear_params(y, data_frame[covariates], codes_list)
+    if start_params is None:
+        return None, None
+    return _starting_mu(y, _covariate_offset(data_frame[covariates], start_params), codes_list), start_params
+
+
+def _is_loglinear(warm_start):
+    '''
+    :param warm_start: The warm_start option of a specification.
+    :return: (bool) True if starting values are estimated by a log-linear pre-fit.
+    '''
+    return isinstance(warm_start, str) and warm_start == 'loglinear'
+
+
+def _iteration_diagnostics(diagnostics, estimates, specification, start_params, start_values_time=None, profile=None):
+    '''
+    Add the number of IRLS iterations and, if warm starts were requested, the starting values used and the time taken
+    to compute them to the diagnostics.
+    :param diagnostics: (Pandas.Series) The diagnostics of the estimation, which are modified.
+    :param estimates: (results obj or str) The estimates, or a message if the estimation failed.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param start_params: (Pandas.Series or None) The starting covariate values, if any.
+    :param start_values_time: (float or None) Seconds spent computing the starting values of the sample.
+    :param profile: (optional, _StageProfile) The profile of the regression, to which the iterations are added.
+    '''
+    if not isinstance(estimates, str):
+        fit_history = estimates.fit_history
+        diagnostics.at['Iterations'] = fit_history['iteration'] if isinstance(fit_history, dict) else fit_history
+        if profile is not None:
+            profile.set_iterations(diagnostics.at['Iterations'])
+    if specification.warm_start is not None:
+        if start_params is None:
+            diagnostics.at['Starting Values'] = 'default'
+        elif isinstance(specification.warm_start, str):
+            diagnostics.at['Starting Values'] = specification.warm_start
+        else:
+            diagnostics.at['Starting Values'] = 'user'
+        if start_params is not None and start_values_time is not None:
+            diagnostics.at['Starting Values Time'] = str(round(start_values_time, 3)) + ' seconds'
+
+
+def _cluster_codes(data_frame, cluster_on):
+    '''
+    Integer cluster codes for each clustering variable.
+    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation
+    :param cluster_on: (Union[str, List[str]]) The clustering variable or variables.
+    :return: (List[numpy.ndarray]) Codes for each clustering variable.
+    '''
+    if isinstance(cluster_on, str):
+        cluster_on = [cluster_on]
+    return [pd.factorize(data_frame[variable])[0] for variable in cluster_on]
+
+
+def _absorbed_collinear_columns(covariates, absorber, tolerance_level=1e-6):
+    '''
+    Identify covariates that are collinear with the absorbed fixed effects or with preceding covariates.
+    :param covariates: (Pandas.DataFrame) The covariates.
+    :param absorber: (_FixedEffectAbsorber) An absorber with weights set for the rows of covariates.
+    :param tolerance_level: (float) Columns are collinear if the norm of their demeaned, orthogonalized component is
+        less than tolerance_level times their original norm.
+    :return: (List[str]) Names of the collinear columns.
+    '''
+    if covariates.shape[1] == 0:
+        return []
+    values = covariates.values.astype(float)
+    norms = np.sqrt(np.sum(values ** 2, axis=0))
+    norms[norms == 0] = 1
+    demeaned, _ = absorber.demean(values / norms)
+    positions = _collinear_positions(demeaned.T @ demeaned, tolerance_level)
+    return [covariates.columns[position] for position in positions]
+
+
 def _trade_contingent_collinearity_check(data_frame, specification):
     '''
     PPML diagnostic for columns that are collinear when trade is greater than zero, as in Santos and Silva (2011)
@@ -358,28 +1468,66 @@ def _trade_contingent_collinearity_check(data_frame, specification):
     return data_frame_copy, problem_variable_list
 
 
-def _collinearity_check(data_frame, tolerance_level=1e-05):
+def _collinearity_check(data_frame, tolerance_level=1e-05, gram=None):
     '''
-    Identifies and drops perfectly collinear columns
-    :param data_frame: (Pandas.DataFrame) A DataFrame for estimation
+    Identifies and drops perfectly collinear columns. Columns are examined in order and a column is identified as
+    collinear if the norm of its component orthogonal to the preceding (independent) columns, which is the diagonal
+    of the R factor of a QR decomposition, is smaller than the tolerance. The diagonal is computed from the cross
+    product matrix X'X, which can be formed from a sparse design without densifying it.
+    :param data_frame: (Pandas.DataFrame or _SparseDesign) A DataFrame or design for estimation
     :param tolerance_level: (float) Tolerance parameter for identifying zero values (default=1e-05)
-    :return: (Pandas.DataFrame) Original DataFrame with collinear columns removed
+    :param gram: (optional, Pandas.DataFrame) X'X for (at least) the columns of data_frame, labeled by column name, if
+        it has already been computed.
+    :return: (Pandas.DataFrame or _SparseDesign) Original DataFrame or design with collinear columns removed
     '''
+    if isinstance(data_frame, _SparseDesign):
+        design = data_frame
+    else:
+        design = _SparseDesign.from_data_frame(data_frame)
 
-    data_array = data_frame.values
-    q_factor, r_factor = np.linalg.qr(data_array)
-    r_diagonal = np.abs(r_factor.diagonal())
-    r_range = np.arange(r_diagonal.size)
-
-    # Get list of collinear columns
-    collinear_columns = np.where(r_diagonal < tolerance_level)[0]
-    collinear_data_frame = data_frame.iloc[:, collinear_columns]
-    collinear_column_list = list(collinear_data_frame.columns.values)
+    if gram is None:
+        gram = design.gram()
+    else:
+        gram = gram.loc[design.columns, design.columns].values.copy()
+    collinear_columns = _collinear_positions(gram, tolerance_level)
+    collinear_column_list = [design.columns[position] for position in collinear_columns]
 
     # Get df with independent columns
-    collinear_locations = list(collinear_columns)
-    independent_columns = list(set(r_range).symmetric_difference(set(collinear_locations)))
-    return data_frame.iloc[:, independent_columns], collinear_column_list
+    independent_columns = [column for column in design.columns if column not in set(collinear_column_list)]
+    if isinstance(data_frame, _SparseDesign):
+        return design.select_columns(independent_columns), collinear_column_list
+    return data_frame[independent_columns], collinear_column_list
+
+
+def _collinear_positions(gram, tolerance_level=1e-05, block_size=256):
+    '''
+    Sequential Cholesky factorization of a cross product matrix that skips (rather than fails on) dependent columns.
+    The square root of each pivot equals the absolute diagonal of the R factor from a QR decomposition of X. Columns
+    are factored in blocks so that most of the work is done as one matrix product per block.
+    :param gram: (numpy.ndarray) The k x k matrix X'X. It is overwritten.
+    :param tolerance_level: (float) Tolerance for the R diagonal below which a column is considered collinear.
+    :param block_size: (int) The number of columns factored before the remaining columns are updated.
+    :return: (List[int]) Positions of the collinear columns.
+    '''
+    number_of_columns = gram.shape[0]
+    # Rounding error in X'X is proportional to the column's sum of squares, so small pivots are also judged relative
+    # to it.
+    relative_tolerance = number_of_columns * np.finfo(float).eps * np.diag(gram).copy()
+    collinear_columns = []
+    for block_start in range(0, number_of_columns, block_size):
+        block_end = min(block_start + block_size, number_of_columns)
+        block_rows = np.zeros((block_end - block_start, number_of_columns - block_end))
+        for position in range(block_start, block_end):
+            pivot = gram[position, position]
+            if pivot < tolerance_level ** 2 or pivot <= relative_tolerance[position]:
+                collinear_columns.append(position)
+                continue
+            row = gram[position, position + 1:] / np.sqrt(pivot)
+            # Within the block, only the rows that are factored next are updated
+            gram[position + 1:block_end, position + 1:] -= np.outer(row[:block_end - position - 1], row)
+            block_rows[position - block_start] = row[block_end - position - 1:]
+        gram[block_end:, block_end:] -= block_rows.T @ block_rows
+    return collinear_columns
 
 
 # ----------------
@@ -415,58 +1563,88 @@ def _overfit_check(data_frame, specification: str = 'trade',
         fit_check = 'Yes'
     return fit_check
 
-def _new_trade_contingent_collinearity_check(data_frame, specification, fe_columns):
+def _precision_check(design, lhs_values, params, exog):
+    '''
+    Memory saved by a reduced precision design and the loss of precision in the estimates. The float64 estimates are
+    approximated by one Newton step from the reduced precision estimates using the float64 design. Because Newton's
+    method converges quadratically, the step equals the difference from a float64 fit up to second order terms.
+    :param design: (_SparseDesign) The float64 design used for estimation.
+    :param lhs_values: (numpy.ndarray) The dependent variable.
+    :param params: (numpy.ndarray) The estimates from the reduced precision design.
+    :param exog: (Pandas.DataFrame) The reduced precision dense design passed to statsmodels.
+    :return: (Pandas.Series) The design's precision, the memory it saved (in MB) relative to a float64 design, and the
+        largest absolute difference between the estimates and the float64 estimates.
+    '''
+    mu = np.exp(design.matrix @ params)
+    hessian = (design.matrix.T @ design.matrix.multiply(mu[:, None])).toarray()
+    newton_step = np.linalg.solve(hessian, design.matrix.T @ (lhs_values - mu))
+    memory_saved = exog.shape[0] * exog.shape[1] * (8 - exog.values.itemsize) / 2 ** 20
+    return pd.Series({'Design Precision': str(exog.values.dtype),
+                      'Design Memory Saved (MB)': round(memory_saved, 2),
+                      'Max Coefficient Difference from float64': np.max(np.abs(newton_step), initial=0)})
+
+
+def _new_trade_contingent_collinearity_check(data_frame, specification, rhs_design, shared=None):
     '''
     PPML diagnostic for columns that are collinear when trade is greater than zero, as in Santos and Silva (2011)
     Arguments
     :param data_frame: (Pandas.DataFrame) A DataFrame for estimation
     :param specification: (obj) a Specification object from gme.EstimationModel
-    :fe_columns: List of fe_variables to be used in the estimation
-    :return: (Pandas.DataFrame, list)
+    :param rhs_design: (_SparseDesign) The covariates and fixed effects for the rows of data_frame
+    :param shared: (optional, Dict) Values shared by the outcomes of a batched estimation. See _shared_value.
+    :return: (Pandas.DataFrame, _SparseDesign, list, Pandas.DataFrame)
         1. A copy of the input data_frame with columns collinear when trade is greater than zero and associated
         observations removed
-        2. List containing the names of the columns that were collinear when trade is greater than zero.
-        3. List of remaining fixed effect columns
+        2. The design with the same columns and observations removed.
+        3. List containing the names of the columns that were collinear when trade is greater than zero.
+        4. X'X for the returned design, labeled by column name.
     '''
 
-    # Main dataframe for manipulation
-    data_frame_copy = data_frame.copy()
-
-    # Identify problematic variables due to perfect collinearity when y>0
-    nonzero_data_frame = data_frame_copy.loc[data_frame_copy[specification.lhs_var] > 0]
-
-    orig_rhs_columns = specification.rhs_var + fe_columns
-    rhs = nonzero_data_frame[orig_rhs_columns]
-    noncollinear_columns, excluded_columns_list = _collinearity_check(rhs)
+    lhs_values = data_frame[specification.lhs_var].values
+    positive_trade = lhs_values > 0
+    zero_trade = lhs_values == 0
+
+    # Identify problematic variables due to perfect collinearity when y>0. X'X for y>0 is kept because the
+    # observations with y>0 are never dropped, so it is also part of X'X for the adjusted design. Both are shared by
+    # outcomes with the same positive flows.
+    positive_gram = _shared_value(shared, 'positive_gram', positive_trade, lambda: pd.DataFrame(
+        rhs_design.select_rows(positive_trade).gram(), index=rhs_design.columns, columns=rhs_design.columns))
+    noncollinear_columns, excluded_columns_list = _shared_value(
+        shared, 'positive_collinearity', positive_trade,
+        lambda: _collinearity_check(rhs_design.select_rows(positive_trade), gram=positive_gram))
     new_rhs_columns = list(noncollinear_columns.columns)
 
-    # Check if problematic and delete associated observations
-    data_frame_copy['mask'] = 1
-    problem_variable_list = []
-    for col in excluded_columns_list:
-        mean_value = data_frame_copy[data_frame_copy[specification.lhs_var] > 0][col].mean()
-        max_value = data_frame_copy[data_frame_copy[specification.lhs_var] == 0][col].max()
-        min_value = data_frame_copy[data_frame_copy[specification.lhs_var] == 0][col].min()
-        if min_value < mean_value and mean_value < max_value:
-            new_rhs_columns.append(col)
-        else:
-            problem_variable_list.append(col)
-            if data_frame_copy[col].nunique() == 2:
-                data_frame_copy.loc[data_frame_copy[col] == 1, 'mask'] = 0
+    # Check if problematic and delete associated observations. A column is kept if its mean when trade is positive
+    # lies strictly between its minimum and maximum when trade is zero. The statistics are computed for all excluded
+    # columns at once from the sparse design.
+    excluded = rhs_design.select_columns(excluded_columns_list).matrix
+    excluded.eliminate_zeros()
+    if positive_trade.any() and zero_trade.any():
+        mean_value = np.asarray(excluded[positive_trade].mean(axis=0)).ravel()
+        zero_trade_values = excluded[zero_trade]
+        max_value = zero_trade_values.max(axis=0).toarray().ravel()
+        min_value = zero_trade_values.min(axis=0).toarray().ravel()
+        in_between = (min_value < mean_value) & (mean_value < max_value)
+    else:
+        in_between = np.zeros(len(excluded_columns_list), dtype=bool)
+    new_rhs_columns.extend([col for col, keep in zip(excluded_columns_list, in_between) if keep])
+    problem_variable_list = [col for col, keep in zip(excluded_columns_list, in_between) if not keep]
+
+    # Observations are dropped for problematic binary (two valued) columns where the column equals one
+    column_of_entry = np.repeat(np.arange(excluded.shape[1]), np.diff(excluded.indptr))
+    distinct_nonzero_values = pd.DataFrame({'column': column_of_entry, 'value': excluded.data}).drop_duplicates()
+    number_of_values = np.bincount(distinct_nonzero_values['column'].values, minlength=excluded.shape[1])
+    number_of_values += np.diff(excluded.indptr) < excluded.shape[0]
+    binary_problem = ~in_between & (number_of_values == 2)
+    drop_rows = excluded.indices[binary_problem[column_of_entry] & (excluded.data == 1)]
+    mask = np.ones(lhs_values.shape[0], dtype=bool)
+    mask[drop_rows] = False
 
     # Return final data_frame with removed columns and observations
-    #data_frame_copy = data_frame_copy[data_frame_copy['mask'] != 0] #To account for FEs with non-zero trade
-    drop_obs= data_frame_copy[(data_frame_copy[specification.lhs_var] == 0) & (data_frame_copy['mask']== 0)].index
-    data_frame_copy.drop(drop_obs,inplace=True)
-    
-    drop_columns=problem_variable_list + ['mask']
-    for col in drop_columns:
-        data_frame_copy.drop(col, axis=1, inplace=True)
-
-    return data_frame_copy, problem_variable_list, new_rhs_columns
-
-
-
-
-
+    keep_observations = ~(zero_trade & ~mask) #To account for FEs with non-zero trade
+    adjusted_data_frame = _subset(data_frame, keep_observations, problem_variable_list)
+    adjusted_rhs = rhs_design.select_rows(keep_observations).select_columns(new_rhs_columns)
+    adjusted_gram = (positive_gram.loc[new_rhs_columns, new_rhs_columns]
+                     + rhs_design.select_rows(zero_trade & keep_observations).select_columns(new_rhs_columns).gram())
 
+    return adjusted_data_frame, adjusted_rhs, problem_variable_list, adjusted_gram
@@ -0,0 +1,101 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.special import gammaln
+from .SlimResults import SlimResults
+
+
+class _PPMLResults(SlimResults):
+    '''
+    A SlimResults object constructed directly from PPML estimates rather than from a statsmodels GLM results object.
+    It is returned by the estimation engines that do not use statsmodels and supports the same attributes and methods
+    (conf_int and summary) as SlimResults.
+    '''
+
+    def __init__(self,
+                 params,
+                 cov_params,
+                 nobs: int,
+                 llf: float,
+                 deviance: float,
+                 pearson_chi2: float,
+                 rank: int,
+                 cov_type: str,
+                 iterations: int,
+                 model: str,
+                 yname: str = 'y',
+                 mu=None,
+                 index=None):
+        '''
+        :param params: (Pandas.Series) Estimated coefficients indexed by variable name.
+        :param cov_params: (numpy.ndarray) The covariance matrix of params.
+        :param nobs: (int) The number of observations.
+        :param llf: (float) The log-likelihood.
+        :param deviance: (float) The deviance.
+        :param pearson_chi2: (float) Pearson's chi-squared statistic.
+        :param rank: (int) The rank of the full design, including any absorbed fixed effects.
+        :param cov_type: (str) The type of covariance matrix.
+        :param iterations: (int) The number of IRLS iterations completed.
+        :param model: (str) A description of the estimation engine.
+        :param yname: (str) Name of the dependent variable.
+        :param mu: (optional, numpy.ndarray) Fitted (predicted) values, if they are retained.
+        :param index: (optional) The index of the observations corresponding to mu.
+        '''
+        self.params = params
+        self.cov_params_matrix = pd.DataFrame(cov_params, index=params.index, columns=params.index)
+        self.nobs = float(nobs)
+        self.bse = pd.Series(np.sqrt(np.diag(cov_params)), index=params.index)
+        self.tvalues = self.params / self.bse
+        self.pvalues = pd.Series(2 * stats.norm.sf(np.abs(self.tvalues)), index=params.index)
+        self.family_name = 'Poisson'
+        self.family_link = 'Log'
+        self.method = 'IRLS'
+        self.fit_history = iterations
+        self.scale = 1.0
+        self.llf = llf
+        self.deviance = deviance
+        self.pearson_chi2 = pearson_chi2
+        self.cov_type = cov_type
+        self.yname = yname
+        self.xname = list(params.index)
+        self.model = model
+        self.df_model = rank - 1
+        self.df_resid = self.nobs - rank
+        self.aic = -2 * self.llf + 2 * rank
+        self.bic = -2 * self.llf + rank * np.log(self.nobs)
+        self.mu = mu
+        self.fittedvalues = None if mu is None else pd.Series(mu, index=index)
+
+    def cov_params(self):
+        '''
+        Returns: Pandas.DataFrame
+            The estimated covariance matrix of the parameters.
+        '''
+        return self.cov_params_matrix
+
+
+def _poisson_statistics(y, mu):
+    '''
+    Fit statistics of a Poisson model. The sums are additive over observations, so they can be accumulated over
+    subsets of the data.
+    :param y: (numpy.ndarray) Observed values.
+    :param mu: (numpy.ndarray) Fitted values.
+    :return: (float, float, float) The log-likelihood, deviance, and Pearson chi-squared statistic.
+    '''
+    llf = np.sum(y * np.log(np.where(mu > 0, mu, 1)) - mu - gammaln(y + 1))
+    return llf, _poisson_deviance(y, mu), np.sum((y - mu) ** 2 / mu)
+
+
+def _poisson_deviance(y, mu):
+    '''
+    Poisson deviance, 2 * sum(y * log(y / mu) - (y - mu)), with y * log(y / mu) = 0 when y = 0.
+    :param y: (numpy.ndarray) Observed values.
+    :param mu: (numpy.ndarray) Fitted values.
+    :return: (float)
+    '''
+    positive = y > 0
+    return 2 * (np.sum(y[positive] * np.log(y[positive] / mu[positive])) - np.sum(y - mu))
@@ -2,41 +2,99 @@ __Author__ = "Peter Herman"
 __Project__ = "Gravity Code"
 __Created__ = "03/28/2018"
 
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 
 def _slice_data_for_estimation(data_frame,
                                specification,
                                meta_data,
-                               data_log):
+                               data_log,
+                               filter_cache=None):
+    # Observations are selected with a boolean mask and the selected rows of the using variables are copied once, at
+    # the end, so the input data are never copied in full.
+    rows, using_variables, data_log = _estimation_rows(data_frame, specification, meta_data, data_log, filter_cache)
+    return _select_rows(data_frame, rows, using_variables), data_log
+
+
+def _select_rows(data_frame, rows, using_variables):
+    '''
+    Copy the selected observations of the variables used for estimation.
+    :param data_frame: (Pandas.DataFrame) The data from an EstimationData.
+    :param rows: (numpy.ndarray) A boolean mask of the observations to keep.
+    :param using_variables: (List[str]) The variables to keep.
+    :return: (Pandas.DataFrame)
+    '''
+    # Each column is selected separately, as selecting rows and columns together can copy every column of the input.
+    # The selected arrays share one index rather than each creating its own.
+    return pd.DataFrame({variable: data_frame[variable].values[rows] for variable in using_variables},
+                        index=data_frame.index[rows])
+
+
+def _estimation_rows(data_frame,
+                     specification,
+                     meta_data,
+                     data_log,
+                     filter_cache=None):
+    '''
+    Apply the sample filters of a specification.
+    :param data_frame: (Pandas.DataFrame) The data from an EstimationData.
+    :param specification: (obj) a Specification object from gme.EstimationModel
+    :param meta_data: (obj) a MetaData object from gme.EstimationData
+    :param data_log: (obj) The DataLog in which the filters are recorded.
+    :param filter_cache: (optional, Dict) The mask of each filter applied, which is reused by later specifications
+        with the same filter (e.g. by SpecificationGrid).
+    :return: (numpy.ndarray, List[str], obj) A boolean mask of the observations to keep, the variables used by the
+        specification, and the data log.
+    '''
+    rows = np.ones(data_frame.shape[0], dtype=bool)
 
     # Keep Only Using Variables
-    data_frame, data_log = _keep_using_vars(data_frame, specification, meta_data, data_log)
+    using_variables, data_log = _keep_using_vars(data_frame, specification, meta_data, data_log)
 
     # Drop intra-trade
-    data_frame, data_log =_drop_intra_trade(data_frame, specification, meta_data, data_log)
+    rows, data_log =_drop_intra_trade(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Drop Importers
-    data_frame, data_log = _drop_importers(data_frame, specification, meta_data, data_log)
+    rows, data_log = _drop_importers(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Drop Exporters
-    data_frame, data_log = _drop_exporters(data_frame, specification, meta_data, data_log)
+    rows, data_log = _drop_exporters(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Keep importers
-    data_frame, data_log = _keep_importers(data_frame, specification, meta_data, data_log)
+    rows, data_log = _keep_importers(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Keep Exporters
-    data_frame, data_log = _keep_exporters(data_frame, specification, meta_data, data_log)
+    rows, data_log = _keep_exporters(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Drop Years
-    data_frame, data_log = _drop_years(data_frame, specification, meta_data, data_log)
+    rows, data_log = _drop_years(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Keep Years
-    data_frame, data_log = _keep_years(data_frame, specification, meta_data, data_log)
+    rows, data_log = _keep_years(data_frame, rows, specification, meta_data, data_log, filter_cache)
 
     # Drop Missing
-    data_frame, data_log = _drop_missing(data_frame, specification, data_log)
+    rows, data_log = _drop_missing(data_frame, rows, using_variables, specification, data_log, filter_cache)
+
+    return rows, using_variables, data_log
 
-    return data_frame, data_log
+
+def _filter_mask(filter_cache, key, compute):
+    '''
+    The mask of a filter, reused from filter_cache if the same filter has already been applied.
+    :param filter_cache: (Dict or None) Masks of the filters already applied. If None, the mask is computed.
+    :param key: (tuple) Identifies the filter and its arguments.
+    :param compute: (function) A function without arguments that computes the mask.
+    :return: (numpy.ndarray) A boolean mask of the observations that pass the filter.
+    '''
+    if filter_cache is None:
+        return compute()
+    if key not in filter_cache:
+        filter_cache[key] = compute()
+    return filter_cache[key]
 
 
 
@@ -50,157 +108,182 @@ def _keep_using_vars(data_frame,
                                data_log):
     pre_drop_size = data_frame.shape
 
-    using_variables = specification.rhs_var + [specification.lhs_var, meta_data.imp_var_name,
-                                             meta_data.exp_var_name, meta_data.year_var_name]
+    lhs_var = [specification.lhs_var] if isinstance(specification.lhs_var, str) else list(specification.lhs_var)
+    using_variables = specification.rhs_var + lhs_var + [meta_data.imp_var_name, meta_data.exp_var_name,
+                                                          meta_data.year_var_name]
+    # Fixed effects may use variables other than the importer, exporter, and year (e.g. pair fixed effects)
+    fixed_effect_variables = [variable for item in specification.fixed_effects
+                              for variable in ([item] if isinstance(item, str) else item)]
+    using_variables = using_variables + [variable for variable in dict.fromkeys(fixed_effect_variables)
+                                         if variable not in using_variables]
     if specification.cluster_on is not None:
-        using_variables.append(specification.cluster_on)
-    if meta_data.sector_var_name is not None:
+        cluster_on = [specification.cluster_on] if isinstance(specification.cluster_on, str) \
+            else list(specification.cluster_on)
+        using_variables = using_variables + [variable for variable in cluster_on if variable not in using_variables]
+    if meta_data.sector_var_name is not None and meta_data.sector_var_name not in using_variables:
         using_variables = using_variables + [meta_data.sector_var_name]
-    data_frame = data_frame[using_variables]
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': 0, 'columns': pre_drop_size[1] - len(using_variables)}
     data_log.specification_variables_kept = str(using_variables) + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('select specification variables: ' + data_log.specification_variables_kept)
-    return data_frame, data_log
+        logger.info('select specification variables: %s', data_log.specification_variables_kept)
+    return using_variables, data_log
 
 def _drop_intra_trade(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if specification.drop_intratrade is True:
-        data_frame = data_frame[data_frame[meta_data.imp_var_name] != data_frame[meta_data.exp_var_name]].copy()
+        rows = rows & _filter_mask(filter_cache, ('drop_intratrade',),
+                                   lambda: data_frame[meta_data.imp_var_name].values
+                                           != data_frame[meta_data.exp_var_name].values)
         data_log.intra_country_trade_dropped = 'yes'
     else:
         data_log.intra_country_trade_dropped = 'no'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.intra_country_trade_dropped = data_log.intra_country_trade_dropped + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('drop_intratrade: ' + data_log.intra_country_trade_dropped)
-    return data_frame, data_log
+        logger.info('drop_intratrade: %s', data_log.intra_country_trade_dropped)
+    return rows, data_log
 
 
 def _drop_importers(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if (len(specification.drop_imp_exp) > 0) or (len(specification.drop_imp) > 0):
         importer_drop_list = list(set(specification.drop_imp_exp + specification.drop_imp))
-        data_frame.drop(data_frame.loc[data_frame[meta_data.imp_var_name].isin(importer_drop_list)].index, inplace=True)
+        rows = rows & _filter_mask(filter_cache, ('drop_imp', frozenset(importer_drop_list)),
+                                   lambda: ~data_frame[meta_data.imp_var_name].isin(importer_drop_list).values)
         data_log.importers_dropped = str(importer_drop_list)
     else:
         data_log.importers_dropped = 'none'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.importers_dropped = data_log.importers_dropped + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('drop_imp: ' + data_log.importers_dropped)
-    return data_frame, data_log
+        logger.info('drop_imp: %s', data_log.importers_dropped)
+    return rows, data_log
 
 
 def _drop_exporters(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if (len(specification.drop_imp_exp) > 0) or (len(specification.drop_exp) > 0):
         exporter_drop_list = list(set(specification.drop_imp_exp + specification.drop_exp))
-        data_frame.drop(data_frame.loc[data_frame[meta_data.exp_var_name].isin(exporter_drop_list)].index, inplace=True)
+        rows = rows & _filter_mask(filter_cache, ('drop_exp', frozenset(exporter_drop_list)),
+                                   lambda: ~data_frame[meta_data.exp_var_name].isin(exporter_drop_list).values)
         data_log.exporters_dropped = str(exporter_drop_list)
     else:
         data_log.exporters_dropped = 'none'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.exporters_dropped = data_log.exporters_dropped + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('drop_exp: ' + data_log.exporters_dropped)
-    return data_frame, data_log
+        logger.info('drop_exp: %s', data_log.exporters_dropped)
+    return rows, data_log
 
 def _keep_importers(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if (len(specification.keep_imp_exp) > 0) or (len(specification.keep_imp) > 0):
         importer_keep_list = list(set(specification.keep_imp_exp + specification.keep_imp))
-        data_frame = data_frame.loc[data_frame[meta_data.imp_var_name].isin(importer_keep_list)]
+        rows = rows & _filter_mask(filter_cache, ('keep_imp', frozenset(importer_keep_list)),
+                                   lambda: data_frame[meta_data.imp_var_name].isin(importer_keep_list).values)
         data_log.importers_kept = str(importer_keep_list)
     else:
         data_log.importers_kept = 'all available'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.importers_kept = data_log.importers_kept + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('keep_imp: ' + data_log.importers_kept)
-    return data_frame, data_log
+        logger.info('keep_imp: %s', data_log.importers_kept)
+    return rows, data_log
 
 def _keep_exporters(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if (len(specification.keep_imp_exp) > 0) or (len(specification.keep_exp) > 0):
         exporter_keep_list = list(set(specification.keep_imp_exp + specification.keep_exp))
-        data_frame = data_frame.loc[data_frame[meta_data.exp_var_name].isin(exporter_keep_list)]
+        rows = rows & _filter_mask(filter_cache, ('keep_exp', frozenset(exporter_keep_list)),
+                                   lambda: data_frame[meta_data.exp_var_name].isin(exporter_keep_list).values)
         data_log.exporters_kept = str(exporter_keep_list)
     else:
         data_log.exporters_kept = 'all available'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.exporters_kept = data_log.exporters_kept + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('keep_exp: ' + data_log.exporters_kept)
-    return data_frame, data_log
+        logger.info('keep_exp: %s', data_log.exporters_kept)
+    return rows, data_log
 
 def _drop_years(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if len(specification.drop_years) > 0:
-        data_frame = data_frame.loc[data_frame[meta_data.year_var_name].isin(specification.drop_years)]
-        data_log.years_dropped = str(specification.dropped_years)
+        rows = rows & _filter_mask(filter_cache, ('drop_years', frozenset(specification.drop_years)),
+                                   lambda: ~data_frame[meta_data.year_var_name].isin(specification.drop_years).values)
+        data_log.years_dropped = str(specification.drop_years)
     else:
         data_log.years_dropped = 'none'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.years_dropped = data_log.years_dropped + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('drop_years: ' + data_log.years_dropped)
-    return data_frame, data_log
+        logger.info('drop_years: %s', data_log.years_dropped)
+    return rows, data_log
 
 def _keep_years(data_frame,
+                     rows,
                      specification,
                      meta_data,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if len(specification.keep_years) > 0:
-        data_frame = data_frame.loc[data_frame[meta_data.year_var_name].isin(specification.keep_years)]
+        rows = rows & _filter_mask(filter_cache, ('keep_years', frozenset(specification.keep_years)),
+                                   lambda: data_frame[meta_data.year_var_name].isin(specification.keep_years).values)
         data_log.years_kept = str(specification.keep_years)
     else:
         data_log.years_kept = 'all available'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.years_kept = data_log.years_kept + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('keep_years: ' + data_log.years_kept)
-    return data_frame, data_log
+        logger.info('keep_years: %s', data_log.years_kept)
+    return rows, data_log
 
 def _drop_missing(data_frame,
+                     rows,
+                     using_variables,
                      specification,
-                     data_log):
-    pre_drop_size = data_frame.shape
+                     data_log,
+                     filter_cache=None):
+    pre_drop_size = rows.sum()
     if specification.drop_missing is True:
-        data_frame = data_frame.loc[data_frame.notnull().all(axis = 1)]
+        for variable in set(using_variables):
+            rows = rows & _filter_mask(filter_cache, ('notnull', variable),
+                                       lambda: data_frame[variable].notnull().values)
         data_log.missing_dropped = 'yes'
     else:
         data_log.missing_dropped = 'no'
-    post_drop_size = data_frame.shape
-    dropped_dims = {'rows': pre_drop_size[0] - post_drop_size[0], 'columns': pre_drop_size[1] - post_drop_size[1]}
+    dropped_dims = {'rows': int(pre_drop_size - rows.sum()), 'columns': 0}
     data_log.missing_dropped = data_log.missing_dropped + ', Observations excluded by user: ' + str(dropped_dims)
     if specification.verbose is True:
-        print('drop_missing: ' + data_log.missing_dropped)
-    return data_frame, data_log
+        logger.info('drop_missing: %s', data_log.missing_dropped)
+    return rows, data_log
@@ -0,0 +1,132 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+
+#------------------------------------------------------------------------------------------#
+# This file contains the sparse design matrix used to pass fixed effects and covariates     #
+# through the estimation routines without creating dense copies of the dummy variables.     #
+#------------------------------------------------------------------------------------------#
+
+
+class _SparseDesign(object):
+    '''
+    A column-labeled design matrix stored in compressed sparse column (CSC) format. Fixed effect dummies are built
+    directly from integer category codes so that only one non-zero entry per observation and fixed effect category
+    is ever stored.
+    '''
+
+    def __init__(self, matrix, columns):
+        '''
+        :param matrix: (scipy.sparse matrix) An n x k matrix of regressors.
+        :param columns: (List[str]) The k column names.
+        '''
+        self.matrix = sparse.csc_matrix(matrix)
+        self.columns = list(columns)
+        if self.matrix.shape[1] != len(self.columns):
+            raise ValueError('The number of column names does not match the number of design matrix columns.')
+
+    @classmethod
+    def from_codes(cls, codes, columns):
+        '''
+        Create a set of dummy variables from integer category codes.
+        :param codes: (numpy.ndarray) An integer code for each observation. Negative codes (e.g. missing values) produce
+            rows of zeros.
+        :param columns: (List[str]) The column name for each category code.
+        :return: (_SparseDesign)
+        '''
+        codes = np.asarray(codes)
+        rows = np.flatnonzero(codes >= 0)
+        matrix = sparse.csc_matrix((np.ones(rows.size), (rows, codes[rows])), shape=(codes.size, len(columns)))
+        return cls(matrix, columns)
+
+    @classmethod
+    def from_data_frame(cls, data_frame):
+        '''
+        Create a design from the (dense) columns of a DataFrame.
+        :param data_frame: (Pandas.DataFrame) A DataFrame of numeric columns.
+        :return: (_SparseDesign)
+        '''
+        values = data_frame.values.astype(float)
+        return cls(sparse.csc_matrix(values), data_frame.columns)
+
+    @classmethod
+    def empty(cls, number_of_rows):
+        '''
+        Create a design with no columns.
+        :param number_of_rows: (int) The number of observations.
+        :return: (_SparseDesign)
+        '''
+        return cls(sparse.csc_matrix((number_of_rows, 0)), [])
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def hstack(self, other):
+        '''
+        Append the columns of another design.
+        :param other: (_SparseDesign) A design with the same number of rows.
+        :return: (_SparseDesign)
+        '''
+        return _SparseDesign(sparse.hstack([self.matrix, other.matrix], format='csc'), self.columns + other.columns)
+
+    def select_columns(self, columns):
+        '''
+        :param columns: (List[str]) Names of the columns to keep, in the order in which they should appear.
+        :return: (_SparseDesign)
+        '''
+        positions = {name: number for number, name in enumerate(self.columns)}
+        return _SparseDesign(self.matrix[:, [positions[name] for name in columns]], columns)
+
+    def drop_columns(self, columns):
+        '''
+        :param columns: (List[str]) Names of the columns to remove.
+        :return: (_SparseDesign)
+        '''
+        drop = set(columns)
+        return self.select_columns([name for name in self.columns if name not in drop])
+
+    def select_rows(self, rows):
+        '''
+        :param rows: (numpy.ndarray) A boolean mask or integer positions of the observations to keep.
+        :return: (_SparseDesign)
+        '''
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return _SparseDesign(self.matrix[rows, :], self.columns)
+
+    def column(self, name):
+        '''
+        :param name: (str) A column name.
+        :return: (numpy.ndarray) A dense copy of the column.
+        '''
+        return self.matrix[:, self.columns.index(name)].toarray().ravel()
+
+    def gram(self):
+        '''
+        :return: (numpy.ndarray) The dense k x k cross-product matrix X'X.
+        '''
+        return np.asarray((self.matrix.T @ self.matrix).todense())
+
+    def to_data_frame(self, index=None, dtype=float):
+        '''
+        :param index: (optional) An index for the returned DataFrame.
+        :param dtype: (optional) The data type of the columns (e.g. numpy.uint8 for dummy variables).
+        :return: (Pandas.DataFrame) A DataFrame with sparse columns.
+        '''
+        return pd.DataFrame.sparse.from_spmatrix(self.matrix.astype(dtype, copy=False), index=index,
+                                                 columns=self.columns)
+
+    def to_dense_data_frame(self, index=None, dtype=float):
+        '''
+        :param index: (optional) An index for the returned DataFrame.
+        :param dtype: (optional) The data type of the dense matrix. The conversion is applied to the non-zero entries
+            before densifying, so no dense float64 copy is created for other types.
+        :return: (Pandas.DataFrame) A dense DataFrame, as required by statsmodels.
+        '''
+        return pd.DataFrame(self.matrix.astype(dtype, copy=False).toarray(), index=index, columns=self.columns)
@@ -0,0 +1,142 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+from ._convergence_trace import TRACE_COLUMNS
+
+#-------------------------------------------------------------------------------------------#
+# This file contains the instrumentation of the stages of an estimation (e.g. slicing, the  #
+# fixed effects, the pre-diagnostics, the fit, and the covariance), which records the wall  #
+# time, CPU time, and peak memory increase of each stage and, optionally, the convergence   #
+# of each IRLS iteration.                                                                   #
+#-------------------------------------------------------------------------------------------#
+
+STAGE_COLUMNS = ['Wall Time (seconds)', 'CPU Time (seconds)', 'Peak Memory Increase (MB)', 'Iterations']
+
+
+class _StageProfile(object):
+    '''
+    The stages of one regression (or of the preparation of the data for all regressions), in the order in which they
+    ran.
+    '''
+
+    def __init__(self, trace_memory: bool = False, trace_convergence: bool = False):
+        '''
+        :param trace_memory: (bool) If True, the peak memory increase of each stage is measured with tracemalloc,
+            which must be tracing (see _memory_tracing). Otherwise, it is not recorded.
+        :param trace_convergence: (bool) If True, the IRLS iterations of the fit are recorded (see
+            _iteration_monitor).
+        '''
+        self.trace_memory = trace_memory
+        self.trace_convergence = trace_convergence
+        self.records = []
+        self.current = None
+        self.iterations = []
+
+    def begin(self, name):
+        '''
+        Begin a stage, ending the current stage, if any.
+        :param name: (str) The name of the stage.
+        '''
+        self.end()
+        self.current = {'Stage': name}
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.current['start_memory'] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.current['start_wall'] = time.perf_counter()
+        self.current['start_cpu'] = time.process_time()
+
+    def end(self):
+        '''
+        End the current stage, if any, and record it.
+        '''
+        if self.current is None:
+            return
+        record = self.current
+        self.current = None
+        record['Wall Time (seconds)'] = time.perf_counter() - record.pop('start_wall')
+        record['CPU Time (seconds)'] = time.process_time() - record.pop('start_cpu')
+        if 'start_memory' in record:
+            record['Peak Memory Increase (MB)'] = (tracemalloc.get_traced_memory()[1]
+                                                   - record.pop('start_memory')) / 2 ** 20
+        self.records.append(record)
+
+    def set_iterations(self, iterations):
+        '''
+        Add the number of IRLS iterations to the most recent 'Fit' stage, which must have ended.
+        :param iterations: (int) The number of iterations.
+        '''
+        for record in reversed(self.records):
+            if record['Stage'] == 'Fit':
+                record['Iterations'] = iterations
+                return
+
+    def record_iteration(self, iteration, deviance, max_coefficient_change, elapsed_time):
+        '''
+        Record an IRLS iteration of the fit.
+        '''
+        self.iterations.append((iteration, deviance, max_coefficient_change, elapsed_time))
+
+    def trace_data_frame(self, key):
+        '''
+        :param key: (str) The key of the regression, as in results_dict.
+        :return: (Pandas.DataFrame) A row for each recorded iteration, indexed by key and iteration, with the columns
+            in TRACE_COLUMNS.
+        '''
+        data_frame = pd.DataFrame(self.iterations, columns=['Iteration'] + TRACE_COLUMNS).astype(
+            {column: float for column in TRACE_COLUMNS})
+        data_frame.index = pd.MultiIndex.from_arrays([[key] * data_frame.shape[0],
+                                                      data_frame.pop('Iteration').astype(int)],
+                                                     names=['Regression', 'Iteration'])
+        return data_frame
+
+    def to_data_frame(self, key):
+        '''
+        :param key: (str) The key of the regression, as in results_dict.
+        :return: (Pandas.DataFrame) A row for each stage, indexed by key and stage, with the columns in STAGE_COLUMNS.
+        '''
+        data_frame = pd.DataFrame(self.records, columns=['Stage'] + STAGE_COLUMNS).astype({column: float for column
+                                                                                           in STAGE_COLUMNS})
+        data_frame.index = pd.MultiIndex.from_arrays([[key] * data_frame.shape[0], data_frame.pop('Stage')],
+                                                     names=['Regression', 'Stage'])
+        return data_frame
+
+
+def _begin_stage(profile, name):
+    '''
+    Begin a stage of profile, ending the current stage.
+    :param profile: (_StageProfile or None) The profile of the regression. If None, nothing is recorded.
+    :param name: (str) The name of the stage.
+    '''
+    if profile is not None:
+        profile.begin(name)
+
+
+def _end_stage(profile):
+    '''
+    End the current stage of profile, if any.
+    :param profile: (_StageProfile or None) The profile of the regression. If None, nothing is recorded.
+    '''
+    if profile is not None:
+        profile.end()
+
+
+@contextmanager
+def _memory_tracing(trace_memory):
+    '''
+    Trace memory allocations with tracemalloc for the duration of the context, if requested and not already tracing.
+    :param trace_memory: (bool) Whether memory is to be traced.
+    '''
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
@@ -0,0 +1,96 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
+from ._hdfe import _FixedEffectAbsorber, _recode
+
+#-------------------------------------------------------------------------------------------#
+# This file contains the construction of IRLS starting values from starting values for the  #
+# covariates, e.g. the estimates from a previous sector, a pooled estimation, or a log-      #
+# linear pre-fit. The fixed effects differ between samples, so they are computed for the    #
+# sample from the covariates.                                                               #
+#-------------------------------------------------------------------------------------------#
+
+
+def _starting_mu(y, offset, codes_list, sweeps: int = 10):
+    '''
+    Fitted values from starting covariates and the fixed effects that maximize the Poisson likelihood given them.
+    Given the covariates, the first order condition for each fixed effect is that the fitted values of its
+    observations sum to their observed values, so the fixed effects are found by iterative proportional fitting: each
+    set of fixed effects is rescaled in turn to match its sums.
+    :param y: (numpy.ndarray) The dependent variable.
+    :param offset: (numpy.ndarray) The covariates times their starting values.
+    :param codes_list: (List[numpy.ndarray]) Integer category codes for each set of fixed effects. Observations with
+        a code of -1 (e.g. omitted fixed effects) are not adjusted by that set.
+    :param sweeps: (int) The number of passes over the sets of fixed effects.
+    :return: (numpy.ndarray) Starting fitted values.
+    '''
+    eta = offset - np.max(offset, initial=0)
+    if len(codes_list) == 0:
+        # Without fixed effects, only the level is adjusted
+        return np.exp(eta + np.log(np.sum(y) / np.sum(np.exp(eta))))
+    for sweep in range(sweeps):
+        for codes in codes_list:
+            included = codes >= 0
+            included_codes = codes[included]
+            observed = np.bincount(included_codes, weights=y[included])
+            fitted = np.bincount(included_codes, weights=np.exp(eta[included]))
+            # Categories without positive values are left unchanged rather than sent to zero
+            adjustment = np.where((observed > 0) & (fitted > 0), np.log(np.where(observed > 0, observed, 1)
+                                                                        / np.where(fitted > 0, fitted, 1)), 0)
+            eta[included] += adjustment[included_codes]
+    return np.exp(eta)
+
+
+def _starting_params(exog, mu):
+    '''
+    Starting values for all columns of a design (covariates and fixed effect dummies) whose linear predictor is
+    closest to log(mu), by weighted least squares with weights mu. If log(mu) is in the column space of the design,
+    the linear predictor equals it.
+    :param exog: (Pandas.DataFrame) The design.
+    :param mu: (numpy.ndarray) Starting fitted values.
+    :return: (numpy.ndarray) Starting values for the columns of exog.
+    '''
+    x = exog.values.astype(float, copy=False)
+    weighted_exog = x * mu[:, None]
+    return cho_solve(cho_factor(weighted_exog.T @ x), weighted_exog.T @ np.log(mu))
+
+
+def _covariate_offset(covariates, start_params):
+    '''
+    The covariates times their starting values. Covariates without a starting value start at zero.
+    :param covariates: (Pandas.DataFrame) The covariates.
+    :param start_params: (Pandas.Series) Starting values indexed by covariate name.
+    :return: (numpy.ndarray)
+    '''
+    values = start_params.reindex(covariates.columns).fillna(0).values.astype(float)
+    return covariates.values.astype(float, copy=False) @ values
+
+
+def _loglinear_params(y, covariates, codes_list):
+    '''
+    Starting values for the covariates from a log-linear pre-fit: an OLS regression of log(y) on the covariates and
+    fixed effects for the observations with positive y, with the fixed effects partialled out by alternating
+    projections. The regression is the traditional log-linear gravity model, whose estimates are typically close to
+    the PPML estimates and much cheaper to compute.
+    :param y: (numpy.ndarray) The dependent variable.
+    :param covariates: (Pandas.DataFrame) The covariates.
+    :param codes_list: (List[numpy.ndarray]) Integer category codes for each set of fixed effects, with -1 for
+        observations not affected by a set.
+    :return: (Pandas.Series) Starting values indexed by covariate name. Covariates that are collinear among the
+        positive observations get the minimum norm solution.
+    '''
+    positive = y > 0
+    positive_codes_list = [_recode(codes[positive]) for codes in codes_list]
+    if len(positive_codes_list) == 0:
+        # A constant is partialled out instead
+        positive_codes_list = [np.zeros(positive.sum(), dtype=np.int64)]
+    absorber = _FixedEffectAbsorber(positive_codes_list, tolerance=1e-6)
+    absorber.set_weights(np.ones(positive.sum()))
+    values = np.column_stack([np.log(y[positive]), covariates.values[positive].astype(float)])
+    values, passes = absorber.demean(values)
+    coefficients = np.linalg.lstsq(values[:, 1:], values[:, 0], rcond=None)[0]
+    return pd.Series(coefficients, index=covariates.columns)
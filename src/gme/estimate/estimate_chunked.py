@@ -0,0 +1,635 @@
+__author__ = "USITC Gravity Modeling Group"
+__project__ = "gme.estimate"
+__created__ = "10-18-2026"
+__all__ = ['estimate_chunked']
+
+import glob
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+from scipy.sparse.csgraph import connected_components
+from typing import List, Union, Dict, Tuple
+from ._ppml_results import _PPMLResults, _poisson_deviance, _poisson_statistics
+from ._ppml_estimation_and_diagnostics import _fixed_effect_codes, _fixed_effect_index, _fixed_effects_to_drop, \
+    _collinear_positions
+
+#-------------------------------------------------------------------------------------------#
+# This file contains an out-of-core PPML estimator. Fixed effects are absorbed as in the    #
+# HDFE estimator (engine='hdfe'), with each projection making one pass over the chunks and  #
+# keeping only one value per category and covariate, so only one chunk, the fixed effect    #
+# components, and k x k cross products of the covariates are held in memory.                #
+#-------------------------------------------------------------------------------------------#
+
+
+def estimate_chunked(chunks,
+                     lhs_var: str,
+                     rhs_var: List[str],
+                     fixed_effects: List[Union[str, List[str]]] = [],
+                     omit_fixed_effect: Dict[Union[str, Tuple[str]], List[Union[str, Tuple[str]]]] = {},
+                     std_errors: str = 'HC1',
+                     iteration_limit: int = 1000,
+                     tolerance: float = 1e-8,
+                     cache_directory: str = None):
+    '''
+    Estimate a PPML model from data that are read one chunk at a time, for panels too large to hold in memory as a
+    single DataFrame. The fixed effects are absorbed as for EstimationModel with engine='hdfe': each IRLS iteration
+    partials them out of the covariates by alternating projections, with one pass over the chunks per projection, and
+    solves for the covariates from their k x k weighted cross product. Memory use is bounded by the size of a chunk
+    plus, for each fixed effect category, one value per covariate, so no matrix with a row or column per fixed effect
+    is formed. The pre-diagnostics of EstimationModel.estimate with engine='hdfe' (fixed effects without positive
+    trade, user-omitted fixed effects, and perfect collinearity) are reproduced from statistics accumulated over the
+    chunks, so the estimates match an in-memory estimation of the same data.
+
+    The chunks are read once. Only the columns used for estimation are read (or, for pickles, kept), and each chunk's
+    dependent variable, covariates, and fixed effect category codes are saved to a temporary cache on disk, which the
+    later passes read.
+
+    Args:
+        chunks: Union[str, List[str], Callable, Iterable[Pandas.DataFrame]]
+            The data. Can be a glob pattern (e.g. 'panel/part_*.parquet') or a list of file paths, which are read with
+            pandas according to their extension (.csv, .parquet, .pkl, or .pickle); a function that returns an
+            iterable of DataFrames; or an iterable (e.g. a list or a generator) of DataFrames.
+        lhs_var: str
+            The dependent (trade) variable.
+        rhs_var: List[str]
+            The independent variables.
+        fixed_effects: (optional) List[Union[str,List[str]]]
+            Fixed effects to include, as for EstimationModel.
+        omit_fixed_effect: (optional) Dict[Union[str,Tuple[str]]:List[str, Tuple[str]]]
+            Fixed effects to omit, as for EstimationModel.
+        std_errors: (optional) str
+            'nonrobust', 'HC0', or 'HC1' (the default). As for EstimationModel, HC1 is computed without a degrees of
+            freedom correction.
+        iteration_limit: (optional) int
+            Maximum number of IRLS iterations. Default is 1000.
+        tolerance: (optional) float
+            Convergence tolerance for the relative change in the deviance, as for engine='hdfe'. Default is 1e-8.
+        cache_directory: (optional) str
+            Directory in which the temporary cache of the chunks is created. Default is the system's temporary
+            directory. The cache is removed when the estimation ends.
+
+    Returns: (SlimResults, Pandas.Series)
+        1. A SlimResults object with the estimates of the covariates (params, bse, pvalues, nobs, llf, aic, bic, etc.).
+            As for engine='hdfe', the fixed effects are absorbed rather than estimated, and fitted values are not
+            retained.
+        2. Diagnostic information in the same form as one column of EstimationModel.ppml_diagnostics.
+
+    Examples:
+        >>> results, diagnostics = estimate_chunked('panel/part_*.parquet',
+        ...                                         lhs_var='trade_value',
+        ...                                         rhs_var=['log_distance', 'agree_pta'],
+        ...                                         fixed_effects=[['importer', 'year'], ['exporter', 'year']])
+        >>> results.params
+    '''
+    start_time = time.time()
+    if std_errors not in ['nonrobust', 'HC0', 'HC1']:
+        raise ValueError("estimate_chunked supports std_errors of 'nonrobust', 'HC0', or 'HC1'.")
+    rhs_var = list(rhs_var)
+    fixed_effect_variables = []
+    for item in fixed_effects:
+        for variable in (item if type(item) is list else [item]):
+            if variable not in fixed_effect_variables:
+                fixed_effect_variables.append(variable)
+    using_variables = [lhs_var] + [var for var in rhs_var + fixed_effect_variables if var != lhs_var]
+
+    with tempfile.TemporaryDirectory(dir=cache_directory) as directory:
+        # The only pass over the data: each chunk is cached with its own category codes, and the fixed effect
+        # categories of all chunks are collected
+        cache = _ChunkCache(directory)
+        set_labels = None
+        for chunk in _read_chunks(chunks, using_variables):
+            chunk_codes = _fixed_effect_codes(chunk, fixed_effects)
+            if set_labels is None:
+                set_labels = [pd.DataFrame() for _ in chunk_codes]
+            codes = np.full((chunk.shape[0], len(chunk_codes)), -1, dtype=np.int64)
+            for set_number, (set_codes, columns, labels) in enumerate(chunk_codes):
+                codes[:, set_number] = set_codes
+                present = np.unique(set_codes[set_codes >= 0])
+                labels = labels.iloc[present].assign(column=[columns[code] for code in present])
+                set_labels[set_number] = pd.concat([set_labels[set_number], labels]).drop_duplicates('column')
+            cache.append(chunk[lhs_var].values.astype(float), chunk[rhs_var].values.astype(float), codes,
+                         [columns for _, columns, _ in chunk_codes])
+        if set_labels is None:
+            raise ValueError('chunks did not contain any data.')
+        set_columns, fixed_effect_codes = _global_fixed_effects(set_labels)
+        number_of_groups = [len(columns) for columns in set_columns]
+
+        # User-specified fixed effects are omitted by giving their observations no category in that set
+        user_fe = _fixed_effects_to_drop(_fixed_effect_index(fixed_effect_codes), omit_fixed_effect)
+        omitted_groups = [np.isin(columns, user_fe) for columns in set_columns]
+
+        # The cached codes are numbered as for the full data, and the statistics of the trade-contingent check are
+        # accumulated
+        cache.renumber(lambda codes, chunk_columns: _global_codes(codes, chunk_columns, set_columns, omitted_groups))
+        statistics = _ChunkStatistics(len(rhs_var), number_of_groups)
+        for lhs_values, covariates, codes in cache:
+            statistics.add(lhs_values, covariates, codes)
+
+        # Fixed effect categories without positive trade are perfectly collinear with zero trade flows. Their
+        # observations are dropped.
+        problem_variable_list = []
+        no_trade_groups = []
+        for columns, positive_counts, present in zip(set_columns, statistics.positive_counts, statistics.present):
+            no_trade = present & (positive_counts == 0)
+            problem_variable_list.extend([columns[code] for code in np.flatnonzero(no_trade)])
+            # A final False is selected by the negative codes of observations without a category
+            no_trade_groups.append(np.append(no_trade, False))
+
+        # Covariates that are collinear with the fixed effects when trade is positive are kept if their mean when
+        # trade is positive lies strictly between their minimum and maximum when trade is zero
+        excluded_columns_list = _chunked_collinear_columns(cache, rhs_var, list(range(len(rhs_var))),
+                                                           number_of_groups, lambda y: (y > 0).astype(float))
+        rhs_columns = list(rhs_var)
+        binary_positions = []
+        number_of_values = statistics.number_of_values()
+        for col in excluded_columns_list:
+            position = rhs_var.index(col)
+            mean_value = statistics.positive_sum[position] / max(statistics.positive_count, 1)
+            if not (statistics.zero_min[position] < mean_value and mean_value < statistics.zero_max[position]):
+                problem_variable_list.append(col)
+                rhs_columns.remove(col)
+                if number_of_values[position] == 2:
+                    binary_positions.append(position)
+
+        def kept_observations(y, covariates, codes):
+            dropped = np.zeros(y.shape[0], dtype=bool)
+            for set_number, no_trade in enumerate(no_trade_groups):
+                dropped |= no_trade[codes[:, set_number]]
+            for position in binary_positions:
+                dropped |= covariates[:, position] == 1
+            return ~(dropped & (y == 0))
+        cache.subset(kept_observations, [rhs_var.index(col) for col in rhs_columns])
+
+        # Covariates that are perfectly collinear with the fixed effects or each other
+        collinear_fe = _chunked_collinear_columns(cache, rhs_columns, list(range(len(rhs_columns))),
+                                                  number_of_groups, np.ones_like)
+        positions = [position for position, col in enumerate(rhs_columns) if col not in collinear_fe]
+        estimation_columns = [rhs_columns[position] for position in positions]
+
+        rank = len(estimation_columns) + _chunked_fixed_effect_rank(cache, number_of_groups)
+        results, zero_trade_minimum = _fit_ppml_chunked(cache, positions, number_of_groups,
+                                                        cov_type=std_errors,
+                                                        max_iterations=iteration_limit,
+                                                        tolerance=tolerance)
+
+    results = _PPMLResults(params=pd.Series(results['params'], index=estimation_columns),
+                           cov_params=results['cov_params'],
+                           nobs=results['nobs'],
+                           llf=results['llf'],
+                           deviance=results['deviance'],
+                           pearson_chi2=results['pearson_chi2'],
+                           rank=rank,
+                           cov_type=std_errors,
+                           iterations=results['iterations'],
+                           model='PPML-HDFE (chunked)',
+                           yname=lhs_var)
+
+    # Diagnostics, as reported by EstimationModel.estimate
+    overfit = 'Yes' if zero_trade_minimum < statistics.positive_minimum * 1e-6 else 'No'
+    diagnostics = pd.Series({'Overfit Warning': overfit,
+                             'Number of Regressors Dropped': len(problem_variable_list + user_fe + collinear_fe)})
+    diagnostics.at['Regressors with Zero Trade'] = problem_variable_list
+    diagnostics.at['Regressors from User'] = user_fe
+    diagnostics.at['Regressors Perfectly Collinear'] = collinear_fe
+    diagnostics.at['Completion Time'] = str(round((time.time() - start_time) / 60, 2)) + ' minutes'
+    return results, diagnostics
+
+
+def _fit_ppml_chunked(cache, positions, number_of_groups, cov_type='HC1', max_iterations=1000, tolerance=1e-8):
+    '''
+    Estimate a PPML model with absorbed fixed effects from cached chunks by iteratively reweighted least squares, as
+    _fit_ppml_hdfe does for data in memory. The linear predictor of a chunk is recomputed from the covariate estimates
+    and the estimated fixed effects of its categories, so nothing with a row per observation is kept between passes.
+    :param cache: (_ChunkCache) The chunks.
+    :param positions: (List[int]) The positions of the estimated covariates among the cached covariates.
+    :param number_of_groups: (List[int]) The number of categories in each set of fixed effects.
+    :param cov_type: (str) 'nonrobust', 'HC0', or 'HC1'.
+    :param max_iterations: (int) Maximum number of IRLS iterations.
+    :param tolerance: (float) Convergence tolerance for the relative change in the deviance.
+    :return: (Dict, float) The estimates, covariance, fit statistics, number of observations, and number of iterations,
+        and the smallest fitted value of a zero trade observation.
+    '''
+    number_of_covariates = len(positions)
+    nobs = 0
+    lhs_sum = 0
+    for y, covariates, codes in cache:
+        nobs += y.shape[0]
+        lhs_sum += y.sum()
+    mean_lhs = lhs_sum / nobs
+
+    # The fixed effects of each set, with a final zero for observations without a category
+    params = None
+    effects = [np.zeros(groups + 1) for groups in number_of_groups]
+
+    def linear_predictor(y, covariates, codes):
+        # Initial values as in ppmlhdfe
+        if params is None:
+            return np.log((y + mean_lhs) / 2)
+        eta = covariates[:, positions] @ params
+        for set_number, effect in enumerate(effects):
+            eta += effect[codes[:, set_number]]
+        return eta
+
+    def working_values(y, covariates, codes):
+        eta = linear_predictor(y, covariates, codes)
+        mu = np.exp(eta)
+        return np.column_stack([eta + (y - mu) / mu, covariates[:, positions]]), mu
+
+    # The fixed effect components of the working dependent variable and covariates carry over between iterations, so
+    # the projections resume from the previous solution
+    absorber = _ChunkedAbsorber(cache, number_of_groups, number_of_covariates + 1,
+                                tolerance=min(1e-10, tolerance * 1e-2))
+    deviance = np.inf
+    for iteration in range(1, max_iterations + 1):
+        absorber.demean(working_values)
+        cross_product = np.zeros((number_of_covariates, number_of_covariates))
+        weighted_working_endog = np.zeros(number_of_covariates)
+        for y, covariates, codes in cache:
+            values, mu = working_values(y, covariates, codes)
+            demeaned = absorber.residuals(values, codes)
+            cross_product += (demeaned[:, 1:].T * mu) @ demeaned[:, 1:]
+            weighted_working_endog += demeaned[:, 1:].T @ (mu * demeaned[:, 0])
+        params = np.linalg.solve(cross_product, weighted_working_endog)
+        # The linear predictor is the working dependent variable less the residual of the weighted projection, which
+        # is the covariates times their estimates plus the components of the working dependent variable less those of
+        # the covariates times their estimates
+        effects = [component[:, 0] - component[:, 1:] @ params for component in absorber.components]
+        previous_deviance = deviance
+        deviance = 0
+        for y, covariates, codes in cache:
+            deviance += _poisson_deviance(y, np.exp(linear_predictor(y, covariates, codes)))
+        if np.abs(deviance - previous_deviance) / (np.abs(deviance) + 0.1) < tolerance:
+            break
+
+    # Covariance of the covariates, using the covariates demeaned at the final weights
+    def covariate_values(y, covariates, codes):
+        return covariates[:, positions], np.exp(linear_predictor(y, covariates, codes))
+    covariate_absorber = _ChunkedAbsorber(cache, number_of_groups, number_of_covariates, tolerance=absorber.tolerance)
+    covariate_absorber.components = [component[:, 1:].copy() for component in absorber.components]
+    covariate_absorber.demean(covariate_values)
+    bread = np.zeros((number_of_covariates, number_of_covariates))
+    meat = np.zeros((number_of_covariates, number_of_covariates))
+    llf = deviance = pearson_chi2 = 0
+    zero_trade_minimum = np.inf
+    for y, covariates, codes in cache:
+        values, mu = covariate_values(y, covariates, codes)
+        demeaned = covariate_absorber.residuals(values, codes)
+        bread += (demeaned.T * mu) @ demeaned
+        scores = demeaned * (y - mu)[:, None]
+        meat += scores.T @ scores
+        chunk_llf, chunk_deviance, chunk_pearson_chi2 = _poisson_statistics(y, mu)
+        llf += chunk_llf
+        deviance += chunk_deviance
+        pearson_chi2 += chunk_pearson_chi2
+        zero_trade_minimum = min(zero_trade_minimum, np.min(mu[y == 0], initial=np.inf))
+    bread = np.linalg.inv(bread)
+    cov_params = bread if cov_type == 'nonrobust' else bread @ meat @ bread
+    return {'params': params, 'cov_params': cov_params, 'nobs': nobs, 'llf': llf, 'deviance': deviance,
+            'pearson_chi2': pearson_chi2, 'iterations': iteration}, zero_trade_minimum
+
+
+class _ChunkedAbsorber(object):
+    '''
+    Partials sets of fixed effects out of columns of chunked data by weighted alternating projections, as
+    _FixedEffectAbsorber does for data in memory. Rather than demeaned copies of the columns, which would be as large as
+    the data, it keeps the fixed effect component of each column for each category, so the demeaned values of a chunk
+    are its values less the components of its categories. Each projection is one pass over the chunks.
+    '''
+
+    def __init__(self, cache, number_of_groups, number_of_columns, tolerance: float = 1e-10,
+                 max_iterations: int = 10000):
+        '''
+        :param cache: (_ChunkCache) The chunks.
+        :param number_of_groups: (List[int]) The number of categories in each set of fixed effects.
+        :param number_of_columns: (int) The number of columns demeaned.
+        :param tolerance: (float) Convergence tolerance for the projections.
+        :param max_iterations: (int) Maximum number of passes through all sets of fixed effects.
+        '''
+        self.cache = cache
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        # A final row of zeros is selected by the negative codes of observations without a category
+        self.components = [np.zeros((groups + 1, number_of_columns)) for groups in number_of_groups]
+
+    def residuals(self, values, codes):
+        '''
+        :param values: (numpy.ndarray) The n x m values of a chunk. It is modified in place.
+        :param codes: (numpy.ndarray) The n x (number of sets) category codes of the chunk.
+        :return: (numpy.ndarray) The values less their fixed effect components.
+        '''
+        for set_number, component in enumerate(self.components):
+            values -= component[codes[:, set_number]]
+        return values
+
+    def demean(self, chunk_values):
+        '''
+        Update the fixed effect components until the projections converge, starting from the current components.
+        :param chunk_values: (Callable) Returns the n x m values and the n observation weights of a chunk from its
+            dependent variable, covariates, and category codes.
+        :return: (int) The number of passes through all sets of fixed effects.
+        '''
+        if len(self.components) == 0:
+            return 0
+        number_of_columns = self.components[0].shape[1]
+        group_weights = [np.zeros(component.shape[0] - 1) for component in self.components]
+        scale = np.ones(number_of_columns)
+        for y, covariates, codes in self.cache:
+            values, weights = chunk_values(y, covariates, codes)
+            scale = np.maximum(scale, np.max(np.abs(values), axis=0, initial=0))
+            for set_number, group_weight in enumerate(group_weights):
+                included = codes[:, set_number] >= 0
+                group_weight += np.bincount(codes[included, set_number], weights[included],
+                                            minlength=group_weight.shape[0])
+        group_weights = [np.where(group_weight > 0, group_weight, np.inf) for group_weight in group_weights]
+
+        for iteration in range(1, self.max_iterations + 1):
+            largest_update = 0
+            for set_number, (component, group_weight) in enumerate(zip(self.components, group_weights)):
+                group_sums = np.zeros((group_weight.shape[0], number_of_columns))
+                for y, covariates, codes in self.cache:
+                    values, weights = chunk_values(y, covariates, codes)
+                    residuals = self.residuals(values, codes)
+                    included = codes[:, set_number] >= 0
+                    set_codes, weights = codes[included, set_number], weights[included]
+                    for column in range(number_of_columns):
+                        group_sums[:, column] += np.bincount(set_codes, weights * residuals[included, column],
+                                                             minlength=group_weight.shape[0])
+                group_means = group_sums / group_weight[:, None]
+                component[:-1] += group_means
+                largest_update = max(largest_update, np.max(np.abs(group_means) / scale, initial=0))
+            # A single set of fixed effects is removed exactly in one pass
+            if len(self.components) == 1 or largest_update < self.tolerance:
+                break
+        return iteration
+
+
+class _ChunkCache(object):
+    '''
+    The dependent variable, covariates, and fixed effect category codes of each chunk, saved to a directory as numpy
+    arrays so that later passes neither re-read the original files nor rebuild the categories. Until they are
+    renumbered, the codes are those of the chunk, and the fixed effect column name of each code is saved with them.
+    '''
+
+    def __init__(self, directory):
+        '''
+        :param directory: (str) The directory in which the chunks are saved.
+        '''
+        self.directory = directory
+        self.paths = []
+
+    def append(self, lhs_values, covariates, codes, chunk_columns):
+        '''
+        :param lhs_values: (numpy.ndarray) The dependent variable of a chunk.
+        :param covariates: (numpy.ndarray) The n x k covariates of the chunk.
+        :param codes: (numpy.ndarray) The n x (number of sets) category codes of the chunk, from _fixed_effect_codes.
+        :param chunk_columns: (List[List[str]]) For each set of fixed effects, the column name of each code.
+        '''
+        path = os.path.join(self.directory, 'chunk_' + str(len(self.paths)) + '.npz')
+        # The column names are saved as unicode arrays, which are loaded without pickle
+        np.savez(path, lhs_values=lhs_values, covariates=covariates, codes=codes,
+                 **{'columns_' + str(set_number): np.array(columns, dtype=str)
+                    for set_number, columns in enumerate(chunk_columns)})
+        self.paths.append(path)
+
+    def __iter__(self):
+        for path in self.paths:
+            with np.load(path) as chunk:
+                yield chunk['lhs_values'], chunk['covariates'], chunk['codes']
+
+    def renumber(self, renumber_codes):
+        '''
+        Replace the category codes of each chunk, and remove the column names of its codes.
+        :param renumber_codes: (Callable) Returns the new codes of a chunk from its codes and, for each set of fixed
+            effects, the column name of each code.
+        '''
+        for path in self.paths:
+            with np.load(path) as chunk:
+                lhs_values, covariates, codes = chunk['lhs_values'], chunk['covariates'], chunk['codes']
+                chunk_columns = [chunk['columns_' + str(set_number)] for set_number in range(codes.shape[1])]
+            np.savez(path, lhs_values=lhs_values, covariates=covariates, codes=renumber_codes(codes, chunk_columns))
+
+    def subset(self, select_rows, columns):
+        '''
+        Keep some of the observations and covariates of each chunk.
+        :param select_rows: (Callable) Returns a boolean array of the observations to keep from a chunk's dependent
+            variable, covariates, and category codes.
+        :param columns: (List[int]) The positions of the covariates to keep.
+        '''
+        for path in self.paths:
+            with np.load(path) as chunk:
+                lhs_values, covariates, codes = chunk['lhs_values'], chunk['covariates'], chunk['codes']
+            keep = select_rows(lhs_values, covariates, codes)
+            np.savez(path, lhs_values=lhs_values[keep], covariates=covariates[keep][:, columns], codes=codes[keep])
+
+
+class _ChunkStatistics(object):
+    '''
+    Statistics accumulated over chunks for the trade-contingent checks: the number of observations with positive trade
+    in each fixed effect category, and for each covariate its sum when trade is positive, its minimum and maximum when
+    trade is zero, and (up to three of) its distinct values.
+    '''
+
+    def __init__(self, number_of_columns, number_of_groups):
+        '''
+        :param number_of_columns: (int) The number of covariates.
+        :param number_of_groups: (List[int]) The number of categories in each set of fixed effects.
+        '''
+        self.positive_counts = [np.zeros(groups, dtype=np.int64) for groups in number_of_groups]
+        self.present = [np.zeros(groups, dtype=bool) for groups in number_of_groups]
+        self.positive_sum = np.zeros(number_of_columns)
+        self.zero_min = np.full(number_of_columns, np.inf)
+        self.zero_max = np.full(number_of_columns, -np.inf)
+        self.positive_count = 0
+        self.positive_minimum = np.inf
+        self.distinct_values = [np.array([]) for _ in range(number_of_columns)]
+
+    def add(self, lhs_values, covariates, codes):
+        '''
+        :param lhs_values: (numpy.ndarray) The dependent variable of a chunk.
+        :param covariates: (numpy.ndarray) The n x k covariates of the chunk.
+        :param codes: (numpy.ndarray) The n x (number of sets) category codes of the chunk.
+        '''
+        positive_trade = lhs_values > 0
+        zero_trade = lhs_values == 0
+        for set_number, (positive_counts, present) in enumerate(zip(self.positive_counts, self.present)):
+            included = codes[:, set_number] >= 0
+            positive_counts += np.bincount(codes[included & positive_trade, set_number],
+                                           minlength=positive_counts.shape[0])
+            present |= np.bincount(codes[included, set_number], minlength=present.shape[0]) > 0
+        self.positive_sum += covariates[positive_trade].sum(axis=0)
+        self.zero_min = np.fmin(self.zero_min, np.min(covariates[zero_trade], axis=0, initial=np.inf))
+        self.zero_max = np.fmax(self.zero_max, np.max(covariates[zero_trade], axis=0, initial=-np.inf))
+        self.positive_count += int(positive_trade.sum())
+        self.positive_minimum = min(self.positive_minimum, np.min(lhs_values[positive_trade], initial=np.inf))
+        for column, distinct_values in enumerate(self.distinct_values):
+            self.distinct_values[column] = np.unique(np.append(distinct_values,
+                                                               np.unique(covariates[:, column])[:3]))[:3]
+
+    def number_of_values(self):
+        '''
+        :return: (List[int]) The number of distinct values of each covariate, up to three.
+        '''
+        return [len(distinct_values) for distinct_values in self.distinct_values]
+
+
+def _read_chunks(chunks, using_variables):
+    '''
+    Iterate over the chunks of data.
+    :param chunks: See estimate_chunked.
+    :param using_variables: (List[str]) The columns used for estimation.
+    :return: (Iterator[Pandas.DataFrame]) DataFrames with the using_variables, without missing values, and with a
+        default index.
+    '''
+    if isinstance(chunks, str):
+        paths = sorted(glob.glob(chunks))
+        if len(paths) == 0:
+            raise ValueError('No files match ' + chunks + '.')
+        chunks = paths
+    if callable(chunks):
+        chunks = chunks()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = _read_file(chunk, using_variables)
+        yield chunk[using_variables].dropna().reset_index(drop=True)
+
+
+def _read_file(path, using_variables):
+    '''
+    :param path: (str) A .csv, .parquet, .pkl, or .pickle file.
+    :param using_variables: (List[str]) The columns to read.
+    :return: (Pandas.DataFrame) The using_variables of the file.
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(path, usecols=using_variables)
+    if extension == '.parquet':
+        return pd.read_parquet(path, columns=using_variables)
+    if extension in ['.pkl', '.pickle']:
+        # A pickle is loaded whole, so the other columns are released as soon as it is read
+        return pd.read_pickle(path)[using_variables]
+    raise ValueError('Unsupported file type: ' + path + '. Files must be .csv, .parquet, .pkl, or .pickle.')
+
+
+def _global_fixed_effects(set_labels):
+    '''
+    Order the fixed effect categories found in all chunks as they would be ordered for the full data.
+    :param set_labels: (List[Pandas.DataFrame]) For each set of fixed effects, the categories found in any chunk, with
+        a 'column' column containing the fixed effect column name.
+    :return: (List[List[str]], List[Tuple[numpy.ndarray, List[str], Pandas.DataFrame]]) The column names of each set
+        and, for use with _fixed_effect_index, the labels of each set in the form returned by _fixed_effect_codes.
+    '''
+    set_columns = []
+    fixed_effect_codes = []
+    for labels in set_labels:
+        variables = [column for column in labels.columns if column != 'column']
+        # Single variable categories are sorted by value and interactions by their concatenated (string) categories
+        labels = labels.sort_values(variables[0] if len(variables) == 1 else 'column').reset_index(drop=True)
+        columns = labels['column'].tolist()
+        set_columns.append(columns)
+        fixed_effect_codes.append((np.arange(len(columns)), columns, labels[variables]))
+    return set_columns, fixed_effect_codes
+
+
+def _global_codes(codes, chunk_columns, set_columns, omitted_groups):
+    '''
+    The category codes of a chunk in each set of fixed effects, numbered as for the full data.
+    :param codes: (numpy.ndarray) The n x (number of sets) category codes of the chunk, numbered for the chunk.
+    :param chunk_columns: (List[numpy.ndarray]) For each set of fixed effects, the column name of each of the chunk's
+        codes.
+    :param set_columns: (List[List[str]]) The column names of each set of fixed effects for the full data.
+    :param omitted_groups: (List[numpy.ndarray]) For each set of fixed effects, whether each category is omitted by
+        the user.
+    :return: (numpy.ndarray) An n x (number of sets) array of codes, which are -1 for observations without a category
+        or with an omitted category.
+    '''
+    global_codes = np.full(codes.shape, -1, dtype=np.int64)
+    for set_number, (columns, global_columns, omitted) in enumerate(zip(chunk_columns, set_columns, omitted_groups)):
+        code_map = pd.Index(global_columns).get_indexer(columns)
+        code_map = np.append(np.where(omitted[code_map], -1, code_map), -1)
+        global_codes[:, set_number] = code_map[codes[:, set_number]]
+    return global_codes
+
+
+def _chunked_collinear_columns(cache, columns, positions, number_of_groups, weight_function, tolerance_level=1e-6):
+    '''
+    Identify covariates that are collinear with the absorbed fixed effects or with preceding covariates, as
+    _absorbed_collinear_columns does for data in memory.
+    :param cache: (_ChunkCache) The chunks.
+    :param columns: (List[str]) The names of the cached covariates.
+    :param positions: (List[int]) The positions of the covariates checked.
+    :param number_of_groups: (List[int]) The number of categories in each set of fixed effects.
+    :param weight_function: (Callable) Returns the weight of each observation from the dependent variable. A weight of
+        zero excludes an observation from the check.
+    :param tolerance_level: (float) Columns are collinear if the norm of their demeaned, orthogonalized component is
+        less than tolerance_level times their original norm.
+    :return: (List[str]) Names of the collinear columns.
+    '''
+    if len(positions) == 0:
+        return []
+    sums_of_squares = np.zeros(len(positions))
+    for y, covariates, codes in cache:
+        sums_of_squares += weight_function(y) @ covariates[:, positions] ** 2
+    norms = np.sqrt(sums_of_squares)
+    norms[norms == 0] = 1
+
+    def normalized_values(y, covariates, codes):
+        return covariates[:, positions] / norms, weight_function(y)
+    absorber = _ChunkedAbsorber(cache, number_of_groups, len(positions))
+    absorber.demean(normalized_values)
+    gram = np.zeros((len(positions), len(positions)))
+    for y, covariates, codes in cache:
+        values, weights = normalized_values(y, covariates, codes)
+        demeaned = absorber.residuals(values, codes)
+        gram += (demeaned.T * weights) @ demeaned
+    return [columns[positions[position]] for position in _collinear_positions(gram, tolerance_level)]
+
+
+def _chunked_fixed_effect_rank(cache, number_of_groups):
+    '''
+    The number of linearly independent fixed effect dummies, as computed by _fixed_effect_rank for data in memory. The
+    connected components of the graph linking the categories of the first two sets are merged chunk by chunk, with
+    each category linked to a representative of its component so far.
+    :param cache: (_ChunkCache) The chunks.
+    :param number_of_groups: (List[int]) The number of categories in each set of fixed effects.
+    :return: (int)
+    '''
+    if len(number_of_groups) == 0:
+        return 0
+    present = [np.zeros(groups, dtype=bool) for groups in number_of_groups]
+    first_size = number_of_groups[0]
+    nodes = first_size + (number_of_groups[1] if len(number_of_groups) > 1 else 0)
+    representatives = np.arange(nodes)
+    linked_nodes = np.zeros(nodes, dtype=bool)
+    anchored_nodes = np.zeros(nodes, dtype=bool)
+    for y, covariates, codes in cache:
+        for set_number, set_present in enumerate(present):
+            set_present[codes[codes[:, set_number] >= 0, set_number]] = True
+        if len(number_of_groups) > 1:
+            first, second = codes[:, 0], codes[:, 1]
+            both = (first >= 0) & (second >= 0)
+            rows = np.concatenate([first[both], np.arange(nodes)])
+            columns = np.concatenate([first_size + second[both], representatives])
+            graph = sparse.csr_matrix((np.ones(rows.size), (rows, columns)), shape=(nodes, nodes))
+            _, labels = connected_components(graph, directed=False)
+            component_representatives = np.empty(labels.max() + 1, dtype=np.int64)
+            component_representatives[labels] = np.arange(nodes)
+            representatives = component_representatives[labels]
+            linked_nodes[first[both]] = True
+            anchored_nodes[first[(first >= 0) & (second < 0)]] = True
+            anchored_nodes[first_size + second[(second >= 0) & (first < 0)]] = True
+    counts = [int(set_present.sum()) for set_present in present]
+    rank = counts[0]
+    if len(number_of_groups) > 1:
+        # Only components linked by at least one observation are redundant, unless an observation in the component
+        # lacks a category from one of the two sets
+        linked = np.zeros(nodes, dtype=bool)
+        linked[representatives[linked_nodes]] = True
+        anchored = np.zeros(nodes, dtype=bool)
+        anchored[representatives[anchored_nodes]] = True
+        rank += counts[1] - int(np.sum(linked & ~anchored))
+        for counts_j in counts[2:]:
+            rank += counts_j - 1
+    return rank
@@ -0,0 +1,75 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+import gme
+
+# The covariates of the models estimated by the tests
+RHS_VAR = ['log_distance', 'agree_pta', 'contiguity']
+
+
+def simulate_panel(number_of_countries=10, years=(2010, 2011, 2012), sectors=None, seed=0):
+    '''
+    Simulate a deterministic panel of bilateral trade from a PPML model with importer and exporter effects, with a
+    share of the flows set to zero.
+    '''
+    rng = np.random.default_rng(seed)
+    countries = ['C' + str(number).zfill(2) for number in range(number_of_countries)]
+    rows = [(importer, exporter, year, sector) for year in years for importer in countries for exporter in countries
+            for sector in (sectors or [None]) if importer != exporter]
+    panel = pd.DataFrame(rows, columns=['importer', 'exporter', 'year', 'sector'])
+    if sectors is None:
+        panel = panel.drop(columns='sector')
+    number_of_observations = panel.shape[0]
+    panel['pair'] = panel['importer'] + panel['exporter']
+    panel['log_distance'] = rng.normal(8, 1, number_of_observations)
+    panel['agree_pta'] = (rng.random(number_of_observations) < 0.3).astype(float)
+    panel['contiguity'] = (rng.random(number_of_observations) < 0.1).astype(float)
+    importer_effect = rng.normal(0, 1, number_of_countries)
+    exporter_effect = rng.normal(0, 1, number_of_countries)
+    linear_predictor = (3 - 0.8 * (panel['log_distance'].values - 8) + 0.4 * panel['agree_pta'].values
+                        + 0.3 * panel['contiguity'].values + importer_effect[pd.factorize(panel['importer'])[0]]
+                        + exporter_effect[pd.factorize(panel['exporter'])[0]])
+    panel['trade_value'] = rng.poisson(np.exp(linear_predictor)).astype(float)
+    panel.loc[rng.random(number_of_observations) < 0.2, 'trade_value'] = 0
+    return panel
+
+
+@pytest.fixture(scope='session')
+def panel():
+    return simulate_panel()
+
+
+@pytest.fixture(scope='session')
+def estimation_data(panel):
+    return gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value')
+
+
+@pytest.fixture(scope='session')
+def sector_data():
+    return gme.EstimationData(simulate_panel(sectors=['a', 'b', 'c']), imp_var_name='importer',
+                              exp_var_name='exporter', year_var_name='year', trade_var_name='trade_value',
+                              sector_var_name='sector')
+
+
+@pytest.fixture(scope='session')
+def estimate(estimation_data):
+    '''
+    A function that estimates a model of trade_value on RHS_VAR and returns the results of the full sample.
+    '''
+    def estimate_model(fixed_effects=(['importer', 'year'], ['exporter', 'year']), data=None, **model_arguments):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = gme.EstimationModel(estimation_data if data is None else data, lhs_var='trade_value',
+                                        rhs_var=RHS_VAR, fixed_effects=list(fixed_effects), **model_arguments)
+            return model.estimate()['all']
+    return estimate_model
+
+
+def assert_same_estimates(results, reference, rtol=1e-6):
+    '''
+    Check that the estimates and standard errors of RHS_VAR are the same as those of a reference estimation.
+    '''
+    np.testing.assert_allclose(results.params[RHS_VAR].values, reference.params[RHS_VAR].values, rtol=rtol)
+    np.testing.assert_allclose(results.bse[RHS_VAR].values, reference.bse[RHS_VAR].values, rtol=rtol)
@@ -0,0 +1,64 @@
+import os
+import warnings
+import pytest
+import gme
+from conftest import RHS_VAR, assert_same_estimates
+
+# An estimation resumed from checkpoint_dir loads the completed sectors rather than estimating them again
+
+
+def sector_model(data, rhs_var=RHS_VAR):
+    return gme.EstimationModel(data, lhs_var='trade_value', rhs_var=rhs_var,
+                               fixed_effects=[['importer', 'year'], ['exporter', 'year']], sector_by_sector=True)
+
+
+def estimate(model, checkpoint_dir):
+    '''
+    Estimate a model, returning its results and the keys of the regressions that were fitted.
+    '''
+    fitted = []
+
+    def record(key, iteration, deviance, max_coefficient_change, elapsed_time):
+        if key not in fitted:
+            fitted.append(key)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate(checkpoint_dir=str(checkpoint_dir), iteration_callback=record)
+    return results, fitted
+
+
+def test_resume(sector_data, tmp_path):
+    complete, fitted = estimate(sector_model(sector_data), tmp_path)
+    assert fitted == ['a', 'b', 'c']
+
+    # An interrupted estimation is missing the checkpoints of the sectors that were not completed
+    sector_files = sorted(name for name in os.listdir(tmp_path) if name.startswith('sector_'))
+    assert len(sector_files) == 3
+    os.remove(tmp_path / sector_files[0])
+
+    model = sector_model(sector_data)
+    resumed, fitted = estimate(model, tmp_path)
+    assert len(fitted) == 1
+    assert list(resumed.keys()) == ['a', 'b', 'c']
+    for sector in complete:
+        assert_same_estimates(resumed[sector], complete[sector], rtol=1e-12)
+        assert (model.modified_data[sector] is None) == (sector not in fitted)
+
+    # Once all sectors are stored, nothing is estimated again
+    assert estimate(sector_model(sector_data), tmp_path)[1] == []
+
+
+def test_changed_specification(sector_data, tmp_path):
+    estimate(sector_model(sector_data), tmp_path)
+    with pytest.raises(ValueError):
+        estimate(sector_model(sector_data, rhs_var=RHS_VAR[:2]), tmp_path)
+
+
+def test_changed_data(sector_data, tmp_path):
+    estimate(sector_model(sector_data), tmp_path)
+    panel = sector_data.data_frame.copy()
+    panel.loc[0, 'trade_value'] += 1
+    changed_data = gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                                      trade_var_name='trade_value', sector_var_name='sector')
+    with pytest.raises(ValueError):
+        estimate(sector_model(changed_data), tmp_path)
@@ -0,0 +1,95 @@
+import warnings
+import numpy as np
+import pytest
+import gme
+from gme.estimate.estimate_chunked import _read_file
+from conftest import RHS_VAR, assert_same_estimates
+
+# estimate_chunked absorbs the fixed effects over chunks of the data, so its estimates, standard errors, and
+# diagnostics should be those of the in-memory estimations
+
+
+def estimate_chunked(chunks, **arguments):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return gme.estimate_chunked(chunks, lhs_var='trade_value', **arguments)
+
+
+def split(panel, number_of_chunks=3):
+    return [panel.iloc[start::number_of_chunks] for start in range(number_of_chunks)]
+
+
+@pytest.mark.parametrize('std_errors', ['nonrobust', 'HC0', 'HC1'])
+def test_importer_year_exporter_year(panel, estimate, std_errors):
+    results, diagnostics = estimate_chunked(split(panel), rhs_var=RHS_VAR, std_errors=std_errors,
+                                            fixed_effects=[['importer', 'year'], ['exporter', 'year']])
+    reference = estimate(std_errors=std_errors)
+    assert_same_estimates(results, reference)
+    assert results.nobs == reference.nobs
+    assert diagnostics['Number of Regressors Dropped'] == 0
+
+
+def test_three_way_fixed_effects(panel, estimate):
+    fixed_effects = [['importer', 'year'], ['exporter', 'year'], 'pair']
+    results, diagnostics = estimate_chunked(split(panel), rhs_var=RHS_VAR, fixed_effects=fixed_effects)
+    reference = estimate(fixed_effects, engine='hdfe')
+    assert_same_estimates(results, reference)
+    assert results.nobs == reference.nobs
+    assert results.df_resid == reference.df_resid
+
+
+def test_omitted_fixed_effect(panel, estimate):
+    omit_fixed_effect = {'importer': ['C01']}
+    results, diagnostics = estimate_chunked(split(panel), rhs_var=RHS_VAR, fixed_effects=['importer', 'exporter'],
+                                            omit_fixed_effect=omit_fixed_effect)
+    assert_same_estimates(results, estimate(['importer', 'exporter'], omit_fixed_effect=omit_fixed_effect))
+    assert diagnostics['Regressors from User'] == ['importer_fe_C01']
+
+
+def test_collinear_covariates(panel, tmp_path):
+    # A covariate that only varies by importer-year is absorbed by the fixed effects, and a binary covariate equal to
+    # one only for zero trade flows is dropped along with those observations
+    panel = panel.copy()
+    panel['importer_gdp'] = panel.groupby(['importer', 'year'])['log_distance'].transform('mean')
+    panel['embargo'] = ((panel['trade_value'] == 0) & (panel['exporter'] == 'C03')).astype(float)
+    rhs_var = RHS_VAR + ['importer_gdp', 'embargo']
+    for number, chunk in enumerate(split(panel)):
+        chunk.to_csv(tmp_path / ('part_' + str(number) + '.csv'), index=False)
+    fixed_effects = [['importer', 'year'], ['exporter', 'year']]
+    results, diagnostics = estimate_chunked(str(tmp_path / 'part_*.csv'), rhs_var=rhs_var,
+                                            fixed_effects=fixed_effects)
+
+    data = gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value')
+    model = gme.EstimationModel(data, lhs_var='trade_value', rhs_var=rhs_var, fixed_effects=fixed_effects,
+                                engine='hdfe')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        reference = model.estimate()['all']
+    assert_same_estimates(results, reference)
+    assert results.nobs == reference.nobs
+    for diagnostic in ['Regressors with Zero Trade', 'Regressors Perfectly Collinear']:
+        assert diagnostics[diagnostic] == model.ppml_diagnostics[diagnostic]
+    assert diagnostics['Regressors with Zero Trade'] == ['embargo']
+    assert diagnostics['Regressors Perfectly Collinear'] == ['importer_gdp']
+
+
+def test_single_pass(panel, estimate):
+    # The chunks are read once and cached, so a generator can supply them
+    fixed_effects = [['importer', 'year'], ['exporter', 'year']]
+    results, diagnostics = estimate_chunked((chunk for chunk in split(panel)), rhs_var=RHS_VAR,
+                                            fixed_effects=fixed_effects)
+    assert_same_estimates(results, estimate(fixed_effects))
+
+
+def test_pickle_columns(panel, estimate, tmp_path):
+    # A pickle is loaded whole, and only the columns used for estimation are kept
+    fixed_effects = [['importer', 'year'], ['exporter', 'year']]
+    for number, chunk in enumerate(split(panel)):
+        chunk.assign(unused=0).to_pickle(tmp_path / ('part_' + str(number) + '.pkl'))
+    assert list(_read_file(str(tmp_path / 'part_0.pkl'), ['trade_value', 'importer'])) == ['trade_value', 'importer']
+    results, diagnostics = estimate_chunked(str(tmp_path / 'part_*.pkl'), rhs_var=RHS_VAR,
+                                            fixed_effects=fixed_effects)
+    reference = estimate(fixed_effects)
+    assert_same_estimates(results, reference)
+    assert results.nobs == reference.nobs
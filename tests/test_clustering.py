@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from conftest import RHS_VAR, assert_same_estimates
+
+FIXED_EFFECTS = ['importer', 'exporter']
+
+
+@pytest.fixture(scope='module')
+def two_way_reference(panel):
+    '''
+    Two-way clustered standard errors by importer and exporter, combined from one-way clustered covariances as in
+    Cameron, Gelbach, and Miller (2011): V(importer) + V(exporter) - V(importer and exporter).
+    '''
+    dummies = pd.get_dummies(panel[FIXED_EFFECTS], drop_first=True).astype(float)
+    exog = pd.concat([panel[RHS_VAR], dummies], axis=1)
+    exog.insert(0, 'constant', 1.0)
+
+    def covariance(groups):
+        model = sm.GLM(panel['trade_value'], exog, family=sm.families.Poisson())
+        return model.fit(cov_type='cluster', cov_kwds={'groups': pd.factorize(groups)[0], 'use_correction': False},
+                         tol=1e-12).cov_params().loc[RHS_VAR, RHS_VAR]
+
+    combined = (covariance(panel['importer']) + covariance(panel['exporter'])
+                - covariance(panel['importer'] + panel['exporter']))
+    return pd.Series(np.sqrt(np.diag(combined)), index=RHS_VAR)
+
+
+@pytest.mark.parametrize('engine', ['glm', 'hdfe', 'irls'])
+def test_two_way_clustering(estimate, two_way_reference, engine):
+    results = estimate(FIXED_EFFECTS, engine=engine, cluster_on=['importer', 'exporter'])
+    np.testing.assert_allclose(results.bse[RHS_VAR].values, two_way_reference.values, rtol=1e-6)
+
+
+def test_one_way_clustering(estimate):
+    assert_same_estimates(estimate(engine='hdfe', cluster_on='pair'), estimate(cluster_on='pair'))
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from gme.estimate._sparse_design import _SparseDesign
+from gme.estimate._ppml_estimation_and_diagnostics import _collinearity_check, _collinear_positions, \
+    _new_trade_contingent_collinearity_check
+
+# The collinearity checks factor X'X rather than X and compute the trade-contingent statistics from the sparse
+# design, so they should drop the same columns and observations as the QR-based checks they replaced, which are
+# reproduced below
+
+
+def qr_collinearity_check(data_frame, tolerance_level=1e-05):
+    '''
+    The previous collinearity check, from the R factor of a QR decomposition of the design.
+    '''
+    r_diagonal = np.abs(np.linalg.qr(data_frame.values)[1].diagonal())
+    collinear_columns = list(data_frame.columns[r_diagonal < tolerance_level])
+    return [col for col in data_frame.columns if col not in collinear_columns], collinear_columns
+
+
+def dense_trade_contingent_check(data_frame, lhs_var, rhs_columns):
+    '''
+    The previous trade-contingent check, column by column on a dense DataFrame.
+    '''
+    positive = data_frame[lhs_var] > 0
+    zero = data_frame[lhs_var] == 0
+    new_rhs_columns, excluded_columns = qr_collinearity_check(data_frame.loc[positive, rhs_columns])
+    mask = pd.Series(1, index=data_frame.index)
+    problem_variables = []
+    for col in excluded_columns:
+        mean_value = data_frame.loc[positive, col].mean()
+        if data_frame.loc[zero, col].min() < mean_value < data_frame.loc[zero, col].max():
+            new_rhs_columns.append(col)
+        else:
+            problem_variables.append(col)
+            if data_frame[col].nunique() == 2:
+                mask[data_frame[col] == 1] = 0
+    kept = data_frame.index[~(zero & (mask == 0))]
+    return kept, problem_variables, new_rhs_columns
+
+
+@pytest.fixture(scope='module')
+def design(panel):
+    '''
+    Covariates and importer and exporter dummies with planted collinear columns: exact linear combinations of the
+    covariates, a binary column equal to one only for zero trade flows, a column that is constant when trade is
+    positive but varies around that value when trade is zero, and an importer without positive trade.
+    '''
+    rng = np.random.default_rng(1)
+    panel = panel.copy()
+    panel.loc[panel['importer'] == 'C05', 'trade_value'] = 0
+    zero = panel['trade_value'] == 0
+    covariates = panel[['log_distance', 'agree_pta', 'contiguity']].copy()
+    covariates['distance_twice'] = 2 * covariates['log_distance']
+    covariates['pta_or_contiguity'] = covariates['agree_pta'] + covariates['contiguity']
+    covariates['embargo'] = (zero & (panel['exporter'] == 'C03')).astype(float)
+    covariates['gdp_share'] = np.where(zero, rng.random(panel.shape[0]), 0.5)
+    dummies = pd.get_dummies(panel[['importer', 'exporter']]).astype(float)
+    return pd.concat([panel[['trade_value']], covariates, dummies], axis=1), list(covariates.columns), \
+        list(dummies.columns)
+
+
+def test_collinearity_check(design):
+    data_frame, covariates, fixed_effects = design
+    rhs = data_frame[covariates + fixed_effects]
+    expected_columns, expected_collinear = qr_collinearity_check(rhs)
+    for checked in [rhs, _SparseDesign.from_data_frame(rhs)]:
+        noncollinear, collinear = _collinearity_check(checked)
+        assert collinear == expected_collinear
+        assert list(noncollinear.columns) == expected_columns
+    assert set(expected_collinear) >= {'distance_twice', 'pta_or_contiguity'}
+
+
+@pytest.mark.parametrize('block_size', [1, 4, 256])
+def test_collinear_positions_by_block(design, block_size):
+    data_frame, covariates, fixed_effects = design
+    rhs = data_frame[covariates + fixed_effects]
+    expected_collinear = qr_collinearity_check(rhs)[1]
+    positions = _collinear_positions(rhs.values.T @ rhs.values, block_size=block_size)
+    assert [rhs.columns[position] for position in positions] == expected_collinear
+
+
+def test_trade_contingent_check(design):
+    data_frame, covariates, fixed_effects = design
+    expected_rows, expected_problems, expected_columns = dense_trade_contingent_check(
+        data_frame, 'trade_value', covariates + fixed_effects)
+    specification = SimpleNamespace(lhs_var='trade_value', rhs_var=covariates)
+    rhs_design = _SparseDesign.from_data_frame(data_frame[covariates + fixed_effects])
+    adjusted_data_frame, adjusted_rhs, problems, adjusted_gram = _new_trade_contingent_collinearity_check(
+        data_frame, specification, rhs_design)
+    assert problems == expected_problems
+    assert set(problems) >= {'embargo', 'importer_C05'}
+    assert 'gdp_share' in adjusted_rhs.columns
+    assert adjusted_rhs.columns == expected_columns
+    assert list(adjusted_data_frame.index) == list(expected_rows)
+    assert adjusted_rhs.shape[0] == len(expected_rows)
+    np.testing.assert_allclose(adjusted_gram.values, adjusted_rhs.gram())
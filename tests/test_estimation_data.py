@@ -0,0 +1,22 @@
+import gme
+
+
+def create(panel, **arguments):
+    return gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value', **arguments)
+
+
+def test_copy_is_independent(panel):
+    panel = panel.copy()
+    estimation_data = create(panel)
+    panel.loc[0, 'trade_value'] = -1.0
+    estimation_data.data_frame.loc[1, 'log_distance'] = -1.0
+    assert estimation_data.data_frame.loc[0, 'trade_value'] != -1.0
+    assert panel.loc[1, 'log_distance'] != -1.0
+
+
+def test_shared_values_without_copy(panel):
+    panel = panel.copy()
+    estimation_data = create(panel, copy=False)
+    panel['trade_value'].values[0] = -1.0
+    assert estimation_data.data_frame['trade_value'].values[0] == -1.0
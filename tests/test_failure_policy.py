@@ -0,0 +1,93 @@
+import warnings
+import numpy as np
+import pytest
+import gme
+from conftest import RHS_VAR
+
+# A regression that exceeds its time or iteration budget is skipped, retried with a looser tolerance, or aborts the
+# estimation, and the outcome is reported in ppml_diagnostics. The estimation of the simulated panel takes 6 or 7
+# iterations, so a budget of 4 stops it before it converges, and a retry with a relative tolerance of 1e-2 converges
+# within the new budget.
+
+ENGINES = ['glm', 'irls', 'hdfe']
+FIXED_EFFECTS = [['importer', 'year'], ['exporter', 'year']]
+
+
+def estimate(data, engine='glm', iteration_limit=1000, **estimate_arguments):
+    '''
+    Estimate a model with budgets and a failure policy, returning the model and its results.
+    '''
+    model = gme.EstimationModel(data, lhs_var='trade_value', rhs_var=RHS_VAR, fixed_effects=FIXED_EFFECTS,
+                                engine=engine, iteration_limit=iteration_limit)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate(**estimate_arguments)
+    return model, results
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_skip(estimation_data, engine):
+    model, results = estimate(estimation_data, engine, iteration_budget=4)
+    assert results['all'] == 'Estimation stopped: iteration budget exceeded.'
+    assert model.ppml_diagnostics['Estimation Outcome'] == 'skipped'
+    assert model.ppml_diagnostics['Attempts'] == 1
+    assert model.ppml_diagnostics['Failure'] == 'Estimation stopped: iteration budget exceeded.'
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_retry(estimation_data, engine):
+    model, results = estimate(estimation_data, engine, iteration_budget=4, failure_policy='retry',
+                              retry_tolerance=1e-2)
+    assert not isinstance(results['all'], str)
+    assert model.ppml_diagnostics['Estimation Outcome'] == 'completed on retry'
+    assert model.ppml_diagnostics['Attempts'] == 2
+    assert model.ppml_diagnostics['Failure'] == 'Estimation stopped: iteration budget exceeded.'
+    _, reference = estimate(estimation_data, engine)
+    np.testing.assert_allclose(results['all'].params[RHS_VAR].values, reference['all'].params[RHS_VAR].values,
+                               rtol=1e-2)
+
+
+def test_failed_retry(estimation_data):
+    # A retry that exceeds its own budget is skipped
+    model, results = estimate(estimation_data, iteration_budget=4, failure_policy='retry', retry_tolerance=1e-8)
+    assert results['all'] == 'Estimation stopped: iteration budget exceeded.'
+    assert model.ppml_diagnostics['Estimation Outcome'] == 'skipped'
+    assert model.ppml_diagnostics['Attempts'] == 2
+
+
+def test_abort(sector_data):
+    model = gme.EstimationModel(sector_data, lhs_var='trade_value', rhs_var=RHS_VAR, fixed_effects=FIXED_EFFECTS,
+                                sector_by_sector=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        with pytest.raises(RuntimeError, match="failure_policy is 'abort'"):
+            model.estimate(iteration_budget=4, failure_policy='abort')
+
+
+def test_time_limit(estimation_data):
+    model, results = estimate(estimation_data, time_limit=0.)
+    assert results['all'] == 'Estimation stopped: time limit exceeded.'
+    assert model.ppml_diagnostics['Estimation Outcome'] == 'skipped'
+    assert model.ppml_diagnostics['Failure'] == 'Estimation stopped: time limit exceeded.'
+
+
+def test_budgets_of_each_sector(sector_data):
+    # Each sector has budgets of its own, so every sector is stopped rather than only the first
+    model = gme.EstimationModel(sector_data, lhs_var='trade_value', rhs_var=RHS_VAR, fixed_effects=FIXED_EFFECTS,
+                                sector_by_sector=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate(iteration_budget=4, failure_policy='retry', retry_tolerance=1e-2)
+    assert list(results.keys()) == ['a', 'b', 'c']
+    assert all(not isinstance(results[sector], str) for sector in results)
+    assert list(model.ppml_diagnostics.loc['Estimation Outcome']) == ['completed on retry'] * 3
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_iteration_limit(estimation_data, engine):
+    # A regression that reaches iteration_limit returns its estimates without converging, so it is not a failure
+    model, results = estimate(estimation_data, engine, iteration_limit=2, iteration_budget=4, failure_policy='abort')
+    assert not isinstance(results['all'], str)
+    assert model.ppml_diagnostics['Iterations'] == 2
+    assert model.ppml_diagnostics['Estimation Outcome'] == 'completed'
+    assert model.ppml_diagnostics['Failure'] == 'None'
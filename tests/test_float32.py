@@ -0,0 +1,32 @@
+import warnings
+import pytest
+import gme
+from conftest import RHS_VAR, assert_same_estimates
+
+# precision='float32' rounds the design to single precision, so its estimates and standard errors should match the
+# float64 estimation to within that rounding
+
+
+@pytest.mark.parametrize('std_errors', ['nonrobust', 'HC0', 'HC1'])
+def test_importer_year_exporter_year(estimate, std_errors):
+    assert_same_estimates(estimate(precision='float32', std_errors=std_errors), estimate(std_errors=std_errors),
+                          rtol=1e-5)
+
+
+@pytest.mark.parametrize('cluster_on', ['pair', ['importer', 'exporter']])
+def test_clustered(estimate, cluster_on):
+    fixed_effects = ['importer', 'exporter']
+    assert_same_estimates(estimate(fixed_effects, precision='float32', cluster_on=cluster_on),
+                          estimate(fixed_effects, cluster_on=cluster_on), rtol=1e-5)
+
+
+def test_stopped_estimation(estimation_data):
+    # An estimation stopped by its iteration budget has no precision check to report
+    model = gme.EstimationModel(estimation_data, lhs_var='trade_value', rhs_var=RHS_VAR,
+                                fixed_effects=[['importer', 'year'], ['exporter', 'year']], precision='float32')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate(iteration_budget=1)
+    assert isinstance(results['all'], str)
+    assert model.ppml_diagnostics['Estimation Outcome'] == 'skipped'
+    assert 'Design Precision' not in model.ppml_diagnostics.index
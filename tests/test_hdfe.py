@@ -0,0 +1,29 @@
+import pytest
+from conftest import assert_same_estimates
+
+# engine='hdfe' absorbs the fixed effects, so its rhs_var estimates and standard errors should be those of the
+# statsmodels estimation with a dummy variable for each fixed effect
+
+
+@pytest.mark.parametrize('std_errors', ['nonrobust', 'HC0', 'HC1'])
+def test_importer_year_exporter_year(estimate, std_errors):
+    assert_same_estimates(estimate(engine='hdfe', std_errors=std_errors), estimate(std_errors=std_errors))
+
+
+def test_importer_exporter(estimate):
+    fixed_effects = ['importer', 'exporter']
+    assert_same_estimates(estimate(fixed_effects, engine='hdfe'), estimate(fixed_effects))
+
+
+def test_three_way_fixed_effects(estimate):
+    # Pair fixed effects absorb the time-invariant covariates, so only the time-varying one is compared
+    fixed_effects = [['importer', 'year'], ['exporter', 'year'], 'pair']
+    hdfe, glm = estimate(fixed_effects, engine='hdfe'), estimate(fixed_effects)
+    assert hdfe.params['agree_pta'] == pytest.approx(glm.params['agree_pta'], rel=1e-6)
+    assert hdfe.bse['agree_pta'] == pytest.approx(glm.bse['agree_pta'], rel=1e-6)
+
+
+def test_omitted_fixed_effect(estimate):
+    omit_fixed_effect = {'importer': ['C01']}
+    assert_same_estimates(estimate(engine='hdfe', omit_fixed_effect=omit_fixed_effect),
+                          estimate(omit_fixed_effect=omit_fixed_effect))
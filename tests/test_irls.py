@@ -0,0 +1,30 @@
+import pytest
+from conftest import assert_same_estimates
+
+# engine='irls' solves the IRLS steps from the sparse design, following statsmodels' GLM, so its rhs_var estimates and
+# standard errors should be those of the statsmodels estimation with the dense design
+
+
+@pytest.mark.parametrize('std_errors', ['nonrobust', 'HC0', 'HC1'])
+def test_importer_year_exporter_year(estimate, std_errors):
+    results = estimate(engine='irls', std_errors=std_errors)
+    assert results.model == 'PPML (sparse design)'
+    assert_same_estimates(results, estimate(std_errors=std_errors))
+
+
+def test_one_way_clustering(estimate):
+    assert_same_estimates(estimate(engine='irls', cluster_on='pair'), estimate(cluster_on='pair'))
+
+
+def test_omitted_fixed_effect(estimate):
+    omit_fixed_effect = {'importer': ['C01']}
+    assert_same_estimates(estimate(engine='irls', omit_fixed_effect=omit_fixed_effect),
+                          estimate(omit_fixed_effect=omit_fixed_effect))
+
+
+@pytest.mark.parametrize('std_errors', ['nonrobust', 'HC1'])
+def test_dense_design_limit(estimate, std_errors):
+    # A design larger than dense_design_limit is estimated by engine='glm' with the sparse solver
+    results = estimate(dense_design_limit=1e-3, std_errors=std_errors)
+    assert results.model == 'PPML (sparse design)'
+    assert_same_estimates(results, estimate(std_errors=std_errors))
@@ -0,0 +1,38 @@
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+import gme
+from conftest import RHS_VAR, assert_same_estimates
+
+# Sectors estimated in worker processes should give the results of the serial estimation, in the same order
+
+
+def estimate_sectors(sector_data, **estimate_arguments):
+    model = gme.EstimationModel(sector_data, lhs_var='trade_value', rhs_var=RHS_VAR,
+                                fixed_effects=[['importer', 'year'], ['exporter', 'year']], sector_by_sector=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate(**estimate_arguments)
+    return model, results
+
+
+@pytest.fixture(scope='module')
+def serial(sector_data):
+    return estimate_sectors(sector_data)
+
+
+def assert_same_sectors(parallel, serial):
+    (parallel_model, parallel_results), (serial_model, serial_results) = parallel, serial
+    assert list(parallel_results.keys()) == list(serial_results.keys()) == ['a', 'b', 'c']
+    for sector in serial_results:
+        assert_same_estimates(parallel_results[sector], serial_results[sector], rtol=1e-10)
+    assert list(parallel_model.ppml_diagnostics.columns) == list(serial_model.ppml_diagnostics.columns)
+
+
+def test_executor(sector_data, serial):
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert_same_sectors(estimate_sectors(sector_data, executor=executor), serial)
+
+
+def test_n_jobs(sector_data, serial):
+    assert_same_sectors(estimate_sectors(sector_data, n_jobs=2), serial)
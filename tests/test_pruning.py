@@ -0,0 +1,50 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+import gme
+from conftest import RHS_VAR
+
+# prune_fixed_effects drops the observations of singleton fixed effect groups and of groups without positive trade
+# flows, which do not inform the rhs_var estimates
+
+
+@pytest.fixture(scope='module')
+def pruned_panel(panel):
+    '''
+    The test panel with one fixed effect group without trade (the importer-year C01, 2010, with 9 observations) and
+    one singleton (a flow of a new importer, C99, in 2010).
+    '''
+    panel = panel.copy()
+    panel.loc[(panel['importer'] == 'C01') & (panel['year'] == 2010), 'trade_value'] = 0
+    singleton = panel.loc[(panel['importer'] == 'C02') & (panel['exporter'] == 'C03') & (panel['year'] == 2010)]
+    singleton = singleton.assign(importer='C99', pair='C99C03', trade_value=100.0)
+    return pd.concat([panel, singleton], ignore_index=True)
+
+
+def estimate(panel, **model_arguments):
+    data = gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value')
+    model = gme.EstimationModel(data, lhs_var='trade_value', rhs_var=RHS_VAR,
+                                fixed_effects=[['importer', 'year'], ['exporter', 'year']], **model_arguments)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate()['all']
+    return model, results
+
+
+@pytest.mark.parametrize('engine', ['glm', 'hdfe'])
+def test_pruned_groups(pruned_panel, engine):
+    model, results = estimate(pruned_panel, engine=engine, prune_fixed_effects=True)
+    assert model.ppml_diagnostics['Singleton Observations Dropped'] == 1
+    assert model.ppml_diagnostics['Zero Trade Group Observations Dropped'] == 9
+    reference_model, reference = estimate(pruned_panel, engine=engine)
+    np.testing.assert_allclose(results.params[RHS_VAR].values, reference.params[RHS_VAR].values, rtol=1e-6)
+    assert results.nobs == reference.nobs - 1
+
+
+@pytest.mark.parametrize('engine', ['glm', 'irls', 'hdfe'])
+def test_stages_are_unique(pruned_panel, engine):
+    model, results = estimate(pruned_panel, engine=engine, prune_fixed_effects=True)
+    assert model.stage_diagnostics.index.is_unique
+    assert 'Fixed Effect Pruning' in model.stage_diagnostics.index.get_level_values('Stage')
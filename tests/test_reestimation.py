@@ -0,0 +1,33 @@
+import warnings
+import pytest
+import gme
+from conftest import RHS_VAR, simulate_panel, assert_same_estimates
+
+# A model re-estimated after a year of data is added, starting from the previous estimates, converges in fewer
+# iterations to the estimates of an estimation from the default starting values
+
+FIXED_EFFECTS = [['importer', 'year'], ['exporter', 'year']]
+
+
+def estimate(panel, engine, warm_start=None):
+    data = gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value')
+    model = gme.EstimationModel(data, lhs_var='trade_value', rhs_var=RHS_VAR, fixed_effects=FIXED_EFFECTS,
+                                engine=engine, warm_start=warm_start)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate()['all']
+    return model, results
+
+
+@pytest.mark.parametrize('engine', ['glm', 'irls', 'hdfe'])
+def test_new_year(engine):
+    panel = simulate_panel(years=(2010, 2011, 2012, 2013))
+    _, previous = estimate(panel[panel['year'] < 2013], engine)
+    # Entries of the previous estimates other than RHS_VAR (the fixed effects of engine='glm' and 'irls') are ignored
+    model, results = estimate(panel, engine, warm_start=previous.params)
+    reference_model, reference = estimate(panel, engine)
+    assert_same_estimates(results, reference)
+    assert results.nobs == reference.nobs
+    assert model.ppml_diagnostics['Starting Values'] == 'user'
+    assert model.ppml_diagnostics['Iterations'] < reference_model.ppml_diagnostics['Iterations']
@@ -0,0 +1,27 @@
+import pytest
+import gme
+from conftest import RHS_VAR, simulate_panel
+
+# With several outcomes estimated sector by sector, results are keyed by outcome and sector, so outcome and sector
+# names that would produce the same key are rejected before any estimation
+
+
+def sector_model(lhs_var, sectors):
+    panel = simulate_panel(number_of_countries=5, years=(2010,), sectors=sectors)
+    for outcome in lhs_var:
+        panel[outcome] = panel['trade_value']
+    data = gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value', sector_var_name='sector')
+    return gme.EstimationModel(data, lhs_var=lhs_var, rhs_var=RHS_VAR, fixed_effects=['importer', 'exporter'],
+                               sector_by_sector=True)
+
+
+def test_colliding_keys():
+    model = sector_model(['trade', 'trade_10'], ['10_a', 'a'])
+    with pytest.raises(ValueError, match='trade_10_a'):
+        model.estimate()
+
+
+def test_distinct_keys():
+    model = sector_model(['trade', 'trade_10'], ['a', 'b'])
+    assert sorted(model.estimate()) == ['trade_10_a', 'trade_10_b', 'trade_a', 'trade_b']
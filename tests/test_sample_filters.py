@@ -0,0 +1,40 @@
+import pytest
+import gme
+from conftest import assert_same_estimates
+
+
+def test_drop_years(estimate):
+    results = estimate(drop_years=[2010])
+    reference = estimate(keep_years=[2011, 2012])
+    assert_same_estimates(results, reference)
+    assert results.nobs == reference.nobs
+
+
+@pytest.fixture(scope='module')
+def us_data(panel):
+    '''
+    The test panel with the countries C01 and C02 renamed 'US' and 'USA', so that one code is contained in the other.
+    '''
+    names = {'C01': 'US', 'C02': 'USA'}
+    panel = panel.assign(importer=panel['importer'].replace(names), exporter=panel['exporter'].replace(names))
+    return gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value')
+
+
+def test_drop_importer_is_exact(estimate, us_data):
+    # Dropping 'US' removes its 9 flows in each of the 3 years and not those of 'USA'
+    results = estimate(data=us_data, drop_imp=['US'])
+    assert results.nobs == us_data.data_frame.shape[0] - 27
+    assert 'importer_year_fe_USA2010' in results.params.index
+    assert 'importer_year_fe_US2010' not in results.params.index
+
+
+def test_keep_importer_is_exact(estimate, us_data):
+    results = estimate(['exporter'], data=us_data, keep_imp=['US'])
+    assert results.nobs == 27
+
+
+def test_omit_fixed_effect_is_exact(estimate, us_data):
+    results = estimate(['importer', 'exporter'], data=us_data, omit_fixed_effect={'importer': ['US']})
+    assert 'importer_fe_US' not in results.params.index
+    assert 'importer_fe_USA' in results.params.index
@@ -0,0 +1,67 @@
+import warnings
+import pytest
+import gme
+from conftest import RHS_VAR, simulate_panel, assert_same_estimates
+
+# Sectors that cannot be estimated are found before estimation and skipped with the reason, and the other sectors are
+# estimated as they would be without them
+
+FIXED_EFFECTS = [['importer', 'year'], ['exporter', 'year']]
+
+
+def sector_data(panel):
+    return gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value', sector_var_name='sector')
+
+
+def estimate(data):
+    model = gme.EstimationModel(data, lhs_var='trade_value', rhs_var=RHS_VAR, fixed_effects=FIXED_EFFECTS,
+                                sector_by_sector=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate()
+    return model, results
+
+
+@pytest.fixture(scope='module')
+def infeasible_panel():
+    '''
+    A sector panel in which sector 'b' has no positive trade flows, sector 'c' has two positive trade flows (fewer
+    than the three covariates), and sector 'd' has a single exporter.
+    '''
+    panel = simulate_panel(sectors=['a', 'b', 'c', 'd', 'e'])
+    panel.loc[panel['sector'] == 'b', 'trade_value'] = 0
+    sector_c = panel.index[panel['sector'] == 'c']
+    panel.loc[sector_c[2:], 'trade_value'] = 0
+    panel.loc[sector_c[:2], 'trade_value'] = 10
+    return panel[(panel['sector'] != 'd') | (panel['exporter'] == 'C01')]
+
+
+def test_infeasible_sectors(infeasible_panel):
+    model, results = estimate(sector_data(infeasible_panel))
+    assert list(results.keys()) == ['a', 'b', 'c', 'd', 'e']
+    assert results['b'] == 'Estimation skipped: no positive trade flows.'
+    assert results['c'] == 'Estimation skipped: fewer positive trade flows (2) than covariates (3).'
+    assert results['d'] == 'Estimation skipped: single exporter.'
+    skipped = model.ppml_diagnostics.loc['Estimation Skipped']
+    assert skipped['b'] == 'no positive trade flows'
+    assert skipped['c'] == 'fewer positive trade flows (2) than covariates (3)'
+    assert skipped['d'] == 'single exporter'
+
+    # The feasible sectors are estimated as in a panel without the infeasible sectors
+    _, reference = estimate(sector_data(infeasible_panel[infeasible_panel['sector'].isin(['a', 'e'])]))
+    for sector in ['a', 'e']:
+        assert_same_estimates(results[sector], reference[sector])
+
+
+def test_infeasible_outcome():
+    # An outcome without positive trade flows in a sector is skipped, and the other outcome of the sector is estimated
+    panel = simulate_panel(sectors=['a', 'b'])
+    panel['exports'] = panel['trade_value'].where(panel['sector'] == 'a', 0)
+    model = gme.EstimationModel(sector_data(panel), lhs_var=['trade_value', 'exports'], rhs_var=RHS_VAR,
+                                fixed_effects=FIXED_EFFECTS, sector_by_sector=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = model.estimate()
+    assert results['exports_b'] == 'Estimation skipped: no positive trade flows.'
+    assert not any(isinstance(results[key], str) for key in results if key != 'exports_b')
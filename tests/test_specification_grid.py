@@ -0,0 +1,90 @@
+import warnings
+import numpy as np
+import pytest
+import gme
+from gme.estimate.SpecificationGrid import _grid_key
+from conftest import RHS_VAR, simulate_panel
+
+# Each specification of a SpecificationGrid is estimated as by an EstimationModel with the same arguments, whether the
+# grid is estimated serially or in parallel, and results are keyed by spec_name and the key of the regression
+
+FIXED_EFFECTS = [['importer', 'year'], ['exporter', 'year']]
+
+# Specifications are keyword arguments shared by Specification and EstimationModel. The Specification defaults of
+# drop_intratrade and drop_missing differ from those of EstimationModel, so they are given explicitly.
+SPECIFICATIONS = {
+    '(1)': dict(rhs_var=RHS_VAR[:2]),
+    '(2)': dict(rhs_var=RHS_VAR),
+    '(3)': dict(rhs_var=RHS_VAR, keep_years=[2011, 2012]),
+    '(4)': dict(rhs_var=RHS_VAR, omit_fixed_effect={'importer_year': ['C01']}),
+    '(5)': dict(rhs_var=RHS_VAR, sector_by_sector=True),
+    '(6)': dict(rhs_var=RHS_VAR, lhs_var=['trade_value', 'exports']),
+}
+
+
+@pytest.fixture(scope='module')
+def grid_data():
+    panel = simulate_panel(sectors=['a', 'b'])
+    panel['exports'] = panel['trade_value'] * (panel['agree_pta'] + 1)
+    return gme.EstimationData(panel, imp_var_name='importer', exp_var_name='exporter', year_var_name='year',
+                              trade_var_name='trade_value', sector_var_name='sector')
+
+
+def arguments(spec_name):
+    specification_arguments = dict(lhs_var='trade_value', fixed_effects=FIXED_EFFECTS, drop_intratrade=True,
+                                   drop_missing=False)
+    specification_arguments.update(SPECIFICATIONS[spec_name])
+    return specification_arguments
+
+
+def run_grid(data, **run_arguments):
+    grid = gme.SpecificationGrid(data, [gme.Specification(spec_name=spec_name, **arguments(spec_name))
+                                        for spec_name in SPECIFICATIONS])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        grid.run_many(**run_arguments)
+    return grid
+
+
+@pytest.fixture(scope='module')
+def references(grid_data):
+    '''
+    The results of each specification estimated by EstimationModel.
+    '''
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for spec_name in SPECIFICATIONS:
+            results[spec_name] = gme.EstimationModel(grid_data, spec_name=spec_name,
+                                                     **arguments(spec_name)).estimate()
+    return results
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_same_as_estimation_model(grid_data, references, n_jobs):
+    grid = run_grid(grid_data, n_jobs=n_jobs)
+    expected_keys = [_grid_key(spec_name, key) for spec_name in SPECIFICATIONS
+                     for key in references[spec_name]]
+    assert list(grid.results_dict.keys()) == expected_keys
+    assert list(grid.ppml_diagnostics.columns) == expected_keys
+    for spec_name in SPECIFICATIONS:
+        rhs_var = SPECIFICATIONS[spec_name]['rhs_var']
+        for key, reference in references[spec_name].items():
+            results = grid.results_dict[_grid_key(spec_name, key)]
+            np.testing.assert_allclose(results.params[rhs_var].values, reference.params[rhs_var].values, rtol=1e-8)
+            np.testing.assert_allclose(results.bse[rhs_var].values, reference.bse[rhs_var].values, rtol=1e-8)
+            assert results.nobs == reference.nobs
+
+
+def test_keys(grid_data):
+    grid = run_grid(grid_data)
+    assert list(grid.results_dict.keys()) == ['(1)', '(2)', '(3)', '(4)', '(5)_a', '(5)_b', '(6)_trade_value',
+                                              '(6)_exports']
+
+
+def test_previous_warm_start_in_parallel(grid_data):
+    grid = gme.SpecificationGrid(grid_data, [gme.Specification(spec_name=spec_name, warm_start='previous',
+                                                               **arguments(spec_name))
+                                             for spec_name in ['(1)', '(2)']])
+    with pytest.raises(ValueError, match="warm_start='previous'"):
+        grid.run_many(n_jobs=2)